@@ -0,0 +1,85 @@
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# Ensure project root is importable when running as a script
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from src.tools import artifact_codec
+
+PHRASES = [
+    "希望能增加4K导出选项",
+    "配音太机械了，不够自然",
+    "导出速度太慢，等了十分钟",
+    "界面很好看，操作也顺手",
+    "能不能支持批量处理？",
+    "字幕识别准确率还需要提升",
+]
+
+
+def make_comments(count: int, seed: int = 1209) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": idx,
+            "user": f"user_{rng.randrange(100000)}",
+            "content": "，".join(rng.sample(PHRASES, rng.randint(1, 3))),
+            "likes": rng.randrange(1000),
+            "date": f"2025-06-{rng.randint(1, 30):02d}",
+        }
+        for idx in range(count)
+    ]
+
+
+def stdlib_write(payload: Any, path: Path) -> None:
+    # The path every file tool used before the artifact codec.
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def stdlib_read(path: Path) -> Any:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def timed(func: Callable[[], Any]) -> Tuple[float, Any]:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare artifact encodings on synthetic comments.")
+    parser.add_argument("--comments", type=int, default=1_000_000, help="Number of synthetic comments.")
+    args = parser.parse_args()
+
+    comments = make_comments(args.comments)
+    cases = [
+        ("json (stdlib, indent=2)", "comments.json", stdlib_write, stdlib_read),
+        ("json (orjson)", "comments.json", artifact_codec.write_artifact, artifact_codec.read_artifact),
+        ("jsonl (orjson)", "comments.jsonl", artifact_codec.write_artifact, artifact_codec.read_artifact),
+        ("json.zst (orjson+zstd)", "comments.json.zst", artifact_codec.write_artifact, artifact_codec.read_artifact),
+        ("jsonl.zst (orjson+zstd)", "comments.jsonl.zst", artifact_codec.write_artifact, artifact_codec.read_artifact),
+    ]
+
+    print(f"{args.comments} comments")
+    print(f"{'format':<26}{'write s':>10}{'read s':>10}{'size MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, file_name, write, read in cases:
+            path = Path(tmp_dir) / label.split()[0] / file_name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_seconds, _ = timed(lambda: write(comments, path))
+            read_seconds, loaded = timed(lambda: read(path))
+            if loaded != comments:
+                raise AssertionError(f"{label}: round trip changed the payload")
+            size_mb = path.stat().st_size / 1024 / 1024
+            print(f"{label:<26}{write_seconds:>10.2f}{read_seconds:>10.2f}{size_mb:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+# Modules that must only be imported when a chart or a statistic is actually computed.
+DEFERRED_MODULES = ["matplotlib", "numpy", "pandas"]
+# Cumulative import time budget of each entry point, in milliseconds.
+BUDGETS_MS = {
+    "src.agents.chat": 400.0,
+    "src.agents.binary_classification.agent": 2500.0,
+}
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every module imported by `import module`."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr}")
+    times: Dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        # "import time:      self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def check(module: str, budget_ms: float) -> Tuple[float, List[str]]:
+    times = import_times(module)
+    total_ms = times.get(module, 0) / 1000
+    problems = [f"{module} imports {name}" for name in DEFERRED_MODULES if name in times]
+    if total_ms > budget_ms:
+        problems.append(f"{module} took {total_ms:.0f} ms, budget {budget_ms:.0f} ms")
+    return total_ms, problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the import time of the CLI entry points.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, e.g. on slow machines.")
+    args = parser.parse_args()
+
+    failures: List[str] = []
+    for module, budget_ms in BUDGETS_MS.items():
+        total_ms, problems = check(module, budget_ms * args.scale)
+        print(f"{module}: {total_ms:.0f} ms (budget {budget_ms * args.scale:.0f} ms)")
+        failures.extend(problems)
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
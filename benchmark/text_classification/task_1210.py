@@ -10,12 +10,11 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
 from src.agents.text_classification import tool
-from src.llms import volcano
 
 BASE_DIR = Path(__file__).resolve().parent
 INPUT_PATH = BASE_DIR / "input_1210.json"
 OUTPUT_PATH = BASE_DIR / "output_1210.json"
-BATCH_SIZE = 50
+MODEL_NAME = "doubao-seed-1-6-lite-251015"
 
 
 def load_json(path: Path) -> Any:
@@ -60,25 +59,6 @@ def compute_accuracy(
     return correct / total, mismatches
 
 
-def chunked(items: List[Any], size: int):
-    """Yield list slices with a fixed chunk size."""
-    for start in range(0, len(items), size):
-        yield items[start : start + size]
-
-
-def run_batches(
-    texts: List[str],
-    categories: List[str],
-    batch_size: int,
-    model,
-) -> List[List[str]]:
-    """Run classification in batches and aggregate outputs."""
-    aggregated: List[List[str]] = []
-    for batch in chunked(texts, batch_size):
-        aggregated.extend(tool(texts=batch, categories=categories, model=model))
-    return aggregated
-
-
 def write_report(
     texts: List[Dict[str, Any]],
     expected: List[List[str]],
@@ -127,12 +107,9 @@ def main() -> None:
     expected_labels = load_json(OUTPUT_PATH)
 
     text_contents = [item["content"] for item in texts]
-    model = volcano.create_model("doubao-seed-1-6-lite-251015")
-    predicted_labels = run_batches(
-        texts=text_contents,
-        categories=categories,
-        batch_size=BATCH_SIZE,
-        model=model,
+    # The tool packs texts into token-budgeted batches itself.
+    predicted_labels = tool.invoke(
+        {"texts": text_contents, "categories": categories, "model_name": MODEL_NAME}
     )
 
     accuracy, mismatches = compute_accuracy(expected=expected_labels, predicted=predicted_labels)
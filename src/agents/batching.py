@@ -0,0 +1,248 @@
+"""Concurrent, order-preserving batch execution shared by the agent tools."""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+import xxhash
+
+from ..memory.progress import current_progress_callback, current_run_id, get_progress_store
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_BATCH_SIZE = int(os.environ.get("AGENT_BATCH_SIZE", "200"))
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("AGENT_MAX_CONCURRENCY", "4"))
+# Token budgets per request; raise them towards the model's real context/output limits.
+DEFAULT_MAX_INPUT_TOKENS = int(os.environ.get("AGENT_MAX_INPUT_TOKENS", "16000"))
+DEFAULT_MAX_OUTPUT_TOKENS = int(os.environ.get("AGENT_MAX_OUTPUT_TOKENS", "4000"))
+TOKENIZER_ENCODING = os.environ.get("AGENT_TOKENIZER_ENCODING", "cl100k_base")
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Any:
+    """Load the tiktoken encoding once; None when tiktoken or its BPE file is unavailable."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as exc:
+        logger.warning("tiktoken encoding %s unavailable, estimating tokens: %s", TOKENIZER_ENCODING, exc)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken, falling back to a CJK-aware character estimate."""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    wide = sum(1 for ch in text if ord(ch) > 0x2E7F)
+    return wide + (len(text) - wide + 3) // 4
+
+
+@dataclass
+class PackingReport:
+    """How well `pack_by_tokens` filled its budgets."""
+
+    max_input_tokens: int
+    max_output_tokens: int
+    input_tokens: List[int] = field(default_factory=list)
+    output_tokens: List[int] = field(default_factory=list)
+    sizes: List[int] = field(default_factory=list)
+    oversized: int = 0
+
+    @property
+    def input_fill(self) -> float:
+        """Mean share of the input budget used per batch."""
+        if not self.input_tokens:
+            return 0.0
+        return sum(self.input_tokens) / (len(self.input_tokens) * self.max_input_tokens)
+
+    @property
+    def output_fill(self) -> float:
+        """Mean share of the output budget the batches are expected to use."""
+        if not self.output_tokens:
+            return 0.0
+        return sum(self.output_tokens) / (len(self.output_tokens) * self.max_output_tokens)
+
+    def log(self, name: str) -> None:
+        logger.info(
+            "%s packing: %s items in %s batches, input fill %.0f%%, est. output fill %.0f%%, %s oversized",
+            name,
+            sum(self.sizes),
+            len(self.sizes),
+            self.input_fill * 100,
+            self.output_fill * 100,
+            self.oversized,
+        )
+
+
+def pack_by_tokens(
+    texts: Sequence[T],
+    *,
+    overhead_tokens: int = 0,
+    output_tokens_per_item: int = 0,
+    max_input_tokens: int = DEFAULT_MAX_INPUT_TOKENS,
+    max_output_tokens: int = DEFAULT_MAX_OUTPUT_TOKENS,
+    max_items: Optional[int] = None,
+) -> Tuple[List[List[T]], PackingReport]:
+    """Greedily pack consecutive texts into batches that fit the token budgets.
+
+    Args:
+        texts: Texts (or other JSON values) to pack; order is preserved across and within batches.
+        overhead_tokens: Prompt tokens every request pays regardless of its texts.
+        output_tokens_per_item: Estimated completion tokens produced per text.
+        max_input_tokens: Prompt budget per batch, including `overhead_tokens`.
+        max_output_tokens: Completion budget per batch.
+        max_items: Optional hard cap on the number of texts per batch.
+
+    Returns:
+        The batches and a report of how full they are. A text that alone exceeds the
+        input budget is placed in a batch of its own and counted as oversized.
+    """
+    report = PackingReport(max_input_tokens=max_input_tokens, max_output_tokens=max_output_tokens)
+    batches: List[List[T]] = []
+    current: List[T] = []
+    current_tokens = overhead_tokens
+
+    def flush() -> None:
+        if current:
+            batches.append(list(current))
+            report.sizes.append(len(current))
+            report.input_tokens.append(current_tokens)
+            report.output_tokens.append(len(current) * output_tokens_per_item)
+            current.clear()
+
+    for text in texts:
+        # Each text is serialized as a JSON element inside the prompt payload.
+        tokens = count_tokens(json.dumps(text, ensure_ascii=False)) + 1
+        full = current and (
+            current_tokens + tokens > max_input_tokens
+            or (len(current) + 1) * output_tokens_per_item > max_output_tokens
+            or (max_items is not None and len(current) >= max_items)
+        )
+        if full:
+            flush()
+            current_tokens = overhead_tokens
+        if overhead_tokens + tokens > max_input_tokens:
+            report.oversized += 1
+        current.append(text)
+        current_tokens += tokens
+    flush()
+    return batches, report
+
+
+def chunked(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    """Yield consecutive slices of `items` holding at most `size` elements."""
+    if size <= 0:
+        raise ValueError(f"batch size must be positive: {size}")
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def align(results: Optional[List[R]], size: int, fill: R) -> List[R]:
+    """Pad or truncate a batch result so it lines up with `size` inputs."""
+    results = list(results or [])
+    if len(results) != size:
+        logger.warning(
+            "Batch result count (%s) does not match batch size (%s); padding/truncating.",
+            len(results),
+            size,
+        )
+    return (results + [fill] * size)[:size]
+
+
+def run_batches(
+    batches: Sequence[Sequence[T]],
+    worker: Callable[[Sequence[T]], R],
+    *,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    name: str = "batch",
+    checkpoint_key: Optional[str] = None,
+) -> List[R]:
+    """Run `worker` over every batch concurrently and return results in input order.
+
+    Args:
+        batches: Batches to process; each one is passed to `worker` unchanged.
+        worker: Callable producing the result for a single batch.
+        max_concurrency: Upper bound on batches in flight at the same time.
+        name: Label used when logging per-batch latency.
+        checkpoint_key: Key of the task the batches belong to. Inside a resumable run
+            (see `memory.progress.run_scope`) finished batch results are recorded under
+            it, and batches already finished by an earlier attempt are not recomputed.
+
+    Inside `memory.progress.progress_scope`, a `{"type": "batch", ...}` event is sent to
+    the callback as each batch finishes.
+
+    Returns:
+        One worker result per batch, ordered like `batches`.
+    """
+    total = len(batches)
+    if total == 0:
+        return []
+
+    run_id = current_run_id() if checkpoint_key else None
+    store = get_progress_store() if run_id else None
+    # Read here: executor threads do not inherit the caller's context.
+    notify = current_progress_callback()
+    finished = [0]
+    finished_lock = threading.Lock()
+
+    def report(batch: Sequence[T], seconds: float, restored: bool) -> None:
+        if notify is None:
+            return
+        with finished_lock:
+            finished[0] += 1
+            done = finished[0]
+        notify(
+            {
+                "type": "batch",
+                "name": name,
+                "done": done,
+                "total": total,
+                "items": len(batch),
+                "seconds": round(seconds, 3),
+                "restored": restored,
+            }
+        )
+
+    def timed(index: int) -> R:
+        batch = batches[index]
+        batch_key = ""
+        if store is not None:
+            batch_key = xxhash.xxh3_128_hexdigest(
+                f"{checkpoint_key}\x00{json.dumps(batch, ensure_ascii=False, sort_keys=True)}"
+            )
+            recorded = store.get(run_id, batch_key)
+            if recorded is not None:
+                logger.info("%s %s/%s: restored from run %s", name, index + 1, total, run_id)
+                report(batch, 0.0, restored=True)
+                return recorded
+
+        started = time.perf_counter()
+        result = worker(batch)
+        if store is not None and result is not None:
+            store.put(run_id, batch_key, result)
+        seconds = time.perf_counter() - started
+        logger.info("%s %s/%s: %s items in %.2fs", name, index + 1, total, len(batch), seconds)
+        report(batch, seconds, restored=False)
+        return result
+
+    workers = max(1, min(max_concurrency, total))
+    if workers == 1:
+        return [timed(index) for index in range(total)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name) as executor:
+        # `map` yields in submission order, which keeps results aligned with inputs.
+        results = list(executor.map(timed, range(total)))
+    logger.info("%s: %s batches finished in %.2fs", name, total, time.perf_counter() - started)
+    return results
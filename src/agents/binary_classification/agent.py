@@ -2,13 +2,26 @@
 
 import json
 import logging
-from typing import List
+from typing import List, Optional, Sequence
 
-import json_repair
 from langchain.agents import create_agent
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool as lc_tool
 
-from ...llms.volcano import create_model
+from ...llms.hedging import hedged
+from ...llms.volcano import DEFAULT_MODEL_NAME, get_model
+from ..batching import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_INPUT_TOKENS,
+    align,
+    count_tokens,
+    pack_by_tokens,
+    run_batches,
+)
+from ..dedup import classify_unique, label_recorder, task_key
+from ..json_array import ArrayStream, request_array
+from ..pool import get_agent
 
 logger = logging.getLogger(__name__)
 
@@ -23,10 +36,10 @@ def system_prompt() -> str:
     )
 
 
-def agent(model=None):
+def agent(model=None, checkpointer=None):
     prompt_template = system_prompt()
-    model = model or create_model()
-    return create_agent(model, tools=[], system_prompt=prompt_template)
+    model = model or get_model()
+    return create_agent(model, tools=[], system_prompt=prompt_template, checkpointer=checkpointer)
 
 
 @lc_tool
@@ -35,7 +48,11 @@ def tool(
     criteria: str,
     positive_label: str,
     negative_label: str,
-) -> List[str]:
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    max_input_tokens: int = DEFAULT_MAX_INPUT_TOKENS,
+    model_name: str = DEFAULT_MODEL_NAME,
+) -> List[Optional[str]]:
     """
     Classify each text into one of two labels based on the provided criteria.
 
@@ -44,36 +61,105 @@ def tool(
         criteria: Description of what qualifies as the positive case.
         positive_label: Label to use when the text meets the criteria.
         negative_label: Label to use when the text does not meet the criteria.
+        batch_size: Maximum number of texts sent to the model in one request.
+        max_concurrency: Maximum number of batches classified at the same time.
+        max_input_tokens: Prompt token budget per request; batches are packed up to it.
+        model_name: Model used for classification.
 
     Returns:
-        List of labels aligned with the input texts.
+        List of labels aligned with the input texts; None for texts whose batch failed,
+        or an empty list when every batch failed.
     """
-    input_json = json.dumps(
-        {
-            "texts": texts,
-            "criteria": criteria,
-            "positive_label": positive_label,
-            "negative_label": negative_label,
-        },
-        ensure_ascii=False,
+    bin_agent = get_agent(agent, system_prompt(), model_name)
+    task = task_key(
+        "binary_classification",
+        model_name,
+        system_prompt(),
+        criteria,
+        positive_label,
+        negative_label,
     )
-    bin_agent = agent()
-    content = (
-        "For each text, decide if it satisfies the criteria. "
-        "Use the positive_label when it matches; otherwise use the negative_label. "
-        "Return only a JSON array of labels in order.\n"
-        f"{input_json}"
+
+    def build_content(batch: List[str]) -> str:
+        input_json = json.dumps(
+            {
+                "texts": batch,
+                "criteria": criteria,
+                "positive_label": positive_label,
+                "negative_label": negative_label,
+            },
+            ensure_ascii=False,
+        )
+        return (
+            "For each text, decide if it satisfies the criteria. "
+            "Use the positive_label when it matches; otherwise use the negative_label. "
+            "Return only a JSON array of labels in order.\n"
+            f"{input_json}"
+        )
+
+    def memoizable(label: str) -> bool:
+        return label in (positive_label, negative_label)
+
+    remember = label_recorder(task, memoizable)
+
+    def classify_batch(batch: List[str], config: RunnableConfig) -> Optional[List[Optional[str]]]:
+        def ask(texts: Sequence[str], stream: ArrayStream) -> str:
+            result = bin_agent.invoke(
+                {"messages": [{"role": "user", "content": build_content(list(texts))}]},
+                config=stream.attach(config),
+            )
+            return result["messages"][-1].content
+
+        # Labels are memoized as they stream in, so they survive a deadline or a crash.
+        predicted = request_array(batch, ask, on_item=lambda index, label: remember(batch[index], str(label)))
+        try:
+            if predicted is None:
+                logger.error("Agent result is not a list")
+                return None
+
+            return align([str(label) for label in predicted], len(batch), None)
+        except Exception as exc:
+            logger.error("Error parsing agent result: %s", exc)
+            return None
+
+    # Each label is emitted as a JSON string followed by a separator.
+    label_tokens = max(
+        count_tokens(json.dumps(label, ensure_ascii=False)) for label in (positive_label, negative_label)
     )
-    result = bin_agent.invoke({"messages": [{"role": "user", "content": content}]})
-    response_content = result["messages"][-1].content
-
-    try:
-        predicted = json_repair.loads(response_content)
-        if not isinstance(predicted, list):
-            logger.error("Agent result is not a list: %s", type(predicted))
-            return []
-
-        return [str(label) for label in predicted]
-    except Exception as exc:
-        logger.error("Error parsing agent result: %s", exc)
+
+    def classify_texts(unique_texts: List[str]) -> List[Optional[str]]:
+        batches, report = pack_by_tokens(
+            unique_texts,
+            overhead_tokens=count_tokens(system_prompt()) + count_tokens(build_content([])),
+            output_tokens_per_item=label_tokens + 1,
+            max_input_tokens=max_input_tokens,
+            max_items=batch_size,
+        )
+        report.log("binary_classification")
+        batch_labels = run_batches(
+            batches,
+            hedged(classify_batch, "binary_classification"),
+            max_concurrency=max_concurrency,
+            name="binary_classification",
+            checkpoint_key=task,
+        )
+        return [
+            label
+            for batch, labels in zip(batches, batch_labels)
+            for label in (labels if labels is not None else [None] * len(batch))
+        ]
+
+    labels = classify_unique(
+        texts,
+        task,
+        classify_texts,
+        memoizable=memoizable,
+    )
+    failed = sum(item is None for item in labels)
+    if failed == len(labels):
         return []
+
+    # Texts of a failed batch stay None, so file tools can leave them out for a rerun.
+    if failed:
+        logger.warning("binary_classification: %s of %s texts failed to classify", failed, len(labels))
+    return labels
@@ -1,50 +1,40 @@
 """File-backed sanitize tool that leverages the binary classification agent."""
 
-import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import List, Mapping, Optional, Union
+from typing import List, Mapping, Optional, Tuple, Union
 
 from langchain_core.tools import tool
 
 from .agent import tool as binary_classification_tool
-from ...tools.file_storage import read_text_file, write_text_file
+from ..incremental import apply_incremental_filter, load_dropped, load_previous, watermark_of, write_dropped
+from ...memory.state import load_dataset
+from ...tools.file_storage import is_jsonl, stream_records, write_json_file
 
 logger = logging.getLogger(__name__)
 
+SANITIZE_CRITERIA = (
+    "Keep only meaningful, non-sarcastic, non-spam comments that provide genuine feedback, requests, or issues. "
+    "Filter out sarcasm, over-the-top compliments, spam/ads, meaningless filler, malicious prompts, or irrelevant text."
+)
+KEEP_LABEL = "keep"
+DROP_LABEL = "drop"
 
-@tool
-def sanitize_comment_tool(input_file_path: str, output_file_path: Optional[str] = None) -> str:
-    """
-    Sanitize the input comment json file by filtering out sarcasm, excessive or extreme compliments, or meaningless/spammy filler content.
-
-    Args:
-        input_file_path: file path of the input comment json file. content structure example: `[{ "id": 1, "user": "CyberArtist", "content": "这光影效果真的绝绝子，比我手绘的快多了！", "likes": 234, "date": "2025-06-01" }]`
-        output_file_path: optional output path; defaults to alongside the input file.
-
-    Returns:
-        sanitized comment json file path. content structure example: `[{ "id": 1, "user": "CyberArtist", "content": "这光影效果真的绝绝子，比我手绘的快多了！", "likes": 234, "date": "2025-06-01" }]`
-    """
-    try:
-        json_content = read_text_file.invoke({"file_path": input_file_path})
-        comments: List[Mapping[str, Union[int, str]]] = json.loads(json_content)
-    except Exception as exc:
-        logger.error("Failed to read input file %s: %s", input_file_path, exc)
-        raise
 
+def _sanitize(
+    comments: List[Mapping[str, Union[int, str]]],
+) -> Tuple[List[Mapping[str, Union[int, str]]], List[Mapping[str, Union[int, str]]]]:
+    """Return the comments the binary classifier labels as worth keeping, and those it drops."""
     texts: List[str] = []
     for comment in comments:
         # Prefer 'content', fallback to 'comment' to stay compatible with previous schemas.
         raw_text = comment.get("content") or comment.get("comment") or ""
         texts.append(str(raw_text))
 
-    criteria = (
-        "Keep only meaningful, non-sarcastic, non-spam comments that provide genuine feedback, requests, or issues. "
-        "Filter out sarcasm, over-the-top compliments, spam/ads, meaningless filler, malicious prompts, or irrelevant text."
-    )
-    positive_label = "keep"
-    negative_label = "drop"
+    criteria = SANITIZE_CRITERIA
+    positive_label = KEEP_LABEL
+    negative_label = DROP_LABEL
 
     labels = binary_classification_tool.invoke(
         {
@@ -66,13 +56,65 @@ def sanitize_comment_tool(input_file_path: str, output_file_path: Optional[str]
             len(comments),
         )
 
-    filtered_comments = [
-        comment for comment, label in zip(comments, labels) if str(label) == positive_label
-    ]
+    # Comments whose batch failed (label None) are in neither list, so a rerun sends them again.
+    kept = [comment for comment, label in zip(comments, labels) if str(label) == positive_label]
+    dropped = [comment for comment, label in zip(comments, labels) if str(label) == negative_label]
+    return kept, dropped
+
+
+@tool
+def sanitize_comment_tool(
+    input_file_path: str,
+    output_file_path: Optional[str] = None,
+    previous_output_path: Optional[str] = None,
+    watermark: Optional[str] = None,
+) -> str:
+    """
+    Sanitize the input comment json file by filtering out sarcasm, excessive or extreme compliments, or meaningless/spammy filler content.
+
+    Args:
+        input_file_path: file path of the input comment json file. content structure example: `[{ "id": 1, "user": "CyberArtist", "content": "这光影效果真的绝绝子，比我手绘的快多了！", "likes": 234, "date": "2025-06-01" }]`
+            A `.jsonl` file (one comment object per line) is streamed in constant memory.
+        output_file_path: optional output path; defaults to alongside the input file.
+            A `.jsonl` output (the default for `.jsonl` input) is appended to as each batch finishes.
+        previous_output_path: Optional result file of an earlier run of this tool; unchanged comments
+            reuse their previous results and only new or edited comments are sent to the model. Comments
+            stay dropped only when listed, unchanged, in its `<name>.dropped.jsonl` file.
+        watermark: Optional newest comment covered by the previous run, as `"<date>"` or `"<date>:<id>"`;
+            defaults to the newest comment in `previous_output_path`.
+
+    Returns:
+        sanitized comment json file path. content structure example: `[{ "id": 1, "user": "CyberArtist", "content": "这光影效果真的绝绝子，比我手绘的快多了！", "likes": 234, "date": "2025-06-01" }]`
+    """
+    previous = load_previous(previous_output_path)
+    previously_dropped = load_dropped(previous_output_path)
+    if previous and watermark is None:
+        watermark = watermark_of(list(previous.values()))
+    # The ids and content hashes of dropped comments, written next to the output.
+    dropped: List[Mapping[str, Union[int, str]]] = []
+
+    def sanitize(comments: List[Mapping[str, Union[int, str]]]) -> List[Mapping[str, Union[int, str]]]:
+        kept, chunk_dropped = apply_incremental_filter(comments, _sanitize, previous, previously_dropped, watermark)
+        dropped.extend(chunk_dropped)
+        return kept
+
+    if is_jsonl(input_file_path) or is_jsonl(output_file_path):
+        path = stream_records(input_file_path, output_file_path, sanitize)
+        write_dropped(path, dropped)
+        return path
+
+    try:
+        comments: List[Mapping[str, Union[int, str]]] = load_dataset(input_file_path)
+    except Exception as exc:
+        logger.error("Failed to read input file %s: %s", input_file_path, exc)
+        raise
+
+    filtered_comments = sanitize(comments)
 
     try:
-        output_content = json.dumps(filtered_comments, ensure_ascii=False, indent=2)
-        return write_text_file.invoke({"content": output_content, "file_path": output_file_path})
+        path = write_json_file(filtered_comments, output_file_path)
+        write_dropped(path, dropped)
+        return path
     except Exception as exc:
         logger.error("Failed to write sanitized file %s: %s", output_file_path, exc)
         raise
@@ -1,32 +1,39 @@
 """Unified StdIO entrypoint for registered agents."""
 
 import argparse
+import importlib
 import sys
+import uuid
 from pathlib import Path
-from typing import Callable, Dict
+from typing import Any, Callable, Dict, Optional
 
 # Allow running the script directly via `python chat.py`
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from langchain_openai import ChatOpenAI
+from src.memory.checkpoint import get_checkpointer
+from src.memory.progress import get_progress_store
+from src.memory.state import run_context
 
-from src.agents.binary_classification.agent import agent as binary_agent
-from src.agents.information_extract.agent import agent as information_extract_agent
-from src.agents.text_classification.agent import agent as classify_agent
-from src.agents.main.agent import agent as main_agent
 
-
-AGENT_REGISTRY: Dict[str, Callable[[], ChatOpenAI]] = {
-    "binary_classification": binary_agent,
-    "information_extract": information_extract_agent,
-    "text_classification": classify_agent,
-    "main": main_agent,
+# Agent key -> "module:factory"; only the selected agent's module is imported.
+AGENT_REGISTRY: Dict[str, str] = {
+    "binary_classification": "src.agents.binary_classification.agent:agent",
+    "information_extract": "src.agents.information_extract.agent:agent",
+    "text_classification": "src.agents.text_classification.agent:agent",
+    "main": "src.agents.main.agent:agent",
+    "pipeline": "src.agents.pipeline.agent:agent",
 }
 
 
-def _run_agent(agent: ChatOpenAI, content: str):
+def load_agent_factory(key: str) -> Callable[..., Any]:
+    """Import and return the factory registered under `key`."""
+    module_name, _, attribute = AGENT_REGISTRY[key].partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _run_agent(agent: Any, content: Optional[str], thread_id: str):
     # result = agent.invoke({"messages": [{"role": "user", "content": content}]})
     # full_content = result["messages"][-1].content  # Add newline after streaming
     # full_content = ""
@@ -36,10 +43,17 @@ def _run_agent(agent: ChatOpenAI, content: str):
     #         full_content += token.content
     # return full_content
 
-    for chunk in agent.stream({"messages": [{"role": "user", "content": content}]}, stream_mode="updates"):
-        for step, data in chunk.items():
-            print(f"step: {step}")
-            print(f"content: {data['messages'][-1].content_blocks}")
+    # A None input makes LangGraph continue the thread from its last checkpoint.
+    payload = None if content is None else {"messages": [{"role": "user", "content": content}]}
+    config: Dict[str, Any] = {"configurable": {"thread_id": thread_id}}
+    print(f"thread id: {thread_id}", file=sys.stderr)
+    with run_context(thread_id):
+        for chunk in agent.stream(payload, config=config, stream_mode="updates"):
+            for step, data in chunk.items():
+                print(f"step: {step}")
+                print(f"content: {data['messages'][-1].content_blocks}")
+    # The run completed, so its batch records are no longer needed for resuming.
+    get_progress_store().clear(thread_id)
 
 
 def main() -> None:
@@ -50,18 +64,27 @@ def main() -> None:
         choices=AGENT_REGISTRY.keys(),
         help="Agent key to execute.",
     )
+    parser.add_argument(
+        "--resume",
+        metavar="THREAD_ID",
+        help="Resume an interrupted run from its last checkpoint; finished batches are not recomputed.",
+    )
     args = parser.parse_args()
 
-    agent_factory = AGENT_REGISTRY[args.agent]
-    chat_agent = agent_factory()
+    agent_factory = load_agent_factory(args.agent)
+    chat_agent = agent_factory(checkpointer=get_checkpointer())
+
+    if args.resume:
+        _run_agent(chat_agent, None, args.resume)
+        return
 
     if not sys.stdin.isatty():
         payload = sys.stdin.read()
-        _run_agent(chat_agent, payload)
+        _run_agent(chat_agent, payload, uuid.uuid4().hex)
         return
 
     for line in sys.stdin:
-        _run_agent(chat_agent, line)
+        _run_agent(chat_agent, line, uuid.uuid4().hex)
 
 
 if __name__ == "__main__":
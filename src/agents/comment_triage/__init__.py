@@ -0,0 +1,6 @@
+"""Comment triage agent package: keep/drop, sentiment and demand labels in one pass."""
+
+from .agent import agent, tool
+from .comment_triage_tool import comment_triage_tool
+
+__all__ = ["agent", "tool", "comment_triage_tool"]
@@ -0,0 +1,198 @@
+"""Agent that labels each text for keep/drop, sentiment and demands in a single pass."""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain.agents import create_agent
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool as lc_tool
+
+from ...llms.hedging import hedged
+from ...llms.volcano import DEFAULT_MODEL_NAME, get_model
+from ..batching import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_INPUT_TOKENS,
+    align,
+    count_tokens,
+    pack_by_tokens,
+    run_batches,
+)
+from ..dedup import classify_unique, label_recorder, task_key
+from ..json_array import ArrayStream, request_array
+from ..pool import get_agent
+
+logger = logging.getLogger(__name__)
+
+
+def system_prompt() -> str:
+    return (
+        "You are a multi-task comment classifier.\n"
+        "You will receive JSON with 'texts' (list of strings), 'criteria' (description of comments to keep), "
+        "'keep_label', 'drop_label', 'sentiments' (allowed sentiment labels) and 'demands' (allowed demand labels).\n"
+        "For each text return an object with three fields:\n"
+        "- 'k': keep_label when the text meets the criteria, otherwise drop_label;\n"
+        "- 's': exactly one label from 'sentiments';\n"
+        "- 'd': an array of zero or more labels from 'demands', or an empty array when 'k' is drop_label.\n"
+        "Use exactly the provided labels. Return only a JSON array of these objects in the same order as the "
+        "input texts with no extra text."
+    )
+
+
+def agent(model=None, checkpointer=None):
+    prompt_template = system_prompt()
+    model = model or get_model()
+    return create_agent(model, tools=[], system_prompt=prompt_template, checkpointer=checkpointer)
+
+
+@lc_tool
+def tool(
+    texts: List[str],
+    criteria: str,
+    keep_label: str,
+    drop_label: str,
+    sentiment_categories: List[str],
+    demand_categories: List[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    max_input_tokens: int = DEFAULT_MAX_INPUT_TOKENS,
+    model_name: str = DEFAULT_MODEL_NAME,
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Label each text with keep/drop, a sentiment and its demands from one model pass per batch.
+
+    Args:
+        texts: List of text contents.
+        criteria: Description of what qualifies a text to be kept.
+        keep_label: Label to use when the text meets the criteria.
+        drop_label: Label to use when the text does not meet the criteria.
+        sentiment_categories: Allowed sentiment labels (exactly one per text).
+        demand_categories: Allowed demand labels (zero or more per text).
+        batch_size: Maximum number of texts sent to the model in one request.
+        max_concurrency: Maximum number of batches classified at the same time.
+        max_input_tokens: Prompt token budget per request; batches are packed up to it.
+        model_name: Model used for classification.
+
+    Returns:
+        List aligned with the input texts of `{"keep": ..., "sentiment": ..., "demands": [...]}`;
+        None for texts whose batch failed, or an empty list when every batch failed.
+    """
+    triage_agent = get_agent(agent, system_prompt(), model_name)
+    task = task_key(
+        "comment_triage",
+        model_name,
+        system_prompt(),
+        criteria,
+        keep_label,
+        drop_label,
+        sentiment_categories,
+        demand_categories,
+    )
+
+    def build_content(batch: List[str]) -> str:
+        input_json = json.dumps(
+            {
+                "texts": batch,
+                "criteria": criteria,
+                "keep_label": keep_label,
+                "drop_label": drop_label,
+                "sentiments": sentiment_categories,
+                "demands": demand_categories,
+            },
+            ensure_ascii=False,
+        )
+        return (
+            "For each text, decide keep/drop by the criteria, pick its sentiment and list its demands. "
+            "Return only a JSON array of {\"k\", \"s\", \"d\"} objects in order.\n"
+            f"{input_json}"
+        )
+
+    def parse_item(item: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(item, dict):
+            return None
+        demands = item.get("d") or []
+        if not isinstance(demands, list):
+            demands = [demands]
+        return {
+            "keep": str(item.get("k") or ""),
+            "sentiment": str(item.get("s") or ""),
+            "demands": [str(label) for label in demands if str(label)],
+        }
+
+    def is_valid(labels: Dict[str, Any]) -> bool:
+        return (
+            labels["keep"] in (keep_label, drop_label)
+            and labels["sentiment"] in sentiment_categories
+            and all(label in demand_categories for label in labels["demands"])
+        )
+
+    remember = label_recorder(task, is_valid)
+
+    def classify_batch(batch: List[str], config: RunnableConfig) -> Optional[List[Optional[Dict[str, Any]]]]:
+        def ask(texts: Sequence[str], stream: ArrayStream) -> str:
+            result = triage_agent.invoke(
+                {"messages": [{"role": "user", "content": build_content(list(texts))}]},
+                config=stream.attach(config),
+            )
+            return result["messages"][-1].content
+
+        # Labels are memoized as they stream in, so they survive a deadline or a crash.
+        predicted = request_array(batch, ask, on_item=lambda index, item: remember(batch[index], parse_item(item)))
+        try:
+            if predicted is None:
+                logger.error("Agent result is not a list")
+                return None
+
+            return align([parse_item(item) for item in predicted], len(batch), None)
+        except Exception as exc:
+            logger.error("Error parsing agent result: %s", exc)
+            return None
+
+    def label_tokens(labels: List[str]) -> int:
+        return max((count_tokens(json.dumps(label, ensure_ascii=False)) for label in labels), default=1)
+
+    # Per text: the object skeleton, the longest keep/sentiment labels and up to two demands.
+    output_tokens_per_item = (
+        16
+        + label_tokens([keep_label, drop_label])
+        + label_tokens(sentiment_categories)
+        + (min(len(demand_categories), 2) or 1) * (label_tokens(demand_categories) + 1)
+    )
+
+    def classify_texts(unique_texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        batches, report = pack_by_tokens(
+            unique_texts,
+            overhead_tokens=count_tokens(system_prompt()) + count_tokens(build_content([])),
+            output_tokens_per_item=output_tokens_per_item,
+            max_input_tokens=max_input_tokens,
+            max_items=batch_size,
+        )
+        report.log("comment_triage")
+        batch_labels = run_batches(
+            batches,
+            hedged(classify_batch, "comment_triage"),
+            max_concurrency=max_concurrency,
+            name="comment_triage",
+            checkpoint_key=task,
+        )
+        return [
+            labels
+            for batch, predictions in zip(batches, batch_labels)
+            for labels in (predictions if predictions is not None else [None] * len(batch))
+        ]
+
+    predictions = classify_unique(
+        texts,
+        task,
+        classify_texts,
+        memoizable=is_valid,
+    )
+    failed = sum(item is None for item in predictions)
+    if failed == len(predictions):
+        return []
+
+    # Texts of a failed batch stay None, so file tools can leave them out for a rerun.
+    if failed:
+        logger.warning("comment_triage: %s of %s texts failed to classify", failed, len(predictions))
+    return predictions
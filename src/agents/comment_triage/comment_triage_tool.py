@@ -0,0 +1,131 @@
+"""File-backed fused sanitize/sentiment/demand classifier built on the comment triage agent."""
+
+import logging
+from typing import Dict, List, Mapping, Optional, Union
+
+from langchain_core.tools import tool
+
+from ...memory.state import load_dataset
+from ...tools.file_storage import write_json_file
+from ..binary_classification.sanitize_comment_tool import DROP_LABEL, KEEP_LABEL, SANITIZE_CRITERIA
+from ..incremental import fingerprint
+from ..text_classification.demand_classification_tool import CATEGORIES_FIELD
+from ..text_classification.sentiment_classification_tool import SENTIMENT_CATEGORIES
+from .agent import tool as comment_triage_agent_tool
+
+logger = logging.getLogger(__name__)
+
+
+@tool
+def comment_triage_tool(
+    input_file_path: str,
+    categories_file_path: str,
+    sanitized_output_path: Optional[str] = None,
+    sentiment_output_path: Optional[str] = None,
+    demand_output_path: Optional[str] = None,
+) -> Dict[str, str]:
+    """
+    Sanitize comments and classify their sentiment and demands in a single pass over the input.
+
+    Produces the same three files as 'sanitize_comment_tool', 'sentiment_classification_tool' and
+    'demand_classification_tool'; sentiment and demand results cover only the kept comments, and
+    demand results can be passed to 'demand_classification_tool' as `previous_output_path`.
+
+    Args:
+        input_file_path: File path of the raw input comment json. Example:
+            `[{ "id": 1, "user": "CyberArtist", "content": "希望能增加4K导出选项", "likes": 234, "date": "2025-06-01" }]`
+        categories_file_path: File path containing demand category list (JSON array of strings). Example:
+            `["4K导出", "配音自然"]`
+        sanitized_output_path: Optional output path for the kept comments.
+        sentiment_output_path: Optional output path for the sentiment results.
+        demand_output_path: Optional output path for the demand classification results.
+
+    Returns:
+        Mapping of result kind to output file path, e.g.
+            `{"sanitized": "...", "sentiment": "...", "demands": "..."}`
+        with contents structured as
+            sanitized: `[{ "id": 1, "user": "CyberArtist", "content": "...", "likes": 234, "date": "2025-06-01" }]`
+            sentiment: `[{"id": 1, "content": "...", "sentiment": "positive"}]`
+            demands: `[{"id": 1, "content": "...", "demands": ["4K导出"], "categories_hash": "..."}]`
+    """
+    try:
+        comments: List[Mapping[str, Union[int, str]]] = load_dataset(input_file_path)
+    except Exception as exc:
+        logger.error("Failed to read input file %s: %s", input_file_path, exc)
+        raise
+
+    try:
+        raw_categories = load_dataset(categories_file_path)
+        if not isinstance(raw_categories, list):
+            raise ValueError("categories is not a list")
+        categories = [str(item) for item in raw_categories if str(item)]
+    except Exception as exc:
+        logger.error("Failed to read categories file %s: %s", categories_file_path, exc)
+        raise
+
+    texts: List[str] = []
+    for comment in comments:
+        raw_text = comment.get("content") or comment.get("comment") or ""
+        texts.append(str(raw_text))
+
+    predictions = comment_triage_agent_tool.invoke(
+        {
+            "texts": texts,
+            "criteria": SANITIZE_CRITERIA,
+            "keep_label": KEEP_LABEL,
+            "drop_label": DROP_LABEL,
+            "sentiment_categories": SENTIMENT_CATEGORIES,
+            "demand_categories": categories,
+        }
+    )
+
+    if not isinstance(predictions, list) or not predictions:
+        logger.error("Comment triage classifier returned invalid labels.")
+        raise ValueError("Comment triage classifier returned invalid labels.")
+
+    if len(predictions) != len(comments):
+        logger.warning(
+            "Prediction count (%s) does not match comment count (%s); truncating to shortest.",
+            len(predictions),
+            len(comments),
+        )
+
+    categories_hash = fingerprint(categories)
+    sanitized = []
+    sentiments = []
+    demands = []
+    for idx, (comment, labels) in enumerate(zip(comments, predictions)):
+        # Comments whose batch failed are left out of every file.
+        if labels is None or str(labels.get("keep")) != KEEP_LABEL:
+            continue
+        sanitized.append(comment)
+        comment_id = comment.get("id", idx)
+        content = comment.get("content") or comment.get("comment") or ""
+        sentiments.append(
+            {
+                "id": comment_id,
+                "content": content,
+                "sentiment": str(labels.get("sentiment") or "neutral"),
+            }
+        )
+        demands.append(
+            {
+                "id": comment_id,
+                "content": content,
+                "demands": [str(label) for label in labels.get("demands") or [] if str(label)],
+                CATEGORIES_FIELD: categories_hash,
+            }
+        )
+
+    outputs: Dict[str, str] = {}
+    for kind, records, output_file_path in (
+        ("sanitized", sanitized, sanitized_output_path),
+        ("sentiment", sentiments, sentiment_output_path),
+        ("demands", demands, demand_output_path),
+    ):
+        try:
+            outputs[kind] = write_json_file(records, output_file_path)
+        except Exception as exc:
+            logger.error("Failed to write %s file %s: %s", kind, output_file_path, exc)
+            raise
+    return outputs
@@ -0,0 +1,111 @@
+"""Normalize and collapse duplicate texts so each distinct text is labelled only once."""
+
+import json
+import logging
+import unicodedata
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+
+import xxhash
+
+from ..memory.label_memo import get_label_memo
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+# Emoji and other pictographs, modifier symbols and invisible format characters (ZWJ, etc.).
+_DROPPED_CATEGORIES = {"So", "Sk", "Cf", "Cs", "Co"}
+_VARIATION_SELECTORS = {chr(code) for code in range(0xFE00, 0xFE10)}
+
+
+def normalize_text(text: str) -> str:
+    """Fold a text to the key shared by its whitespace, width, case and emoji variants."""
+    folded = unicodedata.normalize("NFKC", text)
+    chars: List[str] = []
+    for ch in folded:
+        if ch in _VARIATION_SELECTORS or ch.isspace():
+            continue
+        category = unicodedata.category(ch)
+        if category in _DROPPED_CATEGORIES:
+            continue
+        # Collapse runs of the same punctuation ("退钱！！！" -> "退钱!").
+        if category.startswith("P") and chars and chars[-1] == ch:
+            continue
+        chars.append(ch)
+    normalized = "".join(chars).casefold()
+    # Texts made only of emoji keep their own identity instead of all collapsing to "".
+    return normalized or "".join(folded.split())
+
+
+def task_key(*parts: object) -> str:
+    """Hash the parameters that determine a labelling task (prompt, criteria, categories...)."""
+    return xxhash.xxh3_128_hexdigest(json.dumps(parts, ensure_ascii=False, sort_keys=True))
+
+
+def _text_key(text: str) -> str:
+    return xxhash.xxh3_64_hexdigest(normalize_text(str(text)))
+
+
+def label_recorder(
+    task: str,
+    memoizable: Callable[[R], bool] = lambda labels: True,
+) -> Callable[[str, Optional[R]], None]:
+    """Return a function memoizing one text's labels as soon as they arrive.
+
+    Used on streamed answers, so labels received before a deadline, cancellation or
+    crash are not asked for again; `classify_unique` memoizes the rest at the end.
+    """
+    memo = get_label_memo()
+
+    def record(text: str, labels: Optional[R]) -> None:
+        if memo is not None and labels is not None and memoizable(labels):
+            memo.put_many(task, {_text_key(text): labels})
+
+    return record
+
+
+def classify_unique(
+    texts: Sequence[str],
+    task: str,
+    classify: Callable[[List[str]], List[Optional[R]]],
+    memoizable: Callable[[R], bool] = lambda labels: True,
+) -> List[Optional[R]]:
+    """Label every distinct normalized text once and fan the labels back out.
+
+    Args:
+        texts: Texts to label, possibly with duplicates.
+        task: Key of the labelling task, see `task_key`.
+        classify: Labels a list of texts; returns one entry per text, None when it failed.
+        memoizable: Decides whether a label is trustworthy enough to memoize across runs.
+
+    Returns:
+        Labels aligned with `texts`; None where classification failed.
+    """
+    keys = [_text_key(text) for text in texts]
+    representatives: Dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        representatives.setdefault(key, str(text))
+
+    memo = get_label_memo()
+    resolved: Dict[str, Optional[R]] = memo.get_many(task, representatives) if memo else {}
+    pending = [key for key in representatives if key not in resolved]
+
+    logger.info(
+        "dedup: %s texts -> %s unique, %s memoized, %s sent for classification",
+        len(texts),
+        len(representatives),
+        len(representatives) - len(pending),
+        len(pending),
+    )
+
+    if pending:
+        predictions = classify([representatives[key] for key in pending])
+        fresh = dict(zip(pending, list(predictions) + [None] * (len(pending) - len(predictions))))
+        resolved.update(fresh)
+        if memo:
+            memo.put_many(
+                task,
+                {key: labels for key, labels in fresh.items() if labels is not None and memoizable(labels)},
+            )
+
+    return [resolved.get(key) for key in keys]
@@ -0,0 +1,221 @@
+"""Incremental re-analysis of comment files against a previous result artifact.
+
+Comments are identified by their `id` and versioned by a hash of their text. A
+watermark `"<date>"` or `"<date>:<id>"` marks the newest comment the previous run
+covered, using the `date`/`id` fields of the comment schema. On a rerun:
+
+- a comment at or below the watermark (any comment, when no watermark is given)
+  whose id is in the previous results with an unchanged content hash reuses its
+  previous result;
+- for filtering tools (sanitize), such a comment listed with an unchanged content hash
+  in the previous run's dropped list (`dropped_path`) stays dropped;
+- every other comment (new, edited, or unknown) is sent to the model. A comment missing
+  from the previous results is never assumed to be dropped: it may have failed to classify.
+
+Tools whose results depend on other inputs (e.g. the demand categories) stamp each
+result with a fingerprint of them, and only reuse previous results carrying the same one.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+import xxhash
+
+from ..tools import artifact_codec
+from ..tools.file_storage import iter_records, write_json_file
+
+logger = logging.getLogger(__name__)
+
+Record = Mapping[str, Any]
+
+# Sidecar next to a filtering tool's output, listing the comments it dropped.
+DROPPED_SUFFIX = ".dropped.jsonl"
+
+
+def _text(record: Record) -> str:
+    return str(record.get("content") or record.get("comment") or "")
+
+
+def content_hash(record: Record) -> str:
+    """Hash of a comment's text, used to detect edits."""
+    return xxhash.xxh3_64_hexdigest(_text(record))
+
+
+def _order_key(date: Any, comment_id: Any) -> Tuple[str, Tuple[int, Any]]:
+    text_id = str(comment_id)
+    rank = (0, int(text_id)) if text_id.lstrip("-").isdigit() else (1, text_id)
+    return str(date or ""), rank
+
+
+def parse_watermark(watermark: Optional[str]) -> Optional[Tuple[str, Tuple[int, Any]]]:
+    """Parse `"<date>"` or `"<date>:<id>"`; a bare date covers every comment of that day."""
+    if not watermark:
+        return None
+    date, _, comment_id = watermark.partition(":")
+    if not comment_id:
+        return str(date), (2, "")
+    return _order_key(date, comment_id)
+
+
+def watermark_of(comments: Sequence[Record]) -> Optional[str]:
+    """Watermark covering every comment in `comments`, or None when they carry no dates."""
+    dated = [comment for comment in comments if comment.get("date") and "id" in comment]
+    if not dated:
+        return None
+    newest = max(dated, key=lambda comment: _order_key(comment["date"], comment["id"]))
+    return f"{newest['date']}:{newest['id']}"
+
+
+def fingerprint(value: Any) -> str:
+    """Hash of a JSON-serializable value, e.g. the categories a result was produced with."""
+    return xxhash.xxh3_64_hexdigest(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+
+
+def load_previous(
+    previous_output_path: Optional[str],
+    field: Optional[str] = None,
+    expected: Optional[str] = None,
+) -> Dict[Any, Record]:
+    """Index a previous result artifact (JSON or JSON Lines) by comment id.
+
+    With `field`, only records whose `field` equals `expected` are kept, so results
+    produced from different inputs (or before the field existed) are recomputed.
+    """
+    if not previous_output_path:
+        return {}
+    records = [record for record in iter_records(previous_output_path) if "id" in record]
+    if field is not None:
+        matching = [record for record in records if record.get(field) == expected]
+        if len(matching) < len(records):
+            logger.info(
+                "incremental: ignoring %s previous results with a different %s",
+                len(records) - len(matching),
+                field,
+            )
+        records = matching
+    return {record["id"]: record for record in records}
+
+
+def dropped_path(output_path: str) -> Path:
+    """Dropped-comment list of a filtering tool's output, e.g. `out.json` -> `out.dropped.jsonl`."""
+    path = Path(output_path).expanduser()
+    if artifact_codec.is_compressed(path):
+        path = path.with_suffix("")
+    return path.with_name(path.with_suffix("").name + DROPPED_SUFFIX)
+
+
+def load_dropped(previous_output_path: Optional[str]) -> Dict[Any, str]:
+    """Content hashes of the comments a previous filtering run dropped, by comment id."""
+    if not previous_output_path:
+        return {}
+    path = dropped_path(previous_output_path)
+    if not path.exists():
+        logger.info("incremental: no dropped-comment list at %s; comments missing from the output are resent", path)
+        return {}
+    return {record["id"]: record["content_hash"] for record in iter_records(str(path))}
+
+
+def write_dropped(output_path: str, dropped: Sequence[Record]) -> str:
+    """Write the dropped-comment list of a filtering tool's output; returns its path."""
+    return write_json_file(list(dropped), str(dropped_path(output_path)))
+
+
+def _covered(comment: Record, mark: Optional[Tuple[str, Tuple[int, Any]]]) -> bool:
+    return mark is None or _order_key(comment.get("date"), comment["id"]) <= mark
+
+
+def apply_incremental(
+    comments: List[Record],
+    transform: Callable[[List[Record]], Sequence[Record]],
+    previous: Mapping[Any, Record],
+    watermark: Optional[str] = None,
+) -> List[Record]:
+    """Run `transform` only on new or edited comments and merge with previous results.
+
+    Args:
+        comments: Current comments, in output order.
+        transform: File tool step mapping comments to result records keyed by `id`.
+        previous: Previous results indexed by comment id, see `load_previous`.
+        watermark: Newest `date`/`id` covered by the previous run.
+
+    Returns:
+        Result records for `comments`, in input order.
+    """
+    if not previous or any("id" not in comment for comment in comments):
+        return list(transform(comments))
+
+    mark = parse_watermark(watermark)
+    reused: Dict[Any, Record] = {}
+    pending: List[Record] = []
+    for comment in comments:
+        prior = previous.get(comment["id"])
+        if prior is not None and _covered(comment, mark) and content_hash(prior) == content_hash(comment):
+            reused[comment["id"]] = prior
+        else:
+            pending.append(comment)
+
+    logger.info("incremental: %s comments, %s reused, %s sent", len(comments), len(reused), len(pending))
+    fresh = {record["id"]: record for record in transform(pending)} if pending else {}
+
+    results: List[Record] = []
+    for comment in comments:
+        record = reused.get(comment["id"]) or fresh.get(comment["id"])
+        if record is not None:
+            results.append(record)
+    return results
+
+
+def apply_incremental_filter(
+    comments: List[Record],
+    transform: Callable[[List[Record]], Tuple[Sequence[Record], Sequence[Record]]],
+    previous: Mapping[Any, Record],
+    dropped: Mapping[Any, str],
+    watermark: Optional[str] = None,
+) -> Tuple[List[Record], List[Record]]:
+    """`apply_incremental` for a filtering step (sanitize).
+
+    Args:
+        comments: Current comments, in output order.
+        transform: Returns the kept and the dropped comments of its input; comments it
+            could not classify are in neither, so the next run sends them again.
+        previous: Comments kept by the previous run, see `load_previous`.
+        dropped: Content hashes of the comments the previous run dropped, see `load_dropped`.
+        watermark: Newest `date`/`id` covered by the previous run.
+
+    Returns:
+        The kept comments with their current fields, in input order, and the
+        `{"id", "content_hash"}` records of the dropped ones, for `write_dropped`.
+    """
+    if any("id" not in comment for comment in comments):
+        return list(transform(comments)[0]), []
+
+    mark = parse_watermark(watermark)
+    kept: Set[Any] = set()
+    drops: Dict[Any, str] = {}
+    pending: List[Record] = []
+    for comment in comments:
+        digest = content_hash(comment)
+        prior = previous.get(comment["id"])
+        if not _covered(comment, mark):
+            pending.append(comment)
+        elif prior is not None and content_hash(prior) == digest:
+            kept.add(comment["id"])
+        elif dropped.get(comment["id"]) == digest:
+            drops[comment["id"]] = digest
+        else:
+            pending.append(comment)
+
+    logger.info(
+        "incremental: %s comments, %s reused, %s sent", len(comments), len(kept) + len(drops), len(pending)
+    )
+    if pending:
+        fresh_kept, fresh_dropped = transform(pending)
+        kept.update(comment["id"] for comment in fresh_kept)
+        drops.update((comment["id"], content_hash(comment)) for comment in fresh_dropped)
+
+    return (
+        [comment for comment in comments if comment["id"] in kept],
+        [{"id": comment["id"], "content_hash": drops[comment["id"]]} for comment in comments if comment["id"] in drops],
+    )
@@ -2,16 +2,33 @@
 
 import json
 import logging
-from typing import List
+import os
+from typing import List, Optional
 
-import json_repair
 from langchain.agents import create_agent
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool as lc_tool
 
-from ...llms.volcano import create_model
+from ...llms.cache import forget_responses, record_cache_keys
+from ...llms.hedging import hedged
+from ...llms.volcano import DEFAULT_MODEL_NAME, get_model
+from ..batching import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_INPUT_TOKENS,
+    count_tokens,
+    pack_by_tokens,
+    run_batches,
+)
+from ..dedup import normalize_text, task_key
+from ..json_array import parse_json_array
+from ..pool import get_agent
 
 logger = logging.getLogger(__name__)
 
+# Number of partial item lists merged by a single reduce request.
+DEFAULT_FAN_IN = int(os.environ.get("EXTRACT_REDUCE_FAN_IN", "8"))
+
 
 def system_prompt() -> str:
     return (
@@ -26,38 +43,139 @@ def system_prompt() -> str:
     )
 
 
-def agent(model=None):
+def agent(model=None, checkpointer=None):
     prompt_template = system_prompt()
-    model = model or create_model()
-    return create_agent(model, tools=[], system_prompt=prompt_template)
+    model = model or get_model()
+    return create_agent(model, tools=[], system_prompt=prompt_template, checkpointer=checkpointer)
+
+
+def _unique(items: List[str]) -> List[str]:
+    """Drop items whose normalized form was already seen, keeping first occurrences."""
+    seen = set()
+    unique: List[str] = []
+    for item in items:
+        key = normalize_text(item)
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
 
 
 @lc_tool
 def tool(
     texts: List[str],
     information_type: str,
+    shard_size: int = DEFAULT_BATCH_SIZE,
+    max_input_tokens: int = DEFAULT_MAX_INPUT_TOKENS,
+    fan_in: int = DEFAULT_FAN_IN,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    model_name: str = DEFAULT_MODEL_NAME,
 ) -> List[str]:
     """
     Extract specific information across a list of texts.
 
+    Texts are split into shards that are extracted concurrently (map); the per-shard
+    item lists are then merged up to `fan_in` at a time, within the same token budget,
+    level by level, into one deduplicated list of representative items (reduce).
+
     Args:
         texts: List of text strings.
         information_type: Description of the information to extract (e.g., features, demands, sentiments).
+        shard_size: Maximum number of texts per map request.
+        max_input_tokens: Prompt token budget per map and reduce request.
+        fan_in: Maximum number of partial lists merged by one reduce request.
+        max_concurrency: Maximum number of requests in flight at the same time.
+        model_name: Model used for extraction.
 
     Returns:
         List of distinct information items found in the texts.
     """
-    input_json = json.dumps(texts, ensure_ascii=False)
-    in_agent = agent()
-    content = f"Extract {information_type} from the below texts json:\n{input_json}"
-    result = in_agent.invoke({"messages": [{"role": "user", "content": content}]})
-    response_content = result["messages"][-1].content
-
-    try:
-        info_items = json_repair.loads(response_content)
-        if isinstance(info_items, list):
-            return info_items
-        return []
-    except Exception as exc:
-        logger.error(f"Error parsing agent result: {exc}")
+    if fan_in < 2:
+        raise ValueError(f"fan_in must be at least 2: {fan_in}")
+    in_agent = get_agent(agent, system_prompt(), model_name)
+    task = task_key("information_extract", model_name, system_prompt(), information_type)
+
+    def ask(content: str, config: RunnableConfig) -> Optional[List[str]]:
+        with record_cache_keys() as keys:
+            result = in_agent.invoke({"messages": [{"role": "user", "content": content}]}, config=config)
+        response_content = result["messages"][-1].content
+
+        try:
+            # Items are not tied to input positions, so a truncated answer keeps its complete items.
+            info_items, complete = parse_json_array(response_content)
+            if info_items is None:
+                forget_responses(keys)
+                return None
+            if not complete:
+                logger.warning("Extraction answer truncated after %s items", len(info_items))
+            return [str(item) for item in info_items if str(item)]
+        except Exception as exc:
+            logger.error(f"Error parsing agent result: {exc}")
+            forget_responses(keys)
+            return None
+
+    def extract_content(shard: List[str]) -> str:
+        input_json = json.dumps(shard, ensure_ascii=False)
+        return f"Extract {information_type} from the below texts json:\n{input_json}"
+
+    def merge_content(partials: List[List[str]]) -> str:
+        input_json = json.dumps(partials, ensure_ascii=False)
+        return (
+            f"Below is a JSON array of lists of {information_type}, "
+            "each extracted from a different part of the same corpus. "
+            "Merge them into one list of representative items, combining items that describe the same thing.\n"
+            f"{input_json}"
+        )
+
+    shards, report = pack_by_tokens(
+        _unique([str(text) for text in texts]),
+        overhead_tokens=count_tokens(system_prompt()) + count_tokens(extract_content([])),
+        max_input_tokens=max_input_tokens,
+        max_items=shard_size,
+    )
+    report.log("information_extract")
+
+    extracted = run_batches(
+        shards,
+        hedged(lambda shard, config: ask(extract_content(shard), config), "information_extract.map"),
+        max_concurrency=max_concurrency,
+        name="information_extract.map",
+        checkpoint_key=task,
+    )
+    failed = sum(items is None for items in extracted)
+    if failed:
+        logger.warning("information_extract: %s of %s shards failed; their items are missing", failed, len(shards))
+    partials = [items for items in extracted if items]
+    if not partials:
         return []
+
+    merge = hedged(lambda group, config: ask(merge_content(group), config), "information_extract.reduce")
+    merge_overhead = count_tokens(system_prompt()) + count_tokens(merge_content([]))
+    level = 0
+    while len(partials) > 1:
+        level += 1
+        groups, report = pack_by_tokens(
+            partials,
+            overhead_tokens=merge_overhead,
+            max_input_tokens=max_input_tokens,
+            max_items=fan_in,
+        )
+        report.log(f"information_extract.reduce{level}")
+        if len(groups) == len(partials):
+            # No two partial lists fit one request; merging further would overflow the context.
+            logger.warning("information_extract: partial lists exceed the token budget; returning their union")
+            return _unique([item for part in partials for item in part])
+        merged = run_batches(
+            groups,
+            lambda group: merge(group) if len(group) > 1 else group[0],
+            max_concurrency=max_concurrency,
+            name=f"information_extract.reduce{level}",
+            checkpoint_key=task,
+        )
+        # Fall back to the plain union when a merge request fails so no items are lost.
+        partials = [
+            items if items else _unique([item for part in group for item in part])
+            for group, items in zip(groups, merged)
+        ]
+
+    return _unique(partials[0])
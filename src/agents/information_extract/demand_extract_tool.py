@@ -1,6 +1,5 @@
 """File-backed demand extractor that uses the information_extract agent."""
 
-import json
 import logging
 from datetime import datetime
 from pathlib import Path
@@ -8,7 +7,7 @@ from typing import List, Mapping, Optional, Union
 
 from langchain_core.tools import tool
 
-from src.tools.file_storage import read_text_file, write_text_file
+from src.tools.file_storage import iter_records, write_json_file
 from .agent import tool as information_extract_tool
 
 logger = logging.getLogger(__name__)
@@ -22,24 +21,23 @@ def demand_extract_tool(input_file_path: str, output_file_path: Optional[str] =
     Args:
         input_file_path: File path of the input comment json. Example structure:
             `[{ "id": 1, "user": "CyberArtist", "content": "希望能增加4K导出选项", "likes": 234, "date": "2025-06-01" }]`
+            A `.jsonl` file (one comment object per line) is read as a stream.
         output_file_path: Optional output path; defaults to alongside the input file.
 
     Returns:
         Output file path containing demand category extraction results.
         Output structure example: `[ "画质提升需求", "导出与分享需求" ]`
     """
+    texts = []
     try:
-        json_content = read_text_file.invoke({"file_path": input_file_path})
-        comments: List[Mapping[str, Union[int, str]]] = json.loads(json_content)
+        # Only the texts are kept in memory; the rest of each comment is discarded while reading.
+        for comment in iter_records(input_file_path):
+            raw_text = comment.get("content") or ""
+            texts.append(raw_text)
     except Exception as exc:
         logger.error("Failed to read input file %s: %s", input_file_path, exc)
         raise
 
-    texts = []
-    for comment in comments:
-        raw_text = comment.get("content") or ""
-        texts.append(raw_text)
-
     demand_categories = information_extract_tool.invoke(
         {
             "texts": texts,
@@ -52,8 +50,7 @@ def demand_extract_tool(input_file_path: str, output_file_path: Optional[str] =
         raise ValueError("Information extractor returned invalid demand category results.")
 
     try:
-        output_content = json.dumps(demand_categories, ensure_ascii=False, indent=2)
-        return write_text_file.invoke({"content": output_content, "file_path": output_file_path})
+        return write_json_file(demand_categories, output_file_path)
     except Exception as exc:
         logger.error("Failed to write demand category file %s: %s", output_file_path, exc)
         raise
@@ -0,0 +1,220 @@
+"""Incremental parsing of JSON-array model answers, with salvage of truncated answers."""
+
+import logging
+import os
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+import json_repair
+import orjson
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
+
+from ..llms.cache import forget_responses, record_cache_keys
+from ..llms.hedging import CallCancelled, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Follow-up requests for the texts missing from a truncated answer.
+MAX_TAIL_REQUESTS = int(os.environ.get("AGENT_MAX_TAIL_REQUESTS", "2"))
+
+_UNPARSED = object()
+
+
+class ArrayParser:
+    """Parses a top-level JSON array fed in chunks, one element as soon as it closes.
+
+    Text before the opening bracket (prose, a Markdown code fence) is skipped. Elements
+    are decoded with orjson, falling back to `json_repair` for a malformed element. An
+    element neither can decode marks the array malformed, and `items` stops before it so
+    every item keeps its position.
+    """
+
+    def __init__(self, on_item: Optional[Callable[[int, Any], None]] = None) -> None:
+        self.items: List[Any] = []
+        self.elements = 0
+        self.started = False
+        self.closed = False
+        self.malformed = False
+        self._on_item = on_item
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._element_start = 0
+
+    def feed(self, chunk: str) -> None:
+        if self.closed:
+            return
+        self._buffer += chunk
+        buffer = self._buffer
+        for index in range(self._pos, len(buffer)):
+            char = buffer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif not self.started:
+                if char == "[":
+                    self.started = True
+                    self._depth = 1
+                    self._element_start = index + 1
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+            elif char in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(buffer[self._element_start : index])
+                    self.closed = True
+                    break
+            elif char == "," and self._depth == 1:
+                self._emit(buffer[self._element_start : index])
+                self._element_start = index + 1
+        self._pos = len(buffer)
+
+    def _emit(self, text: str) -> None:
+        text = text.strip()
+        if not text:
+            return
+        self.elements += 1
+        if self.malformed:
+            return
+        try:
+            value = orjson.loads(text)
+        except orjson.JSONDecodeError:
+            value = json_repair.loads(text)
+            # json_repair returns "" for text it cannot make sense of; other falsy values are real.
+            if value == "" and text not in ('""', "''"):
+                value = _UNPARSED
+        if value is _UNPARSED:
+            self.malformed = True
+            return
+        self.items.append(value)
+        if self._on_item is not None:
+            self._on_item(len(self.items) - 1, value)
+
+
+def parse_json_array(text: str) -> Tuple[Optional[List[Any]], bool]:
+    """Parse a model answer expected to hold a JSON array.
+
+    Returns:
+        The elements (None when the answer is not an array) and whether the array was
+        complete. A truncated array yields its fully received elements and False.
+    """
+    try:
+        value = orjson.loads(_strip_fence(text))
+    except orjson.JSONDecodeError:
+        pass
+    else:
+        return (value if isinstance(value, list) else None), True
+
+    parser = ArrayParser()
+    parser.feed(text)
+    if parser.started and not parser.malformed:
+        return parser.items, parser.closed
+    value = json_repair.loads(text)
+    if not isinstance(value, list):
+        return None, parser.closed or not parser.started
+    if parser.started and not parser.closed:
+        # json_repair also keeps the cut-off last element; only delimited ones are whole.
+        value = value[: parser.elements]
+    return value, parser.closed or not parser.started
+
+
+def _strip_fence(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text
+
+
+class ArrayStream(BaseCallbackHandler):
+    """Callback parsing the streamed tokens of a model answer into array elements.
+
+    Elements are available in `items` (and passed to `on_item`) as soon as they close,
+    so they survive a response cut off mid-stream.
+    """
+
+    def __init__(self, on_item: Optional[Callable[[int, Any], None]] = None) -> None:
+        self.parser = ArrayParser(on_item)
+
+    @property
+    def items(self) -> List[Any]:
+        return self.parser.items
+
+    def attach(self, config: Optional[RunnableConfig] = None) -> RunnableConfig:
+        """Copy of `config` with this callback added to its callbacks."""
+        config = dict(config or {})
+        config["callbacks"] = [*(config.get("callbacks") or []), self]
+        return config
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.parser.feed(token)
+
+
+def request_array(
+    texts: Sequence[T],
+    ask: Callable[[Sequence[T], ArrayStream], str],
+    max_tail_requests: int = MAX_TAIL_REQUESTS,
+    on_item: Optional[Callable[[int, Any], None]] = None,
+) -> Optional[List[Any]]:
+    """Ask for one array element per text, re-asking only for the tail of a truncated answer.
+
+    Args:
+        texts: Inputs of the batch, in order.
+        ask: Sends one request for the given texts, passing the stream to `invoke` via
+            `stream.attach(config)`, and returns the answer text.
+        max_tail_requests: Follow-up requests allowed for missing elements.
+        on_item: Called with the position in `texts` and the element as each element
+            arrives, before the answer is complete (e.g. to memoize labels early).
+
+    Returns:
+        The elements received, in order, or None when the first answer is not an array.
+        An answer cut off by a failed stream keeps the elements received before the error.
+        Answers that are not one complete element per text are evicted from the response
+        cache, so they are not replayed on the next run.
+    """
+    collected: List[Any] = []
+    remaining: Sequence[T] = texts
+
+    def deliver(index: int, value: Any) -> None:
+        # Surplus elements of a misaligned answer have no text to belong to.
+        if on_item is not None and index < len(texts):
+            on_item(index, value)
+
+    for request in range(max_tail_requests + 1):
+        offset = len(collected)
+        stream = ArrayStream(lambda index, value, offset=offset: deliver(offset + index, value))
+        with record_cache_keys() as keys:
+            try:
+                items, complete = parse_json_array(ask(remaining, stream))
+            except (CallCancelled, DeadlineExceeded):
+                raise
+            except Exception as exc:
+                if not collected and not stream.items:
+                    raise
+                logger.warning("Answer stream failed after %s elements: %s", len(stream.items), exc)
+                items, complete = list(stream.items), False
+        if items is None or not complete or len(items) != len(remaining):
+            forget_responses(keys)
+        if items is None:
+            return collected or None
+        # Elements of an answer that was not streamed (e.g. served from the cache).
+        for index in range(len(stream.items), len(items)):
+            deliver(offset + index, items[index])
+        collected.extend(items)
+        if complete or not items or len(collected) >= len(texts):
+            break
+        remaining = texts[len(collected) :]
+        if request < max_tail_requests:
+            logger.info("Answer truncated after %s of %s elements; requesting the rest", len(collected), len(texts))
+    return collected
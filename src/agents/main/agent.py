@@ -8,14 +8,21 @@ import sys
 from langchain.agents import create_agent
 from langchain.agents.middleware import TodoListMiddleware
 
-from ...llms.volcano import create_model
+from ...llms.volcano import get_model
 from ..information_extract import demand_extract_tool
 from ..binary_classification import sanitize_comment_tool
+from ..comment_triage import comment_triage_tool
 from ..text_classification import demand_classification_tool, sentiment_classification_tool
 from ..report_formatter import tool as report_formatter_tool
 from ...tools.file_storage import read_text_file, write_text_file
-from ...tools.statistics import invert_index, sort_by_len, sort_by_val, count_elements
-from ...tools.plot_draw import bar_chart, heap_map, pie_chart
+from ...tools.statistics import (
+    count_elements_file,
+    invert_index_file,
+    report_metrics_tool,
+    sort_by_len_file,
+    sort_by_val_file,
+)
+from ...tools.plot_draw import bar_chart, heap_map, pie_chart, render_charts
 
 logger = logging.getLogger(__name__)
 
@@ -25,10 +32,12 @@ def system_prompt() -> str:
     return (
         "You are a comment-processing orchestrator agent.\n"
         "When encountering any task involving numerical calculation, array (list) manipulation, JSON parsing/serialization, or dictionary operation, "
-        "always use the provided tools (such as invert_index, sort_by_len, etc.) rather than attempting to compute or process such logic yourself in the prompt. "
+        "always use the provided tools (such as invert_index_file, sort_by_len_file, etc.) rather than attempting to compute or process such logic yourself in the prompt. "
         "All such operations that can rely on tools should be delegated to the available tools—avoid performing direct calculations or structure traversals in the response.\n"
         "Use read_text_file to load comment content, sanitize_comment for cleaning, information_extract for extracting facts, text_classification for labeling, "
         "write_text_file for storing outputs, and statistics tools for any sorting/indexing/array/dictionary related tasks.\n"
+        "Statistics tools take file paths and column names and return the path of their result file; "
+        "pass them paths instead of copying ids or labels into the call.\n"
         "Return only the file path of the final output file."
     )
 
@@ -40,39 +49,48 @@ def sop_preference_prompt() -> str:
         "2. Extract all demands from the sanitized comments using the 'demand_extract_tool';\n"
         "3. Associate the comments with extracted demands using the 'demand_classification_tool';\n"
         "4. Analyze the sentiment of the sanitized comments using the 'sentiment_classification_tool';\n"
-        "5. Process data for report using the statistic tools: 'invert_index', 'sort_by_len', 'count_elements' and 'sort_by_val';\n"
-        "   At least we can conclude below metrics from the processed data: Top 3 most frequent demands, Percentage of all sentiment categories, Reason of negtive sentiment;"
-        "6. Draw plot to make result more readable using the 'bar_chart', 'heap_map', 'pie_chart' tools;\n"
-        "7. Provide the raw input file path, graph file path and sub_report file path to the 'report_formatter' tool to generate the final 'Product Iteration Proposal' report;"
+        "5. Compute the report metrics with one 'report_metrics_tool' call on the demand classification, sentiment and sanitized comment files. "
+        "It writes the top demands, sentiment percentages, demand x sentiment matrix, likes-weighted scores and top negative comments per demand, "
+        "plus plot-ready files; use the file statistic tools ('invert_index_file', 'count_elements_file', ...) only for metrics it does not cover;\n"
+        "6. Draw plot to make result more readable using the 'bar_chart', 'heap_map', 'pie_chart' tools on the plot-ready files "
+        "(demand_counts / demand_scores / negative_reasons for bar_chart, sentiment_counts for pie_chart, negative_share for heap_map); "
+        "when drawing several charts, pass them all to one 'render_charts' call;\n"
+        "7. Provide the raw input file path, graph file path and sub_report file path to the 'report_formatter' tool to generate the final 'Product Iteration Proposal' report;\n\n"
+        "For large inputs, steps 1, 3 and 4 can be fused into one pass: extract demands from the raw comments first, "
+        "then call the 'comment_triage_tool' once, which writes the sanitized, demand and sentiment files together."
     )
 
-def agent(model=None):
+def agent(model=None, checkpointer=None):
     """Create the comment processor agent with planning middleware enabled."""
     prompt_template = system_prompt()
     sop_template = sop_preference_prompt()
-    model = model or create_model()
+    model = model or get_model()
     middleware = [TodoListMiddleware(system_prompt=sop_template)]
     return create_agent(
         model,
         tools=[
             read_text_file,
             write_text_file,
-            invert_index,
-            sort_by_len,
-            sort_by_val,
-            count_elements,
+            invert_index_file,
+            sort_by_len_file,
+            sort_by_val_file,
+            count_elements_file,
+            report_metrics_tool,
 
             bar_chart,
             heap_map,
             pie_chart,
+            render_charts,
 
             sanitize_comment_tool,
             demand_extract_tool,
             demand_classification_tool,
             sentiment_classification_tool,
+            comment_triage_tool,
             report_formatter_tool,
         ],
         system_prompt=prompt_template,
         middleware=middleware,
+        checkpointer=checkpointer,
     )
 
@@ -0,0 +1,5 @@
+"""Deterministic DAG pipeline for the product-iteration SOP."""
+
+from .agent import agent
+
+__all__ = ["agent"]
@@ -0,0 +1,210 @@
+"""Deterministic LangGraph pipeline that runs the product-iteration SOP as a DAG.
+
+The fixed steps of `main.agent.sop_preference_prompt` are wired directly as graph
+nodes, so no orchestrator round-trip is spent choosing the next tool, and the
+sentiment branch runs in parallel with demand extraction/classification:
+
+    resolve_input -> sanitize -+-> extract_demands -> classify_demands -+-> aggregate -> plot -> report
+                               +-> classify_sentiment -------------------+
+
+The model is only consulted where judgment is needed: locating the input file
+when the run was not started with an `input_file_path`, and writing the final report.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from functools import partial
+from pathlib import Path
+from typing import Annotated, Any, Dict, List, Optional, TypedDict
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, SystemMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+from ...llms.volcano import get_model
+from ...memory.state import load_dataset
+from ...tools.plot_draw import render_charts
+from ...tools.statistics import report_metrics_tool
+from ..binary_classification import sanitize_comment_tool
+from ..information_extract import demand_extract_tool
+from ..report_formatter import tool as report_formatter_tool
+from ..text_classification import demand_classification_tool, sentiment_classification_tool
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineState(TypedDict, total=False):
+    """Artifacts produced along the SOP; each node fills in its own keys."""
+
+    messages: Annotated[List[AnyMessage], add_messages]
+    input_file_path: str
+    sanitized_file_path: str
+    categories_file_path: str
+    demands_file_path: str
+    sentiment_file_path: str
+    metrics_file_paths: Dict[str, str]
+    chart_file_paths: Dict[str, str]
+    report_file_path: str
+
+
+def system_prompt() -> str:
+    return (
+        "You locate the input file of a comment-analysis request.\n"
+        "Return only the file path of the user comment json mentioned in the request, with no extra text."
+    )
+
+
+def report_preference_prompt() -> str:
+    return (
+        "Produce a 'Product Iteration Proposal' for product managers. "
+        "Cover the top 3 most frequent demands, the percentage of every sentiment category "
+        "and the reasons behind negative sentiment, embedding the provided charts."
+    )
+
+
+def _load_json(file_path: str) -> Any:
+    return load_dataset(file_path)
+
+
+def _step(content: str) -> List[AIMessage]:
+    return [AIMessage(content=content)]
+
+
+def resolve_input(state: PipelineState, model: Optional[Any] = None) -> PipelineState:
+    """Use the `input_file_path` the run was started with, or ask the model to locate it.
+
+    Paths are never picked out of the request text: a job's instruction is free text, and
+    only the path the API validated is passed as `input_file_path`.
+    """
+    candidate = state.get("input_file_path")
+    if candidate:
+        if not Path(candidate).expanduser().exists():
+            raise FileNotFoundError(f"input file not found: {candidate}")
+        return {"messages": _step(f"input file: {candidate}")}
+
+    request = next(
+        (str(message.content) for message in reversed(state["messages"]) if isinstance(message, HumanMessage)),
+        "",
+    )
+    answer = (model or get_model()).invoke(
+        [SystemMessage(content=system_prompt()), HumanMessage(content=request)]
+    )
+    candidate = str(answer.content).strip().strip("`'\"")
+    if not Path(candidate).expanduser().exists():
+        raise FileNotFoundError(f"input file not found: {candidate}")
+    return {"input_file_path": candidate, "messages": _step(f"input file: {candidate}")}
+
+
+def sanitize(state: PipelineState) -> PipelineState:
+    path = sanitize_comment_tool.invoke({"input_file_path": state["input_file_path"]})
+    return {"sanitized_file_path": path, "messages": _step(f"sanitized comments: {path}")}
+
+
+def extract_demands(state: PipelineState) -> PipelineState:
+    path = demand_extract_tool.invoke({"input_file_path": state["sanitized_file_path"]})
+    return {"categories_file_path": path, "messages": _step(f"demand categories: {path}")}
+
+
+def classify_demands(state: PipelineState) -> PipelineState:
+    path = demand_classification_tool.invoke(
+        {
+            "input_file_path": state["sanitized_file_path"],
+            "categories_file_path": state["categories_file_path"],
+        }
+    )
+    return {"demands_file_path": path, "messages": _step(f"demand classification: {path}")}
+
+
+def classify_sentiment(state: PipelineState) -> PipelineState:
+    path = sentiment_classification_tool.invoke({"input_file_path": state["sanitized_file_path"]})
+    return {"sentiment_file_path": path, "messages": _step(f"sentiment classification: {path}")}
+
+
+def aggregate(state: PipelineState) -> PipelineState:
+    """Compute the report metrics in one pass and persist them as plot-ready files."""
+    paths = report_metrics_tool.invoke(
+        {
+            "demands_file_path": state["demands_file_path"],
+            "sentiment_file_path": state["sentiment_file_path"],
+            "comments_file_path": state["sanitized_file_path"],
+        }
+    )
+    return {"metrics_file_paths": paths, "messages": _step(f"metrics: {json.dumps(paths)}")}
+
+
+def plot(state: PipelineState) -> PipelineState:
+    metrics = state["metrics_file_paths"]
+    specs: Dict[str, Dict[str, Any]] = {}
+    if _load_json(metrics["demand_counts"]):
+        specs["demand_bar"] = {"kind": "bar", "data_file": metrics["demand_counts"], "title": "Demand frequency"}
+        specs["demand_score_bar"] = {
+            "kind": "bar",
+            "data_file": metrics["demand_scores"],
+            "title": "Likes-weighted demand score",
+        }
+        specs["negative_share_heatmap"] = {
+            "kind": "heatmap",
+            "data_file": metrics["negative_share"],
+            "title": "Negative share by demand (%)",
+        }
+    if _load_json(metrics["sentiment_counts"]):
+        specs["sentiment_pie"] = {
+            "kind": "pie",
+            "data_file": metrics["sentiment_counts"],
+            "title": "Sentiment distribution",
+        }
+    if _load_json(metrics["negative_reasons"]):
+        specs["negative_reason_bar"] = {
+            "kind": "bar",
+            "data_file": metrics["negative_reasons"],
+            "title": "Demands behind negative sentiment",
+        }
+    paths = render_charts.invoke({"specs": list(specs.values())}) if specs else []
+    charts = dict(zip(specs, paths))
+    return {"chart_file_paths": charts, "messages": _step(f"charts: {json.dumps(charts)}")}
+
+
+def report(state: PipelineState) -> PipelineState:
+    analysis_paths: Dict[str, str] = {
+        "sanitized comments": state["sanitized_file_path"],
+        "demand categories": state["categories_file_path"],
+        "demand classification": state["demands_file_path"],
+        "sentiment classification": state["sentiment_file_path"],
+    }
+    analysis_paths.update({f"metrics: {name}": path for name, path in state["metrics_file_paths"].items()})
+    analysis_paths.update({f"chart: {name}": path for name, path in state["chart_file_paths"].items()})
+
+    path = report_formatter_tool.invoke(
+        {
+            "report_preference": report_preference_prompt(),
+            "raw_input": state["input_file_path"],
+            "analysis_topic2report_path": analysis_paths,
+        }
+    )
+    return {"report_file_path": path, "messages": _step(str(path))}
+
+
+def agent(model: Optional[Any] = None, checkpointer: Optional[Any] = None):
+    """Compile the SOP pipeline; `model` is only used to locate the input file when needed."""
+    builder = StateGraph(PipelineState)
+    builder.add_node("resolve_input", partial(resolve_input, model=model))
+    builder.add_node("sanitize", sanitize)
+    builder.add_node("extract_demands", extract_demands)
+    builder.add_node("classify_demands", classify_demands)
+    builder.add_node("classify_sentiment", classify_sentiment)
+    builder.add_node("aggregate", aggregate)
+    builder.add_node("plot", plot)
+    builder.add_node("report", report)
+
+    builder.add_edge(START, "resolve_input")
+    builder.add_edge("resolve_input", "sanitize")
+    builder.add_edge("sanitize", "extract_demands")
+    builder.add_edge("extract_demands", "classify_demands")
+    builder.add_edge("sanitize", "classify_sentiment")
+    builder.add_edge(["classify_demands", "classify_sentiment"], "aggregate")
+    builder.add_edge("aggregate", "plot")
+    builder.add_edge("plot", "report")
+    builder.add_edge("report", END)
+    return builder.compile(checkpointer=checkpointer)
@@ -0,0 +1,29 @@
+"""Process-wide pool of compiled agents keyed by factory, model and system prompt."""
+
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+from ..llms.volcano import DEFAULT_MODEL_NAME, get_model
+
+_lock = threading.RLock()
+_agents: Dict[Tuple[str, str, str], Any] = {}
+
+
+def get_agent(
+    factory: Callable[..., Any],
+    system_prompt: str,
+    model_name: str = DEFAULT_MODEL_NAME,
+) -> Any:
+    """Return a compiled agent built once by `factory` on the shared model for `model_name`.
+
+    Args:
+        factory: Agent factory accepting the model as its first argument (e.g. `agent`).
+        system_prompt: System prompt the factory bakes into the agent; part of the cache key.
+        model_name: Model the agent runs on.
+    """
+    key = (f"{factory.__module__}.{factory.__qualname__}", model_name, system_prompt)
+    with _lock:
+        compiled = _agents.get(key)
+        if compiled is None:
+            compiled = _agents[key] = factory(get_model(model_name))
+        return compiled
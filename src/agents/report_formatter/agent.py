@@ -6,7 +6,8 @@ from typing import Dict
 from langchain.agents import create_agent
 from langchain_core.tools import tool as lc_tool
 
-from ...llms.volcano import create_model
+from ...llms.volcano import get_model
+from ..pool import get_agent
 from ...tools.file_storage import read_text_file, write_text_file
 
 
@@ -23,13 +24,14 @@ def system_prompt() -> str:
     )
 
 
-def agent(model=None):
+def agent(model=None, checkpointer=None):
     prompt_template = system_prompt()
-    model = model or create_model()
+    model = model or get_model()
     return create_agent(
         model,
         tools=[read_text_file, write_text_file],
         system_prompt=prompt_template,
+        checkpointer=checkpointer,
     )
 
 
@@ -55,7 +57,7 @@ def tool(
         "analysis_topic2report_path": analysis_topic2report_path,
     }
 
-    rf_agent = agent()
+    rf_agent = get_agent(agent, system_prompt())
     content = (
         "Format a structured Markdown report using the provided raw input and analysis artifacts. "
         "Use the available tools to read analysis files from the given paths. "
@@ -2,13 +2,26 @@
 
 import json
 import logging
-from typing import List
+from typing import Any, List, Optional, Sequence
 
-import json_repair
 from langchain.agents import create_agent
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool as lc_tool
 
-from ...llms.volcano import create_model
+from ...llms.hedging import hedged
+from ...llms.volcano import DEFAULT_MODEL_NAME, get_model
+from ..batching import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_INPUT_TOKENS,
+    align,
+    count_tokens,
+    pack_by_tokens,
+    run_batches,
+)
+from ..dedup import classify_unique, label_recorder, task_key
+from ..json_array import ArrayStream, request_array
+from ..pool import get_agent
 
 logger = logging.getLogger(__name__)
 
@@ -23,54 +36,118 @@ def system_prompt() -> str:
     )
 
 
-def agent(model=None):
+def agent(model=None, checkpointer=None):
     prompt_template = system_prompt()
-    model = model or create_model()
-    return create_agent(model, tools=[], system_prompt=prompt_template)
+    model = model or get_model()
+    return create_agent(model, tools=[], system_prompt=prompt_template, checkpointer=checkpointer)
 
 
 @lc_tool
 def tool(
     texts: List[str],
     categories: List[str],
-) -> List[List[str]]:
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    max_input_tokens: int = DEFAULT_MAX_INPUT_TOKENS,
+    model_name: str = DEFAULT_MODEL_NAME,
+) -> List[Optional[List[str]]]:
     """
     Classify each text into one of the provided categories.
 
     Args:
         texts: List of text contents.
         categories: Allowed category labels to choose from (one-to-many).
+        batch_size: Maximum number of texts sent to the model in one request.
+        max_concurrency: Maximum number of batches classified at the same time.
+        max_input_tokens: Prompt token budget per request; batches are packed up to it.
+        model_name: Model used for classification.
 
     Returns:
-        List of category lists aligned with the input texts.
+        List of category lists aligned with the input texts; None for texts whose batch failed,
+        or an empty list when every batch failed.
     """
-    input_json = json.dumps(
-        {"texts": texts, "categories": categories},
-        ensure_ascii=False,
-    )
-    cls_agent = agent()
-    content = (
-        "Classify each text into zero or more of the provided categories. "
-        "Return only a JSON array of arrays, each containing the categories for the corresponding text.\n"
-        f"{input_json}"
+    cls_agent = get_agent(agent, system_prompt(), model_name)
+    task = task_key("text_classification", model_name, system_prompt(), categories)
+
+    def build_content(batch: List[str]) -> str:
+        input_json = json.dumps(
+            {"texts": batch, "categories": categories},
+            ensure_ascii=False,
+        )
+        return (
+            "Classify each text into zero or more of the provided categories. "
+            "Return only a JSON array of arrays, each containing the categories for the corresponding text.\n"
+            f"{input_json}"
+        )
+
+    def to_labels(item: Any) -> List[str]:
+        if isinstance(item, list):
+            return [str(label) for label in item]
+        # If the agent returns a single label, wrap it to preserve alignment.
+        return [str(item)]
+
+    def memoizable(labels: List[str]) -> bool:
+        return all(label in categories for label in labels)
+
+    remember = label_recorder(task, memoizable)
+
+    def classify_batch(batch: List[str], config: RunnableConfig) -> Optional[List[Optional[List[str]]]]:
+        def ask(texts: Sequence[str], stream: ArrayStream) -> str:
+            result = cls_agent.invoke(
+                {"messages": [{"role": "user", "content": build_content(list(texts))}]},
+                config=stream.attach(config),
+            )
+            return result["messages"][-1].content
+
+        # Labels are memoized as they stream in, so they survive a deadline or a crash.
+        predicted = request_array(batch, ask, on_item=lambda index, item: remember(batch[index], to_labels(item)))
+        try:
+            if predicted is None:
+                logger.error("Agent result is not a list")
+                return None
+
+            return align([to_labels(item) for item in predicted], len(batch), None)
+        except Exception as exc:
+            logger.error("Error parsing agent result: %s", exc)
+            return None
+
+    # Estimate each text's output as an array holding up to two of the longest category names.
+    category_tokens = max((count_tokens(json.dumps(c, ensure_ascii=False)) for c in categories), default=1)
+    labels_per_text = min(len(categories), 2) or 1
+
+    def classify_texts(unique_texts: List[str]) -> List[Optional[List[str]]]:
+        batches, report = pack_by_tokens(
+            unique_texts,
+            overhead_tokens=count_tokens(system_prompt()) + count_tokens(build_content([])),
+            output_tokens_per_item=labels_per_text * (category_tokens + 1) + 2,
+            max_input_tokens=max_input_tokens,
+            max_items=batch_size,
+        )
+        report.log("text_classification")
+        batch_predictions = run_batches(
+            batches,
+            hedged(classify_batch, "text_classification"),
+            max_concurrency=max_concurrency,
+            name="text_classification",
+            checkpoint_key=task,
+        )
+        return [
+            labels
+            for batch, predictions in zip(batches, batch_predictions)
+            for labels in (predictions if predictions is not None else [None] * len(batch))
+        ]
+
+    predictions = classify_unique(
+        texts,
+        task,
+        classify_texts,
+        memoizable=memoizable,
     )
-    result = cls_agent.invoke({"messages": [{"role": "user", "content": content}]})
-    response_content = result["messages"][-1].content
-
-    try:
-        predicted = json_repair.loads(response_content)
-        if not isinstance(predicted, list):
-            logger.error("Agent result is not a list: %s", type(predicted))
-            return []
-
-        normalized: List[List[str]] = []
-        for item in predicted:
-            if isinstance(item, list):
-                normalized.append([str(label) for label in item])
-            else:
-                # If the agent returns a single label, wrap it to preserve alignment.
-                normalized.append([str(item)])
-        return normalized
-    except Exception as exc:
-        logger.error("Error parsing agent result: %s", exc)
+    failed = sum(item is None for item in predictions)
+    if failed == len(predictions):
         return []
+
+    # Texts of a failed batch stay None, so file tools can leave them out for a rerun.
+    if failed:
+        logger.warning("text_classification: %s of %s texts failed to classify", failed, len(predictions))
+    return predictions
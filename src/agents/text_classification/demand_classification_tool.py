@@ -1,22 +1,70 @@
 """File-backed demand classifier built on the text classification agent."""
 
-import json
 import logging
-from typing import List, Mapping, Optional, Union
+from typing import Dict, List, Mapping, Optional, Union
 
 from langchain_core.tools import tool
 
-from ...tools.file_storage import read_text_file, write_text_file
+from ..incremental import apply_incremental, fingerprint, load_previous
+from ...memory.state import load_dataset
+from ...tools.file_storage import is_jsonl, stream_records, write_json_file
 from .agent import tool as text_classification_tool
 
 logger = logging.getLogger(__name__)
 
+# Results record the categories they were classified against; see `incremental`.
+CATEGORIES_FIELD = "categories_hash"
+
+
+def _classify_demands(
+    comments: List[Mapping[str, Union[int, str]]],
+    categories: List[str],
+) -> List[Dict[str, Union[int, str, List[str]]]]:
+    """Label each comment with the demand categories it expresses."""
+    texts: List[str] = []
+    for comment in comments:
+        # Prefer 'content', fallback to 'comment' for compatibility with older schemas.
+        raw_text = comment.get("content") or ""
+        texts.append(str(raw_text))
+
+    predictions = text_classification_tool.invoke({"texts": texts, "categories": categories})
+
+    if not isinstance(predictions, list) or not predictions:
+        logger.error("Text classifier returned invalid labels.")
+        raise ValueError("Text classifier returned invalid labels.")
+
+    if len(predictions) != len(comments):
+        logger.warning(
+            "Prediction count (%s) does not match comment count (%s); truncating to shortest.",
+            len(predictions),
+            len(comments),
+        )
+
+    categories_hash = fingerprint(categories)
+    results = []
+    for idx, (comment, labels) in enumerate(zip(comments, predictions)):
+        if labels is None:
+            # Left out so a rerun with `previous_output_path` classifies it again.
+            continue
+        normalized_labels = labels if isinstance(labels, list) else [labels]
+        results.append(
+            {
+                "id": comment.get("id", idx),
+                "content": comment.get("content") or comment.get("comment") or "",
+                "demands": [str(label) for label in normalized_labels if str(label)],
+                CATEGORIES_FIELD: categories_hash,
+            }
+        )
+    return results
+
 
 @tool
 def demand_classification_tool(
     input_file_path: str,
     categories_file_path: str,
     output_file_path: Optional[str] = None,
+    previous_output_path: Optional[str] = None,
+    watermark: Optional[str] = None,
 ) -> str:
     """
     Classify each comment in the input file into zero or more demand categories.
@@ -24,24 +72,22 @@ def demand_classification_tool(
     Args:
         input_file_path: File path of the input comment json. Example:
             `[{"id": 1, "content": "希望能增加4K导出", ...}, {"id": 2, "content": "配音能否更自然", ...}]`
+            A `.jsonl` file (one comment object per line) is streamed in constant memory.
         categories_file_path: File path containing demand category list (JSON array of strings). Example:
             `["4K导出", "配音自然"]`
         output_file_path: Optional output path; defaults to alongside the input file.
+            A `.jsonl` output (the default for `.jsonl` input) is appended to as each batch finishes.
+        previous_output_path: Optional result file of an earlier run of this tool; unchanged comments reuse
+            their previous results and only new or edited comments are sent to the model. Results produced
+            with different categories are ignored.
+        watermark: Optional newest comment covered by the previous run, as `"<date>"` or `"<date>:<id>"`.
 
     Returns:
         Output file path containing classification results. Example structure:
-            `[{"id": 1, "content": "希望能增加4K导出", "demands": ["4K导出"]}]`
+            `[{"id": 1, "content": "希望能增加4K导出", "demands": ["4K导出"], "categories_hash": "..."}]`
     """
     try:
-        json_content = read_text_file.invoke({"file_path": input_file_path})
-        comments: List[Mapping[str, Union[int, str]]] = json.loads(json_content)
-    except Exception as exc:
-        logger.error("Failed to read input file %s: %s", input_file_path, exc)
-        raise
-
-    try:
-        categories_content = read_text_file.invoke({"file_path": categories_file_path})
-        raw_categories = json.loads(categories_content)
+        raw_categories = load_dataset(categories_file_path)
         if not isinstance(raw_categories, list):
             raise ValueError("categories is not a list")
         categories = [str(item) for item in raw_categories if str(item)]
@@ -49,39 +95,29 @@ def demand_classification_tool(
         logger.error("Failed to read categories file %s: %s", categories_file_path, exc)
         raise
 
-    texts: List[str] = []
-    for comment in comments:
-        # Prefer 'content', fallback to 'comment' for compatibility with older schemas.
-        raw_text = comment.get("content") or ""
-        texts.append(str(raw_text))
+    previous = load_previous(previous_output_path, CATEGORIES_FIELD, fingerprint(categories))
 
-    predictions = text_classification_tool.invoke({"texts": texts, "categories": categories})
+    def classify(comments: List[Mapping[str, Union[int, str]]]) -> List[Mapping[str, Union[int, str]]]:
+        return apply_incremental(
+            comments,
+            lambda pending: _classify_demands(pending, categories),
+            previous,
+            watermark,
+        )
 
-    if not isinstance(predictions, list) or not predictions:
-        logger.error("Text classifier returned invalid labels.")
-        raise ValueError("Text classifier returned invalid labels.")
+    if is_jsonl(input_file_path) or is_jsonl(output_file_path):
+        return stream_records(input_file_path, output_file_path, classify)
 
-    if len(predictions) != len(comments):
-        logger.warning(
-            "Prediction count (%s) does not match comment count (%s); truncating to shortest.",
-            len(predictions),
-            len(comments),
-        )
+    try:
+        comments: List[Mapping[str, Union[int, str]]] = load_dataset(input_file_path)
+    except Exception as exc:
+        logger.error("Failed to read input file %s: %s", input_file_path, exc)
+        raise
 
-    results = []
-    for idx, (comment, labels) in enumerate(zip(comments, predictions)):
-        normalized_labels = labels if isinstance(labels, list) else [labels] if labels is not None else []
-        results.append(
-            {
-                "id": comment.get("id", idx),
-                "content": comment.get("content") or comment.get("comment") or "",
-                "demands": [str(label) for label in normalized_labels if str(label)],
-            }
-        )
+    results = classify(comments)
 
     try:
-        output_content = json.dumps(results, ensure_ascii=False, indent=2)
-        return write_text_file.invoke({"content": output_content, "file_path": output_file_path})
+        return write_json_file(results, output_file_path)
     except Exception as exc:
         logger.error("Failed to write demand classification file %s: %s", output_file_path, exc)
         raise
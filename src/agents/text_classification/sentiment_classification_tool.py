@@ -1,42 +1,23 @@
 """File-backed sentiment classifier built on the text classification agent."""
 
-import json
 import logging
-from typing import List, Mapping, Optional, Union
+from typing import Dict, List, Mapping, Optional, Union
 
 from langchain_core.tools import tool
 
-from ...tools.file_storage import read_text_file, write_text_file
+from ..incremental import apply_incremental, load_previous
+from ...memory.state import load_dataset
+from ...tools.file_storage import is_jsonl, stream_records, write_json_file
 from .agent import tool as text_classification_tool
 
 logger = logging.getLogger(__name__)
 
+SENTIMENT_CATEGORIES = ["positive", "negative", "neutral"]
 
-@tool
-def sentiment_classification_tool(
-    input_file_path: str,
-    output_file_path: Optional[str] = None,
-) -> str:
-    """
-    Classify each comment's sentiment as positive, negative, or neutral.
-
-    Args:
-        input_file_path: File path of the input comment json. Example:
-            `[{"id": 1, "content": "很好用"}, {"id": 2, "content": "卡顿严重"}]`
-        output_file_path: Optional output path; defaults to alongside the input file.
 
-    Returns:
-        Output file path containing sentiment results. Example structure:
-            `[{"id": 1, "content": "...", "sentiment": "positive"}]`
-    """
-    sentiment_categories = ["positive", "negative", "neutral"]
-
-    try:
-        json_content = read_text_file.invoke({"file_path": input_file_path})
-        comments: List[Mapping[str, Union[int, str]]] = json.loads(json_content)
-    except Exception as exc:
-        logger.error("Failed to read input file %s: %s", input_file_path, exc)
-        raise
+def _classify_sentiment(comments: List[Mapping[str, Union[int, str]]]) -> List[Dict[str, Union[int, str]]]:
+    """Label each comment with its sentiment."""
+    sentiment_categories = SENTIMENT_CATEGORIES
 
     texts: List[str] = []
     for comment in comments:
@@ -60,10 +41,13 @@ def sentiment_classification_tool(
 
     results = []
     for idx, (comment, labels) in enumerate(zip(comments, predictions)):
+        if labels is None:
+            # Left out so a rerun with `previous_output_path` classifies it again.
+            continue
         normalized = []
         if isinstance(labels, list):
             normalized = [label for label in labels if label]
-        elif labels is not None:
+        else:
             normalized = [labels]
 
         sentiment = str(normalized[0]) if normalized else "neutral"
@@ -74,10 +58,51 @@ def sentiment_classification_tool(
                 "sentiment": sentiment,
             }
         )
+    return results
+
+
+@tool
+def sentiment_classification_tool(
+    input_file_path: str,
+    output_file_path: Optional[str] = None,
+    previous_output_path: Optional[str] = None,
+    watermark: Optional[str] = None,
+) -> str:
+    """
+    Classify each comment's sentiment as positive, negative, or neutral.
+
+    Args:
+        input_file_path: File path of the input comment json. Example:
+            `[{"id": 1, "content": "很好用"}, {"id": 2, "content": "卡顿严重"}]`
+            A `.jsonl` file (one comment object per line) is streamed in constant memory.
+        output_file_path: Optional output path; defaults to alongside the input file.
+            A `.jsonl` output (the default for `.jsonl` input) is appended to as each batch finishes.
+        previous_output_path: Optional result file of an earlier run of this tool; unchanged comments
+            reuse their previous results and only new or edited comments are sent to the model.
+        watermark: Optional newest comment covered by the previous run, as `"<date>"` or `"<date>:<id>"`.
+
+    Returns:
+        Output file path containing sentiment results. Example structure:
+            `[{"id": 1, "content": "...", "sentiment": "positive"}]`
+    """
+    previous = load_previous(previous_output_path)
+
+    def classify(comments: List[Mapping[str, Union[int, str]]]) -> List[Mapping[str, Union[int, str]]]:
+        return apply_incremental(comments, _classify_sentiment, previous, watermark)
+
+    if is_jsonl(input_file_path) or is_jsonl(output_file_path):
+        return stream_records(input_file_path, output_file_path, classify)
+
+    try:
+        comments: List[Mapping[str, Union[int, str]]] = load_dataset(input_file_path)
+    except Exception as exc:
+        logger.error("Failed to read input file %s: %s", input_file_path, exc)
+        raise
+
+    results = classify(comments)
 
     try:
-        output_content = json.dumps(results, ensure_ascii=False, indent=2)
-        return write_text_file.invoke({"content": output_content, "file_path": output_file_path})
+        return write_json_file(results, output_file_path)
     except Exception as exc:
         logger.error("Failed to write sentiment classification file %s: %s", output_file_path, exc)
         raise
@@ -1,11 +1,105 @@
-from typing import Dict
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
+from .jobs import Job, JobManager, QueueFullError
+from ..agents.chat import AGENT_REGISTRY
+from ..llms.hedging import get_hedger
+from ..llms.limiter import get_limiter
+from ..tools.artifact_codec import dumps
+from ..tools.file_storage import FILES_DIR, write_json_file
 
-def create_app() -> FastAPI:
+DEFAULT_INSTRUCTION = "针对 `{path}` 产出一份产品分析报告"
+# How often an event stream checks for new job events, and sends a comment when idle.
+EVENTS_POLL_SECONDS = float(os.environ.get("JOBS_EVENTS_POLL_SECONDS", "0.5"))
+EVENTS_KEEPALIVE_SECONDS = float(os.environ.get("JOBS_EVENTS_KEEPALIVE_SECONDS", "15"))
+# Directories `input_file_path` may point into (separated by os.pathsep); the files directory by default.
+INPUT_ROOTS = [
+    Path(root).expanduser().resolve()
+    for root in os.environ.get("JOBS_INPUT_ROOTS", str(FILES_DIR)).split(os.pathsep)
+    if root
+]
+
+
+class JobRequest(BaseModel):
+    """A comment file path or inline comments, and the agent to run on them."""
+
+    agent: str = "pipeline"
+    input_file_path: Optional[str] = None
+    comments: Optional[List[Dict[str, Any]]] = None
+    instruction: Optional[str] = None
+
+
+def _input_path(file_path: str) -> str:
+    """Resolve a client-supplied input path; 400 unless it is an existing file under INPUT_ROOTS."""
+    path = Path(file_path).expanduser().resolve()
+    if not any(path.is_relative_to(root) for root in INPUT_ROOTS):
+        roots = ", ".join(str(root) for root in INPUT_ROOTS)
+        raise HTTPException(status_code=400, detail=f"`input_file_path` must be inside: {roots}")
+    if not path.is_file():
+        raise HTTPException(status_code=400, detail=f"input file not found: {file_path}")
+    return str(path)
+
+
+def _validate(request: JobRequest) -> Optional[str]:
+    """Check a job request before anything is written; returns the resolved input path, if any."""
+    if request.agent not in AGENT_REGISTRY:
+        raise HTTPException(status_code=400, detail=f"unknown agent: {request.agent}")
+    if request.comments is not None:
+        return None
+    if request.input_file_path:
+        return _input_path(request.input_file_path)
+    raise HTTPException(status_code=400, detail="provide either `input_file_path` or `comments`")
+
+
+def _job_content(request: JobRequest, path: str) -> str:
+    if request.instruction:
+        return f"{request.instruction}\n\n`{path}`"
+    return DEFAULT_INSTRUCTION.format(path=path)
+
+
+def _sse(event_id: Optional[int], event: str, data: Dict[str, Any]) -> bytes:
+    head = f"id: {event_id}\n".encode() if event_id is not None else b""
+    return head + f"event: {event}\n".encode() + b"data: " + dumps(data) + b"\n\n"
+
+
+async def _job_events(job: Job, request: Request, last_id: int) -> AsyncIterator[bytes]:
+    """Send the events of `job` after `last_id` until it finishes or the client disconnects.
+
+    Each client reads from the job's bounded event log at its own pace, so a slow client
+    never holds up the job; if it falls behind the log, it gets a `gap` event instead.
+    """
+    idle_since = time.monotonic()
+    while not await request.is_disconnected():
+        events, done = job.events_after(last_id)
+        if events and events[0]["id"] > last_id + 1:
+            yield _sse(None, "gap", {"missed_from": last_id + 1, "resumed_at": events[0]["id"]})
+        for event in events:
+            last_id = event["id"]
+            yield _sse(last_id, event["event"], event["data"])
+        if done:
+            return
+        if events:
+            idle_since = time.monotonic()
+        elif time.monotonic() - idle_since >= EVENTS_KEEPALIVE_SECONDS:
+            idle_since = time.monotonic()
+            yield b": keep-alive\n\n"
+        await asyncio.sleep(EVENTS_POLL_SECONDS)
+
+
+def create_app(jobs: Optional[JobManager] = None) -> FastAPI:
     """Initialize the FastAPI application and attach shared routes."""
     app = FastAPI(title="Marketing Tools API")
+    # Job tools may read the allowed inputs and the artifacts written by earlier steps.
+    jobs = jobs or JobManager(read_roots=[*INPUT_ROOTS, FILES_DIR])
+    app.state.jobs = jobs
+    app.add_event_handler("shutdown", jobs.shutdown)
 
     @app.get("/", summary="Root")
     def read_root() -> Dict[str, str]:
@@ -17,6 +111,74 @@ def create_app() -> FastAPI:
         """Lightweight liveness endpoint."""
         return {"status": "ok"}
 
+    @app.get("/llm/stats", summary="Model client statistics")
+    def llm_stats() -> Dict[str, Any]:
+        """Adaptive concurrency limit and retry counters, and hedge/win rates per call kind."""
+        return {**get_limiter().stats(), "hedging": get_hedger().stats()}
+
+    @app.post("/jobs", status_code=202, summary="Submit an analysis job")
+    def submit_job(request: JobRequest) -> Dict[str, Any]:
+        """Queue an agent run and return its id immediately; 429 when the queue is full.
+
+        The input path reaches the agent as the `input_file_path` state field; paths named
+        in `instruction` are never used as input.
+        """
+        path = _validate(request)
+        written = path is None
+        if written:
+            path = write_json_file(request.comments)
+        try:
+            job = jobs.submit(request.agent, _job_content(request, path), {"input_file_path": path})
+        except QueueFullError as exc:
+            if written:
+                Path(path).unlink(missing_ok=True)
+            raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "30"})
+        return job.summary()
+
+    @app.get("/jobs/{job_id}", summary="Job status")
+    def job_status(job_id: str) -> Dict[str, Any]:
+        """Status, timings and final output of a job."""
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"job not found: {job_id}")
+        return job.summary()
+
+    @app.get("/jobs/{job_id}/artifacts", summary="Job artifacts")
+    def job_artifacts(job_id: str) -> Dict[str, Any]:
+        """File paths produced by a finished job, e.g. the report and chart files."""
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"job not found: {job_id}")
+        if not job.done:
+            raise HTTPException(status_code=409, detail=f"job is {job.status}")
+        return {"job_id": job.id, "status": job.status, "output": job.output, "artifacts": job.artifacts}
+
+    @app.get("/jobs/{job_id}/events", summary="Job progress events")
+    def job_events(
+        job_id: str,
+        request: Request,
+        last_event_id: Optional[int] = None,
+        last_event_id_header: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+    ) -> StreamingResponse:
+        """Server-sent events of a job: status changes, graph steps and batch progress.
+
+        Reconnecting clients resume after the `Last-Event-ID` header (or `?last_event_id=`).
+        """
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"job not found: {job_id}")
+        start = last_event_id
+        if last_event_id_header:
+            try:
+                start = int(last_event_id_header)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"invalid Last-Event-ID: {last_event_id_header}")
+        return StreamingResponse(
+            _job_events(job, request, start or 0),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
     return app
 
 
@@ -0,0 +1,217 @@
+"""Background execution of agent runs submitted through the API."""
+
+import contextlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from ..agents.chat import AGENT_REGISTRY, load_agent_factory
+from ..memory.checkpoint import get_checkpointer
+from ..memory.progress import get_progress_store, progress_scope
+from ..memory.state import read_roots_scope, run_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = int(os.environ.get("JOBS_MAX_WORKERS", "2"))
+# Jobs accepted but not yet finished; submissions beyond this are rejected.
+DEFAULT_MAX_QUEUE = int(os.environ.get("JOBS_MAX_QUEUE", "32"))
+# Finished jobs kept for status and artifact lookups.
+DEFAULT_MAX_RETAINED = int(os.environ.get("JOBS_MAX_RETAINED", "1000"))
+# Events kept per job for streaming and resumption; older ones are dropped first.
+MAX_EVENTS = int(os.environ.get("JOBS_MAX_EVENTS", "1000"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is submitted while `max_queue` jobs are pending."""
+
+
+@dataclass
+class Job:
+    """One agent run and its outcome."""
+
+    id: str
+    agent: str
+    content: str
+    inputs: Dict[str, Any] = field(default_factory=dict)
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    output: Optional[str] = None
+    artifacts: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    events: Deque[Dict[str, Any]] = field(default_factory=lambda: deque(maxlen=MAX_EVENTS), repr=False)
+    last_event_id: int = 0
+    _events_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        """Append an event with the next id; thread-safe and never blocks on readers."""
+        with self._events_lock:
+            self._append(event, data)
+
+    def _append(self, event: str, data: Dict[str, Any]) -> None:
+        self.last_event_id += 1
+        self.events.append({"id": self.last_event_id, "event": event, "data": data})
+
+    def events_after(self, event_id: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """Retained events newer than `event_id`, and whether the job had finished when read."""
+        with self._events_lock:
+            return [event for event in self.events if event["id"] > event_id], self.done
+
+    def set_status(self, status: str) -> None:
+        # Together, so readers never see a final status before its event is in the log.
+        with self._events_lock:
+            self.status = status
+            self._append("status", {"status": status})
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "agent": self.agent,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "output": self.output,
+            "error": self.error,
+        }
+
+
+def collect_artifacts(state: Dict[str, Any]) -> Dict[str, Any]:
+    """File paths recorded in a final agent state (`*_file_path` / `*_file_paths` keys)."""
+    return {
+        key: value
+        for key, value in state.items()
+        if (key.endswith("_file_path") and isinstance(value, str))
+        or (key.endswith("_file_paths") and isinstance(value, dict))
+    }
+
+
+def _message_text(state: Dict[str, Any]) -> Optional[str]:
+    messages: List[Any] = state.get("messages") or []
+    if not messages:
+        return None
+    content = getattr(messages[-1], "content", None)
+    return content if isinstance(content, str) else str(content)
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool and rejects submissions beyond a queue depth.
+
+    With `read_roots`, the tools of a job may only read files inside those directories.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        max_retained: int = DEFAULT_MAX_RETAINED,
+        read_roots: Optional[Iterable[Path]] = None,
+    ) -> None:
+        self.max_queue = max_queue
+        self.max_retained = max_retained
+        self.read_roots = None if read_roots is None else tuple(read_roots)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending = 0
+        self._agents: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._agents_lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of queued or running jobs."""
+        return self._pending
+
+    def submit(self, agent: str, content: str, inputs: Optional[Dict[str, Any]] = None) -> Job:
+        """Queue a run of `agent` on `content`; raises QueueFullError when the queue is full.
+
+        `inputs` are passed to the agent as initial state next to the message, e.g. the
+        validated `input_file_path` of the pipeline.
+        """
+        if agent not in AGENT_REGISTRY:
+            raise KeyError(agent)
+        with self._lock:
+            if self._pending >= self.max_queue:
+                raise QueueFullError(f"{self._pending} jobs pending, limit {self.max_queue}")
+            job = Job(id=uuid.uuid4().hex, agent=agent, content=content, inputs=dict(inputs or {}))
+            self._jobs[job.id] = job
+            self._pending += 1
+            self._evict()
+        future = self._executor.submit(self._run, job)
+        future.add_done_callback(lambda done: self._cancelled(job) if done.cancelled() else None)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        """Stop accepting work; queued jobs are cancelled and marked failed."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _cancelled(self, job: Job) -> None:
+        job.error = "cancelled: the server shut down before the job started"
+        job.finished_at = time.time()
+        with self._lock:
+            self._pending -= 1
+        job.set_status(FAILED)
+
+    def _evict(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[: max(len(self._jobs) - self.max_retained, 0)]:
+            del self._jobs[job_id]
+
+    def _agent(self, key: str) -> Any:
+        # Compiled agents are shared by jobs; each job runs on its own thread id.
+        with self._agents_lock:
+            if key not in self._agents:
+                factory: Callable[..., Any] = load_agent_factory(key)
+                self._agents[key] = factory(checkpointer=get_checkpointer())
+            return self._agents[key]
+
+    def _run(self, job: Job) -> None:
+        job.started_at = time.time()
+        job.set_status(RUNNING)
+        status = FAILED
+        try:
+            agent = self._agent(job.agent)
+            payload = {**job.inputs, "messages": [{"role": "user", "content": job.content}]}
+            config = {"configurable": {"thread_id": job.id}}
+            roots = contextlib.nullcontext() if self.read_roots is None else read_roots_scope(self.read_roots)
+            # Same step updates as chat.py prints, plus per-batch progress of the tools.
+            with run_context(job.id), roots, progress_scope(lambda event: job.publish("progress", event)):
+                for chunk in agent.stream(payload, config=config, stream_mode="updates"):
+                    for step, data in chunk.items():
+                        content = _message_text(data) if isinstance(data, dict) else None
+                        job.publish("step", {"step": step, "content": content})
+            state = agent.get_state(config).values
+            job.output = _message_text(state)
+            job.artifacts = collect_artifacts(state)
+            status = SUCCEEDED
+            # Batch records only serve to resume a failed run (`chat.py --resume <job id>`).
+            get_progress_store().clear(job.id)
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed", job.id, job.agent)
+            job.error = f"{type(exc).__name__}: {exc}"
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+            job.set_status(status)
@@ -0,0 +1,240 @@
+"""Persistent, content-addressed cache for model responses backed by SQLite."""
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import xxhash
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).resolve().parents[1] / "files" / ".cache"
+DEFAULT_CACHE_PATH = Path(os.environ.get("LLM_CACHE_PATH", CACHE_DIR / "llm_responses.sqlite"))
+DEFAULT_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+DEFAULT_MAX_AGE_SECONDS = float(os.environ.get("LLM_CACHE_MAX_AGE_SECONDS", str(30 * 24 * 3600)))
+# Eviction scans the table, so only run it every N writes.
+EVICT_EVERY_N_WRITES = 64
+# Answers cut off by the output limit or a filter would be replayed as permanent failures.
+UNCACHED_FINISH_REASONS = frozenset({"length", "content_filter"})
+
+_recorded_keys: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("cache_keys", default=None)
+_recorded_hits: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("cache_hits", default=None)
+
+
+def cache_enabled() -> bool:
+    """Whether the response cache is switched on (set `LLM_CACHE_DISABLED=1` to bypass it)."""
+    return os.environ.get("LLM_CACHE_DISABLED", "").lower() not in {"1", "true", "yes"}
+
+
+@contextlib.contextmanager
+def record_cache_keys() -> Iterator[List[str]]:
+    """Collect the keys of the entries looked up or written inside the block.
+
+    A caller that rejects the answer passes them to `forget_responses`, so the next
+    identical request asks the model again instead of replaying the bad answer.
+    """
+    keys: List[str] = []
+    token = _recorded_keys.set(keys)
+    try:
+        yield keys
+    finally:
+        _recorded_keys.reset(token)
+
+
+@contextlib.contextmanager
+def record_cache_hits() -> Iterator[List[str]]:
+    """Collect the keys of the lookups served from the cache inside the block.
+
+    Lets latency tracking (see `hedging`) tell answers replayed in milliseconds from
+    real model calls.
+    """
+    hits: List[str] = []
+    token = _recorded_hits.set(hits)
+    try:
+        yield hits
+    finally:
+        _recorded_hits.reset(token)
+
+
+def _record(key: str, recorded: contextvars.ContextVar[Optional[List[str]]] = _recorded_keys) -> None:
+    keys = recorded.get()
+    if keys is not None:
+        keys.append(key)
+
+
+def _finish_reason(generation: Any) -> Optional[str]:
+    info = getattr(generation, "generation_info", None) or {}
+    if info.get("finish_reason"):
+        return info["finish_reason"]
+    metadata = getattr(getattr(generation, "message", None), "response_metadata", None) or {}
+    return metadata.get("finish_reason")
+
+
+class SQLiteResponseCache(BaseCache):
+    """LangChain cache keyed by an xxhash of the model configuration and the full prompt.
+
+    The prompt LangChain hands to the cache is the serialized message list, so the key
+    covers the model name and parameters, the system prompt and the user content.
+    Entries are evicted once they are older than `max_age_seconds`, and least recently
+    used entries are dropped once the stored payloads exceed `max_bytes`.
+
+    Truncated answers are not stored, and callers drop answers they reject with
+    `record_cache_keys` and `forget_responses`.
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+    ) -> None:
+        self.path = Path(path).expanduser()
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        hasher = xxhash.xxh3_128()
+        hasher.update(llm_string.encode("utf-8"))
+        hasher.update(b"\x00")
+        hasher.update(prompt.encode("utf-8"))
+        return hasher.hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if not self.enabled:
+            return None
+        key = self._key(prompt, llm_string)
+        _record(key)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        _record(key, _recorded_hits)
+        try:
+            return [loads(item) for item in json.loads(row[0])]
+        except Exception as exc:
+            logger.warning("Dropping unreadable cache entry %s: %s", key, exc)
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if not self.enabled:
+            return
+        reasons = {_finish_reason(generation) for generation in return_val} & UNCACHED_FINISH_REASONS
+        if reasons:
+            logger.info("Not caching an answer that finished with %s", ", ".join(sorted(reasons)))
+            return
+        key = self._key(prompt, llm_string)
+        _record(key)
+        payload = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, size, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now),
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % EVICT_EVERY_N_WRITES == 0:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the least recently used ones until under `max_bytes`."""
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            rows: Sequence[Any] = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+            ).fetchall()
+            stale = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                stale.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self._conn.commit()
+
+    def evict(self, keys: Iterable[str]) -> None:
+        """Drop the entries with the given keys, see `record_cache_keys`."""
+        with self._lock:
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key in set(keys)])
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current on-disk footprint."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+_cache: Optional[SQLiteResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[SQLiteResponseCache]:
+    """Return the process-wide response cache, or None when it is bypassed."""
+    global _cache
+    if not cache_enabled():
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = SQLiteResponseCache()
+        return _cache
+
+
+def forget_responses(keys: Iterable[str]) -> None:
+    """Evict cached answers a caller rejected, e.g. a non-JSON or misaligned answer."""
+    keys = list(keys)
+    cache = get_response_cache() if keys else None
+    if cache is not None:
+        cache.evict(keys)
+        logger.info("Evicted %s rejected answers from the response cache", len(set(keys)))
@@ -0,0 +1,265 @@
+"""Per-call deadlines and hedged duplicate requests for model calls.
+
+A hedged call starts one attempt and, if no valid answer has arrived once the call has
+taken longer than a percentile of the recent latencies of calls with the same name (and
+at least `HEDGE_MIN_DELAY_SECONDS`), a duplicate attempt. Answers served by the response
+cache are left out of the latencies, or they would pull the percentile towards zero. The first valid answer wins and the other attempt is cancelled: every
+attempt runs with a callback that aborts its streaming response at the next token once
+the call is settled or its deadline has passed.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, TypeVar
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
+
+from .cache import record_cache_hits
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HEDGE_ENABLED = os.environ.get("LLM_HEDGE_DISABLED", "").lower() not in {"1", "true", "yes"}
+# The duplicate is sent once a call is slower than this percentile of recent calls.
+HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "95"))
+# Never hedge a call earlier than this, however fast recent calls were.
+HEDGE_MIN_DELAY_SECONDS = float(os.environ.get("LLM_HEDGE_MIN_DELAY_SECONDS", "2"))
+# Calls of a name observed before hedging starts, and how many recent ones are kept.
+HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_WINDOW = int(os.environ.get("LLM_HEDGE_WINDOW", "200"))
+HEDGE_MAX_WORKERS = int(os.environ.get("LLM_HEDGE_MAX_WORKERS", "64"))
+# Deadline of a whole hedged call in seconds; 0 disables it.
+DEFAULT_DEADLINE_SECONDS = float(os.environ.get("LLM_CALL_DEADLINE_SECONDS", "0"))
+
+
+class CallCancelled(Exception):
+    """Raised inside an attempt whose call was already settled by another attempt."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call has no valid answer by its deadline."""
+
+
+class _Cancellation(BaseCallbackHandler):
+    """Aborts the model run at its next event once cancelled or past the deadline."""
+
+    raise_error = True
+
+    def __init__(self, cancelled: threading.Event, deadline: Optional[float]) -> None:
+        self.cancelled = cancelled
+        self.deadline = deadline
+
+    def check(self) -> None:
+        if self.cancelled.is_set():
+            raise CallCancelled("call settled by another attempt")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise DeadlineExceeded("call deadline exceeded")
+
+    def on_chat_model_start(self, *args: Any, **kwargs: Any) -> None:
+        self.check()
+
+    def on_llm_start(self, *args: Any, **kwargs: Any) -> None:
+        self.check()
+
+    def on_llm_new_token(self, *args: Any, **kwargs: Any) -> None:
+        self.check()
+
+
+class _Stats:
+    def __init__(self, window: int) -> None:
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.cached = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+
+    def percentile(self, percent: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * percent / 100), len(ordered) - 1)]
+
+
+class Hedger:
+    """Runs model calls with deadlines and hedging, and tracks per-name latency and hedge stats."""
+
+    def __init__(
+        self,
+        enabled: bool = HEDGE_ENABLED,
+        percentile: float = HEDGE_PERCENTILE,
+        min_delay: float = HEDGE_MIN_DELAY_SECONDS,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        window: int = HEDGE_WINDOW,
+        max_workers: int = HEDGE_MAX_WORKERS,
+    ) -> None:
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-call")
+        self._stats: Dict[str, _Stats] = {}
+        self._lock = threading.Lock()
+
+    def hedge_delay(self, name: str) -> Optional[float]:
+        """Seconds after which a call of `name` is hedged; None until enough calls were seen."""
+        with self._lock:
+            stats = self._stats.get(name)
+            if not self.enabled or stats is None or len(stats.latencies) < self.min_samples:
+                return None
+            return max(stats.percentile(self.percentile), self.min_delay)
+
+    def call(
+        self,
+        name: str,
+        attempt: Callable[[RunnableConfig], T],
+        *,
+        validate: Callable[[T], bool] = lambda result: result is not None,
+        deadline: Optional[float] = None,
+        hedge: bool = True,
+    ) -> T:
+        """Run `attempt` and return the first result accepted by `validate`.
+
+        Args:
+            name: Kind of call; latencies and stats are tracked per name.
+            attempt: Makes one model call, passing the given config to `invoke`.
+            validate: Whether a result is a usable answer.
+            deadline: Seconds the whole call may take; None waits indefinitely.
+            hedge: Whether a duplicate attempt may be sent.
+
+        Only slowness triggers the duplicate: failed requests are already retried by the
+        transport (see `limiter`), and invalid answers are handled by the caller, which
+        evicts them from the response cache. When no attempt succeeds, the last result is
+        returned, or the last error raised.
+
+        Raises:
+            DeadlineExceeded: No valid answer arrived within `deadline` seconds.
+        """
+        started = time.monotonic()
+        deadline_at = started + deadline if deadline else None
+        hedge = hedge and self.enabled
+        hedge_after = self.hedge_delay(name) if hedge else None
+        cancelled = threading.Event()
+        config: RunnableConfig = {"callbacks": [_Cancellation(cancelled, deadline_at)]}
+        context = contextvars.copy_context()
+
+        def timed() -> Any:
+            attempt_started = time.monotonic()
+            with record_cache_hits() as hits:
+                result = attempt(config)
+            return result, time.monotonic() - attempt_started, bool(hits)
+
+        def run() -> Any:
+            return context.copy().run(timed)
+
+        pending: Dict[Future, bool] = {self._executor.submit(run): False}
+        hedged = False
+        outcome: List[Any] = []
+        error: Optional[BaseException] = None
+        with self._lock:
+            stats = self._stats.setdefault(name, _Stats(self.window))
+        try:
+            while pending:
+                now = time.monotonic()
+                timers = [deadline_at]
+                if hedge_after is not None and not hedged:
+                    timers.append(started + hedge_after)
+                timeout = min((max(timer - now, 0.0) for timer in timers if timer is not None), default=None)
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    is_hedge = pending.pop(future)
+                    try:
+                        result, seconds, cached = future.result()
+                    except CallCancelled:
+                        continue
+                    except Exception as exc:
+                        error = exc
+                        continue
+                    if validate(result):
+                        with self._lock:
+                            stats.calls += 1
+                            stats.cached += int(cached)
+                            stats.hedged += int(hedged)
+                            stats.hedge_wins += int(is_hedge)
+                            if not cached:
+                                stats.latencies.append(seconds)
+                        return result
+                    outcome = [result]
+
+                now = time.monotonic()
+                if deadline_at is not None and now >= deadline_at:
+                    with self._lock:
+                        stats.deadline_exceeded += 1
+                    raise DeadlineExceeded(f"{name}: no valid answer within {deadline:g}s")
+                if pending and hedge_after is not None and not hedged and now >= started + hedge_after:
+                    logger.info("%s: hedging after %.1fs", name, now - started)
+                    pending[self._executor.submit(run)] = True
+                    hedged = True
+        finally:
+            cancelled.set()
+        with self._lock:
+            stats.calls += 1
+            stats.hedged += int(hedged)
+        if outcome:
+            return outcome[0]
+        if error is not None:
+            raise error
+        raise CallCancelled(f"{name}: every attempt was cancelled")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hedge rate, hedge win rate and latency percentiles per call name."""
+        with self._lock:
+            report = {}
+            for name, stats in self._stats.items():
+                report[name] = {
+                    "calls": stats.calls,
+                    "cached": stats.cached,
+                    "hedged": stats.hedged,
+                    "hedge_rate": stats.hedged / stats.calls if stats.calls else 0.0,
+                    "hedge_wins": stats.hedge_wins,
+                    "win_rate": stats.hedge_wins / stats.hedged if stats.hedged else 0.0,
+                    "deadline_exceeded": stats.deadline_exceeded,
+                    "p50": stats.percentile(50) if stats.latencies else None,
+                    "p95": stats.percentile(95) if stats.latencies else None,
+                }
+            return report
+
+
+_hedger: Optional[Hedger] = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger:
+    """Return the process-wide hedger shared by every tool."""
+    global _hedger
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = Hedger()
+        return _hedger
+
+
+def hedged(
+    worker: Callable[[Any, RunnableConfig], Optional[T]],
+    name: str,
+    deadline: Optional[float] = DEFAULT_DEADLINE_SECONDS or None,
+) -> Callable[[Any], Optional[T]]:
+    """Wrap a batch worker taking `(batch, config)` for `run_batches`.
+
+    The worker must pass `config` to the agent's `invoke` and return None when the answer
+    is unusable. A batch that misses its deadline yields None, like a failed batch.
+    """
+
+    def run(batch: Any) -> Optional[T]:
+        try:
+            return get_hedger().call(name, lambda config: worker(batch, config), deadline=deadline)
+        except DeadlineExceeded as exc:
+            logger.warning("%s", exc)
+            return None
+
+    return run
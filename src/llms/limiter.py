@@ -0,0 +1,266 @@
+"""Adaptive concurrency limit and retries for requests to the model endpoint.
+
+Every model instance shares one pooled HTTP client (see `volcano.http_client`), whose
+transport sends each request through a process-wide `AdaptiveLimiter`:
+
+- at most `limit` requests are in flight across all tools and jobs;
+- the limit grows by roughly one per round of successful requests (additive increase)
+  and is cut when the endpoint throttles, times out or slows down (multiplicative decrease);
+- 429, 5xx responses and transport errors are retried with jittered exponential backoff,
+  honoring `Retry-After`.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import httpx
+from tenacity import (
+    RetryCallState,
+    Retrying,
+    retry_if_exception_type,
+    retry_if_result,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
+logger = logging.getLogger(__name__)
+
+INITIAL_LIMIT = float(os.environ.get("ARK_CONCURRENCY_INITIAL", "8"))
+MIN_LIMIT = float(os.environ.get("ARK_CONCURRENCY_MIN", "1"))
+MAX_LIMIT = float(os.environ.get("ARK_CONCURRENCY_MAX", "64"))
+# Factor applied to the limit on 429/503 or a timeout.
+THROTTLE_BACKOFF = float(os.environ.get("ARK_CONCURRENCY_BACKOFF", "0.5"))
+# Time to first byte above `LATENCY_TOLERANCE` x the baseline counts as congestion.
+LATENCY_TOLERANCE = float(os.environ.get("ARK_LATENCY_TOLERANCE", "3.0"))
+LATENCY_BACKOFF = float(os.environ.get("ARK_LATENCY_BACKOFF", "0.9"))
+
+MAX_ATTEMPTS = int(os.environ.get("ARK_RETRY_ATTEMPTS", "6"))
+RETRY_BASE_SECONDS = float(os.environ.get("ARK_RETRY_BASE_SECONDS", "1"))
+RETRY_MAX_SECONDS = float(os.environ.get("ARK_RETRY_MAX_SECONDS", "60"))
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+THROTTLE_STATUS = frozenset({429, 503})
+
+
+class AdaptiveLimiter:
+    """Concurrency limit adjusted by additive increase / multiplicative decrease (AIMD).
+
+    The latency baseline tracks the fastest recent responses: it drops immediately to a
+    faster sample and drifts slowly towards slower ones.
+    """
+
+    def __init__(
+        self,
+        initial: float = INITIAL_LIMIT,
+        minimum: float = MIN_LIMIT,
+        maximum: float = MAX_LIMIT,
+        backoff: float = THROTTLE_BACKOFF,
+        latency_tolerance: float = LATENCY_TOLERANCE,
+        latency_backoff: float = LATENCY_BACKOFF,
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.latency_backoff = latency_backoff
+        self.limit = min(max(initial, minimum), maximum)
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.decreases = 0
+        self.baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> Callable[[], None]:
+        """Block until a slot is free; returns an idempotent function releasing it."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            self.requests += 1
+        released = [False]
+
+        def release() -> None:
+            with self._cond:
+                if not released[0]:
+                    released[0] = True
+                    self.in_flight -= 1
+                    self._cond.notify()
+
+        return release
+
+    def on_success(self, latency: float) -> None:
+        with self._cond:
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            else:
+                self.baseline += (latency - self.baseline) * 0.01
+            if latency > self.baseline * self.latency_tolerance:
+                self._decrease(self.latency_backoff, f"latency {latency:.1f}s")
+                return
+            # Only grow a limit that is actually used, or it drifts up while callers idle.
+            if self.in_flight * 2 < self.limit:
+                return
+            previous = int(self.limit)
+            self.limit = min(self.limit + 1.0 / self.limit, self.maximum)
+            if int(self.limit) > previous:
+                self._cond.notify()
+
+    def on_throttle(self, reason: str) -> None:
+        with self._cond:
+            if reason == "timeout":
+                self.timeouts += 1
+            else:
+                self.throttled += 1
+            self._decrease(self.backoff, reason)
+
+    def on_retry(self) -> None:
+        with self._cond:
+            self.retries += 1
+
+    def _decrease(self, factor: float, reason: str) -> None:
+        # Requests already in flight report the same congestion; cut once per round trip.
+        now = time.monotonic()
+        if now - self._last_decrease < max(self.baseline or 0.0, 1.0):
+            return
+        self._last_decrease = now
+        self.decreases += 1
+        previous = self.limit
+        self.limit = max(self.limit * factor, self.minimum)
+        logger.info("Model concurrency limit %.1f -> %.1f (%s)", previous, self.limit, reason)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current limit and counters since start-up."""
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "timeouts": self.timeouts,
+                "decreases": self.decreases,
+                "baseline_latency": self.baseline,
+            }
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that frees its limiter slot once it is closed."""
+
+    def __init__(self, stream: Any, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            yield from self._stream
+        finally:
+            self._release()
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return float(response.headers.get("Retry-After", 0))
+    except ValueError:
+        return 0.0
+
+
+class AdaptiveTransport(httpx.BaseTransport):
+    """Transport that sends requests through an `AdaptiveLimiter` and retries failures.
+
+    After the last attempt the final response is returned as is, so the OpenAI client
+    still raises its usual errors.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        limiter: AdaptiveLimiter,
+        max_attempts: int = MAX_ATTEMPTS,
+    ) -> None:
+        self._transport = transport
+        self._limiter = limiter
+        self._max_attempts = max_attempts
+        self._backoff = wait_random_exponential(multiplier=RETRY_BASE_SECONDS, max=RETRY_MAX_SECONDS)
+
+    def _wait(self, state: RetryCallState) -> float:
+        delay = self._backoff(state)
+        if state.outcome is not None and not state.outcome.failed:
+            retry_after = _retry_after(state.outcome.result())
+            if retry_after:
+                delay = min(retry_after + random.uniform(0, RETRY_BASE_SECONDS), RETRY_MAX_SECONDS)
+        return delay
+
+    def _before_sleep(self, state: RetryCallState) -> None:
+        self._limiter.on_retry()
+        outcome = state.outcome
+        if outcome.failed:
+            reason = repr(outcome.exception())
+        else:
+            response = outcome.result()
+            reason = f"HTTP {response.status_code}"
+            response.close()
+        logger.warning("Model request attempt %s failed (%s); retrying", state.attempt_number, reason)
+
+    def _send(self, request: httpx.Request) -> httpx.Response:
+        release = self._limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = self._transport.handle_request(request)
+        except httpx.TimeoutException:
+            release()
+            self._limiter.on_throttle("timeout")
+            raise
+        except BaseException:
+            release()
+            raise
+        if response.is_closed:
+            release()
+        else:
+            response.stream = _ReleasingStream(response.stream, release)
+        if response.status_code in THROTTLE_STATUS:
+            self._limiter.on_throttle(f"HTTP {response.status_code}")
+        elif response.status_code < 400:
+            self._limiter.on_success(time.monotonic() - started)
+        return response
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        retrying = Retrying(
+            stop=stop_after_attempt(self._max_attempts),
+            wait=self._wait,
+            retry=(
+                retry_if_exception_type(httpx.TransportError)
+                | retry_if_result(lambda response: response.status_code in RETRYABLE_STATUS)
+            ),
+            before_sleep=self._before_sleep,
+            retry_error_callback=lambda state: state.outcome.result(),
+        )
+        return retrying(self._send, request)
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+_limiter: Optional[AdaptiveLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> AdaptiveLimiter:
+    """Return the process-wide limiter shared by every model request."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = AdaptiveLimiter()
+        return _limiter
@@ -1,17 +1,76 @@
 import os
+import threading
+from typing import Dict, Optional
+
+import httpx
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 
+from .cache import get_response_cache
+from .limiter import AdaptiveTransport, get_limiter
+
 # Load environment variables from .env file
 load_dotenv()
 
-def create_model(model_name: str = "deepseek-v3-2-251201") -> ChatOpenAI:
+DEFAULT_MODEL_NAME = "deepseek-v3-2-251201"
+
+# Connection pool limits for the shared HTTP client; tune via environment for high-concurrency runs.
+HTTP_MAX_CONNECTIONS = int(os.environ.get("ARK_HTTP_MAX_CONNECTIONS", "64"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("ARK_HTTP_MAX_KEEPALIVE_CONNECTIONS", "32"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("ARK_HTTP_KEEPALIVE_EXPIRY", "60"))
+# Per-attempt timeouts; retries happen in the shared transport (see `limiter`).
+REQUEST_TIMEOUT = float(os.environ.get("ARK_REQUEST_TIMEOUT", "120"))
+CONNECT_TIMEOUT = float(os.environ.get("ARK_CONNECT_TIMEOUT", "10"))
+
+_lock = threading.RLock()
+_http_client: Optional[httpx.Client] = None
+_models: Dict[str, ChatOpenAI] = {}
+
+
+def http_client() -> httpx.Client:
+    """Return the process-wide pooled HTTP client shared by every model instance.
+
+    Its transport applies the adaptive concurrency limit and retries of `limiter`.
+    """
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            pool = httpx.HTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                ),
+            )
+            _http_client = httpx.Client(
+                transport=AdaptiveTransport(pool, get_limiter()),
+                timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+            )
+        return _http_client
+
+
+def create_model(model_name: str = DEFAULT_MODEL_NAME, cache: bool = True) -> ChatOpenAI:
+    """Create an Ark-backed chat model; `cache=False` bypasses the persistent response cache."""
     if ChatOpenAI is None:
         raise ImportError("ChatOpenAI is not available; ensure langchain and openai extras are installed.")
 
     return ChatOpenAI(
         openai_api_key=os.environ.get("ARK_API_KEY"),
-        openai_api_base="https://ark.cn-beijing.volces.com/api/v3",   
+        openai_api_base="https://ark.cn-beijing.volces.com/api/v3",
         model=model_name,
         streaming=True,
+        http_client=http_client(),
+        # Retrying in the OpenAI client too would multiply the attempts per call.
+        max_retries=0,
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+        cache=(get_response_cache() if cache else None) or False,
     )
+
+
+def get_model(model_name: str = DEFAULT_MODEL_NAME) -> ChatOpenAI:
+    """Return the cached model for `model_name`, creating it on first use."""
+    with _lock:
+        model = _models.get(model_name)
+        if model is None:
+            model = _models[model_name] = create_model(model_name)
+        return model
@@ -0,0 +1,39 @@
+"""Persistent LangGraph checkpointer so agent runs can be resumed by thread id."""
+
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).resolve().parents[1] / "files" / ".cache"
+DEFAULT_CHECKPOINT_PATH = Path(os.environ.get("CHECKPOINT_PATH", CACHE_DIR / "checkpoints.sqlite"))
+
+_checkpointer: Optional[Any] = None
+_lock = threading.Lock()
+
+
+def get_checkpointer() -> Any:
+    """Return the process-wide SQLite checkpointer, creating its database on first use.
+
+    Falls back to an in-memory saver (runs then only resume within the same process)
+    when `langgraph-checkpoint-sqlite` is not installed.
+    """
+    global _checkpointer
+    with _lock:
+        if _checkpointer is None:
+            try:
+                from langgraph.checkpoint.sqlite import SqliteSaver
+            except ImportError:
+                from langgraph.checkpoint.memory import InMemorySaver
+
+                logger.warning("langgraph-checkpoint-sqlite is not installed; checkpoints are kept in memory.")
+                _checkpointer = InMemorySaver()
+            else:
+                DEFAULT_CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(DEFAULT_CHECKPOINT_PATH), check_same_thread=False)
+                _checkpointer = SqliteSaver(conn)
+        return _checkpointer
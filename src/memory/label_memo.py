@@ -0,0 +1,78 @@
+"""Persistent memo of labels produced for a normalized text under a given task."""
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+CACHE_DIR = Path(__file__).resolve().parents[1] / "files" / ".cache"
+DEFAULT_MEMO_PATH = Path(os.environ.get("LABEL_MEMO_PATH", CACHE_DIR / "label_memo.sqlite"))
+
+
+def memo_enabled() -> bool:
+    """Whether label memoization is switched on (set `LABEL_MEMO_DISABLED=1` to bypass it)."""
+    return os.environ.get("LABEL_MEMO_DISABLED", "").lower() not in {"1", "true", "yes"}
+
+
+class LabelMemo:
+    """SQLite-backed mapping of (task key, text key) to the JSON-encoded labels."""
+
+    def __init__(self, path: Path = DEFAULT_MEMO_PATH) -> None:
+        self.path = Path(path).expanduser()
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS labels ("
+            " task TEXT NOT NULL,"
+            " text_key TEXT NOT NULL,"
+            " labels TEXT NOT NULL,"
+            " PRIMARY KEY (task, text_key))"
+        )
+        self._conn.commit()
+
+    def get_many(self, task: str, text_keys: Iterable[str]) -> Dict[str, Any]:
+        """Return the memoized labels for every known key of `task`."""
+        found: Dict[str, Any] = {}
+        keys = list(text_keys)
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_key, labels FROM labels WHERE task = ? AND text_key IN ({placeholders})",
+                    (task, *chunk),
+                ).fetchall()
+                for text_key, labels in rows:
+                    found[text_key] = json.loads(labels)
+        return found
+
+    def put_many(self, task: str, items: Mapping[str, Any]) -> None:
+        """Store labels for `task`, replacing previous entries for the same keys."""
+        rows: Iterable[Tuple[str, str, str]] = [
+            (task, text_key, json.dumps(labels, ensure_ascii=False)) for text_key, labels in items.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO labels (task, text_key, labels) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+
+_memo: Optional[LabelMemo] = None
+_memo_lock = threading.Lock()
+
+
+def get_label_memo() -> Optional[LabelMemo]:
+    """Return the process-wide label memo, or None when it is bypassed."""
+    global _memo
+    if not memo_enabled():
+        return None
+    with _memo_lock:
+        if _memo is None:
+            _memo = LabelMemo()
+        return _memo
@@ -0,0 +1,136 @@
+"""Batch-level progress of long-running tools: records scoped to a resumable run, and live callbacks."""
+
+import contextlib
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+CACHE_DIR = Path(__file__).resolve().parents[1] / "files" / ".cache"
+DEFAULT_PROGRESS_PATH = Path(os.environ.get("PROGRESS_PATH", CACHE_DIR / "progress.sqlite"))
+# Records of runs that never finished are dropped after this long.
+DEFAULT_MAX_AGE_SECONDS = float(os.environ.get("PROGRESS_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+# Pruning scans the table, so only run it every N writes.
+PRUNE_EVERY_N_WRITES = 256
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+_current_run_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("run_id", default=None)
+_progress_callback: contextvars.ContextVar[Optional[ProgressCallback]] = contextvars.ContextVar(
+    "progress_callback", default=None
+)
+
+
+def current_run_id() -> Optional[str]:
+    """Thread id of the run being executed, or None outside a resumable run."""
+    return _current_run_id.get()
+
+
+@contextlib.contextmanager
+def run_scope(run_id: str) -> Iterator[str]:
+    """Mark code executed inside the block as part of run `run_id`."""
+    token = _current_run_id.set(run_id)
+    try:
+        yield run_id
+    finally:
+        _current_run_id.reset(token)
+
+
+def current_progress_callback() -> Optional[ProgressCallback]:
+    """Callback receiving progress events of the code being executed, if any."""
+    return _progress_callback.get()
+
+
+@contextlib.contextmanager
+def progress_scope(callback: ProgressCallback) -> Iterator[ProgressCallback]:
+    """Send progress events emitted inside the block (e.g. by `run_batches`) to `callback`.
+
+    The callback may be called from worker threads and must be thread-safe.
+    """
+    token = _progress_callback.set(callback)
+    try:
+        yield callback
+    finally:
+        _progress_callback.reset(token)
+
+
+class ProgressStore:
+    """SQLite table of finished batch results keyed by (run id, batch key).
+
+    A run's records are cleared once it completes (see `clear`); records of runs that
+    were never completed expire after `max_age_seconds`.
+    """
+
+    def __init__(self, path: Path = DEFAULT_PROGRESS_PATH, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS) -> None:
+        self.path = Path(path).expanduser()
+        self.max_age_seconds = max_age_seconds
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS batches ("
+            " run_id TEXT NOT NULL,"
+            " batch_key TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " created_at REAL NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (run_id, batch_key))"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(batches)")}
+        if "created_at" not in columns:
+            self._conn.execute("ALTER TABLE batches ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+            # Existing records start their expiry now, so interrupted runs stay resumable.
+            self._conn.execute("UPDATE batches SET created_at = ?", (time.time(),))
+        self._conn.commit()
+        self.prune()
+
+    def get(self, run_id: str, batch_key: str) -> Optional[Any]:
+        """Return the recorded result of a finished batch, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM batches WHERE run_id = ? AND batch_key = ?", (run_id, batch_key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, run_id: str, batch_key: str, result: Any) -> None:
+        """Record the result of a finished batch."""
+        payload = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO batches (run_id, batch_key, result, created_at) VALUES (?, ?, ?, ?)",
+                (run_id, batch_key, payload, time.time()),
+            )
+            self._conn.commit()
+            self._writes += 1
+        if self._writes % PRUNE_EVERY_N_WRITES == 0:
+            self.prune()
+
+    def clear(self, run_id: str) -> None:
+        """Forget every batch recorded for `run_id`."""
+        with self._lock:
+            self._conn.execute("DELETE FROM batches WHERE run_id = ?", (run_id,))
+            self._conn.commit()
+
+    def prune(self) -> None:
+        """Drop records older than `max_age_seconds`, left behind by runs never completed."""
+        with self._lock:
+            self._conn.execute("DELETE FROM batches WHERE created_at < ?", (time.time() - self.max_age_seconds,))
+            self._conn.commit()
+
+
+_store: Optional[ProgressStore] = None
+_store_lock = threading.Lock()
+
+
+def get_progress_store() -> ProgressStore:
+    """Return the process-wide progress store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProgressStore()
+        return _store
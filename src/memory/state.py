@@ -1,8 +1,143 @@
-"""Agent state helpers (placeholder)."""
+"""Run-scoped agent state, including a cache of parsed datasets shared by file-backed tools."""
 
-from typing import Any, Dict, Optional
+import contextlib
+import contextvars
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from .progress import current_run_id, run_scope
+
+logger = logging.getLogger(__name__)
+
+# Parsed JSON takes several times its on-disk size in Python objects.
+DATASET_MEMORY_FACTOR = float(os.environ.get("RUN_STATE_MEMORY_FACTOR", "6"))
+DEFAULT_MAX_BYTES = int(os.environ.get("RUN_STATE_MAX_BYTES", str(512 * 1024 * 1024)))
+# zstd shrinks comment JSON several times over; scale compressed sizes back up.
+COMPRESSED_SIZE_FACTOR = float(os.environ.get("RUN_STATE_COMPRESSED_FACTOR", "5"))
+
+_read_roots: contextvars.ContextVar[Optional[Tuple[Path, ...]]] = contextvars.ContextVar("read_roots", default=None)
 
 
 def init_state(initial: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Create a new mutable state dict for the agent run."""
     return dict(initial or {})
+
+
+def _parse(path: Path) -> Any:
+    # Imported here: `tools.file_storage` itself depends on this module.
+    from ..tools import artifact_codec
+
+    return artifact_codec.read_artifact(path)
+
+
+def _estimated_size(path: Path, size: int) -> int:
+    if path.suffix.lower() == ".zst":
+        size = int(size * COMPRESSED_SIZE_FACTOR)
+    return int(size * DATASET_MEMORY_FACTOR)
+
+
+class DatasetCache:
+    """LRU of parsed files keyed by path, mtime and size, bounded by estimated memory."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, int, int], Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def load(self, file_path: str) -> Any:
+        """Return the parsed content of a JSON or JSON Lines artifact, parsing it at most once per version.
+
+        The returned object is shared between callers and must be treated as read-only.
+        """
+        path = readable_path(file_path)
+        if not path.exists():
+            raise FileNotFoundError(f"input file not found: {path}")
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        data = _parse(path)
+        cost = _estimated_size(path, stat.st_size)
+        if cost > self.max_bytes:
+            logger.info("Not caching %s: estimated %s bytes exceeds the %s byte cap", path, cost, self.max_bytes)
+            return data
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (data, cost)
+                self._bytes += cost
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+        return data
+
+
+class RunState:
+    """State shared by every tool call of one run."""
+
+    def __init__(self, run_id: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.run_id = run_id
+        self.datasets = DatasetCache(max_bytes)
+        self.values: Dict[str, Any] = init_state()
+
+
+_states: Dict[Optional[str], RunState] = {}
+_states_lock = threading.Lock()
+
+
+def get_run_state() -> RunState:
+    """Return the state of the current run (see `run_context`), or the process-wide default."""
+    run_id = current_run_id()
+    with _states_lock:
+        state = _states.get(run_id)
+        if state is None:
+            state = _states[run_id] = RunState(run_id)
+        return state
+
+
+@contextlib.contextmanager
+def run_context(run_id: str) -> Iterator[RunState]:
+    """Scope tool calls to run `run_id` and release its state when the block exits."""
+    with run_scope(run_id):
+        try:
+            yield get_run_state()
+        finally:
+            with _states_lock:
+                _states.pop(run_id, None)
+
+
+@contextlib.contextmanager
+def read_roots_scope(roots: Iterable[Path]) -> Iterator[Tuple[Path, ...]]:
+    """Only let tools read files under `roots` inside the block (e.g. for API jobs)."""
+    token = _read_roots.set(tuple(Path(root).expanduser().resolve() for root in roots))
+    try:
+        yield _read_roots.get()
+    finally:
+        _read_roots.reset(token)
+
+
+def readable_path(file_path: str) -> Path:
+    """Resolve a path a tool is about to read; PermissionError outside the `read_roots_scope` roots."""
+    path = Path(file_path).expanduser().resolve()
+    roots = _read_roots.get()
+    if roots is not None and not any(path.is_relative_to(root) for root in roots):
+        raise PermissionError(f"reading {path} is not allowed; files must be inside: {', '.join(map(str, roots))}")
+    return path
+
+
+def load_dataset(file_path: str) -> Any:
+    """Parse a JSON / JSON Lines file through the current run's dataset cache."""
+    return get_run_state().datasets.load(file_path)
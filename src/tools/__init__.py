@@ -1,8 +1,17 @@
 # Tool implementations for the LangGraph agent (planning, cleaning, sentiment, plotting, etc.).
 
 from .file_storage import read_text_file, write_text_file
-from .plot_draw import bar_chart, heap_map, pie_chart
-from .statistics import Order, invert_index, sort_by_len
+from .plot_draw import bar_chart, heap_map, pie_chart, render_charts
+from .statistics import (
+    Order,
+    count_elements_file,
+    invert_index,
+    invert_index_file,
+    report_metrics_tool,
+    sort_by_len,
+    sort_by_len_file,
+    sort_by_val_file,
+)
 
 __all__ = [
     "read_text_file",
@@ -10,7 +19,13 @@ __all__ = [
     "heap_map",
     "bar_chart",
     "pie_chart",
+    "render_charts",
     "invert_index",
     "sort_by_len",
+    "invert_index_file",
+    "sort_by_len_file",
+    "sort_by_val_file",
+    "count_elements_file",
+    "report_metrics_tool",
     "Order",
 ]
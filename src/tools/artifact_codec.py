@@ -0,0 +1,121 @@
+"""Encoding of intermediate artifacts: orjson, with optional zstd compression chosen by extension.
+
+- `.json`: one JSON document.
+- `.jsonl`: one JSON document per line.
+- a trailing `.zst` (`.json.zst`, `.jsonl.zst`) compresses either format with zstd.
+
+Any other extension is treated as `.json`.
+"""
+
+import io
+import os
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Union
+
+import orjson
+
+COMPRESSED_SUFFIX = ".zst"
+ZSTD_LEVEL = int(os.environ.get("ARTIFACT_ZSTD_LEVEL", "3"))
+# Suffix of artifacts written to generated paths; ".json.zst" compresses them.
+ARTIFACT_SUFFIX = os.environ.get("ARTIFACT_SUFFIX", ".json")
+JSONL_SUFFIX = ".jsonl.zst" if ARTIFACT_SUFFIX.endswith(COMPRESSED_SUFFIX) else ".jsonl"
+
+PathLike = Union[str, Path]
+
+
+def _zstd() -> Any:
+    import zstandard
+
+    return zstandard
+
+
+def is_compressed(file_path: PathLike) -> bool:
+    """Whether the path names a zstd-compressed artifact."""
+    return Path(file_path).suffix.lower() == COMPRESSED_SUFFIX
+
+
+def format_suffix(file_path: PathLike) -> str:
+    """Suffix of the JSON format of the path, ignoring compression, e.g. `.jsonl` for `a.jsonl.zst`."""
+    path = Path(file_path)
+    if is_compressed(path):
+        path = path.with_suffix("")
+    return path.suffix.lower()
+
+
+def dumps(payload: Any, indent: bool = False) -> bytes:
+    """Encode `payload` as UTF-8 JSON; non-ASCII text is kept as is and NumPy values are accepted."""
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+    return orjson.dumps(payload, option=option)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document."""
+    return orjson.loads(data)
+
+
+def compress(data: bytes) -> bytes:
+    """Compress `data` into one zstd frame."""
+    return _zstd().ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+
+def read_bytes(file_path: PathLike) -> bytes:
+    """Read a file, decompressing every zstd frame of `.zst` files."""
+    path = Path(file_path).expanduser()
+    if not is_compressed(path):
+        return path.read_bytes()
+    with path.open("rb") as fp:
+        # Appended JSON Lines artifacts hold one frame per append.
+        return _zstd().ZstdDecompressor().stream_reader(fp, read_across_frames=True).read()
+
+
+def write_bytes(file_path: PathLike, data: bytes) -> None:
+    """Write `data`, compressing it for `.zst` paths."""
+    path = Path(file_path).expanduser()
+    path.write_bytes(compress(data) if is_compressed(path) else data)
+
+
+def encode(payload: Any, file_path: PathLike) -> bytes:
+    """Serialize `payload` in the format named by `file_path`, before compression."""
+    if format_suffix(file_path) == ".jsonl":
+        return b"".join(dumps(record) + b"\n" for record in payload)
+    return dumps(payload)
+
+
+def read_artifact(file_path: PathLike) -> Any:
+    """Parse a whole artifact; JSON Lines files are returned as a list of records."""
+    if format_suffix(file_path) == ".jsonl":
+        return list(iter_lines(file_path))
+    return loads(read_bytes(file_path))
+
+
+def write_artifact(payload: Any, file_path: PathLike) -> None:
+    """Write `payload` in the format named by `file_path`."""
+    write_bytes(file_path, encode(payload, file_path))
+
+
+def iter_lines(file_path: PathLike) -> Iterator[Any]:
+    """Yield the records of a (possibly compressed) JSON Lines file one line at a time."""
+    path = Path(file_path).expanduser()
+    with path.open("rb") as raw:
+        fp: Any = raw
+        if is_compressed(path):
+            fp = io.BufferedReader(_zstd().ZstdDecompressor().stream_reader(raw, read_across_frames=True))
+        for line_no, line in enumerate(fp, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield loads(line)
+            except orjson.JSONDecodeError as exc:
+                raise ValueError(f"{path}:{line_no}: invalid JSON line: {exc}") from exc
+
+
+def append_lines(file_path: PathLike, records: Iterable[Any]) -> None:
+    """Append records to a JSON Lines file; `.zst` files get one new zstd frame per call."""
+    path = Path(file_path).expanduser()
+    data = b"".join(dumps(record) + b"\n" for record in records)
+    if not data:
+        return
+    with path.open("ab") as fp:
+        fp.write(compress(data) if is_compressed(path) else data)
+        fp.flush()
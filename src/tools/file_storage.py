@@ -1,13 +1,21 @@
 """Utility functions for persisting and retrieving string files."""
 
+import logging
+import os
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Iterator, List, Optional, Sequence
 
 from langchain_core.tools import tool
 
+from . import artifact_codec
+from ..memory.state import load_dataset, readable_path
+
+logger = logging.getLogger(__name__)
 
 FILES_DIR = Path(__file__).resolve().parents[1] / "files"
+# Records read from disk and processed together when streaming JSON Lines.
+STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", "1000"))
 
 
 def _ensure_files_dir() -> Path:
@@ -21,12 +29,12 @@ def read_text_file(file_path: str) -> str:
     """Agent tool: read text content from the provided path.
 
     Args:
-        file_path: Absolute or relative path to the text file to read.
+        file_path: Absolute or relative path to the text file to read; `.zst` files are decompressed.
     """
-    path = Path(file_path).expanduser()
+    path = readable_path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"input file not found: {path}")
-    return path.read_text(encoding="utf-8")
+    return artifact_codec.read_bytes(path).decode("utf-8")
 
 
 @tool
@@ -36,6 +44,7 @@ def write_text_file(content: str, file_path: Optional[str] = None) -> str:
     Args:
         content: Text content to persist.
         file_path: Optional path to write to; when omitted a new file path is generated in `files/`.
+            `.zst` paths are compressed.
     """
     if file_path:
         path = Path(file_path).expanduser()
@@ -44,5 +53,106 @@ def write_text_file(content: str, file_path: Optional[str] = None) -> str:
         file_id = uuid.uuid4().hex
         path = files_dir / f"{file_id}.txt"
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
+    artifact_codec.write_bytes(path, content.encode("utf-8"))
+    return str(path)
+
+
+def is_jsonl(file_path: Optional[str]) -> bool:
+    """Whether the path names a JSON Lines file, compressed or not."""
+    return bool(file_path) and artifact_codec.format_suffix(file_path) == ".jsonl"
+
+
+def resolve_output_path(file_path: Optional[str], suffix: str = ".txt") -> Path:
+    """Return `file_path`, or a new path in `files/` with the given suffix when omitted."""
+    if file_path:
+        path = Path(file_path).expanduser()
+    else:
+        path = _ensure_files_dir() / f"{uuid.uuid4().hex}{suffix}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def iter_records(file_path: str) -> Iterator[Any]:
+    """Yield records from a JSON Lines file one line at a time, or from a JSON array file.
+
+    JSON array files are parsed through the run's dataset cache, see `memory.state`.
+    """
+    path = readable_path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"input file not found: {path}")
+    if not is_jsonl(file_path):
+        yield from load_dataset(file_path)
+        return
+    yield from artifact_codec.iter_lines(path)
+
+
+def iter_record_chunks(file_path: str, size: int = STREAM_CHUNK_SIZE) -> Iterator[List[Any]]:
+    """Group `iter_records` into lists of at most `size` records."""
+    chunk: List[Any] = []
+    for record in iter_records(file_path):
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def append_records(file_path: Path, records: Sequence[Any]) -> None:
+    """Append records as JSON Lines and flush, so readers can tail the file mid-run."""
+    artifact_codec.append_lines(file_path, records)
+
+
+def write_json_file(payload: Any, file_path: Optional[str] = None) -> str:
+    """Write a JSON artifact in the format named by its extension, see `artifact_codec`.
+
+    Args:
+        payload: JSON-serializable value; JSON Lines paths expect a sequence of records.
+        file_path: Optional path to write to; when omitted a new `ARTIFACT_SUFFIX` file is generated in `files/`.
+
+    Returns:
+        The output file path.
+    """
+    path = resolve_output_path(file_path, suffix=artifact_codec.ARTIFACT_SUFFIX)
+    artifact_codec.write_artifact(payload, path)
+    return str(path)
+
+
+def _with_jsonl_suffix(path: Path) -> Path:
+    if artifact_codec.is_compressed(path):
+        return path.with_suffix("").with_suffix(".jsonl" + artifact_codec.COMPRESSED_SUFFIX)
+    return path.with_suffix(".jsonl")
+
+
+def stream_records(
+    input_file_path: str,
+    output_file_path: Optional[str],
+    transform: Callable[[List[Any]], Sequence[Any]],
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> str:
+    """Transform an input file chunk by chunk, appending each chunk's output as JSON Lines.
+
+    Args:
+        input_file_path: JSON Lines (streamed) or JSON array input file.
+        output_file_path: JSON Lines output path; a new `JSONL_SUFFIX` file in `files/` when omitted.
+            Any other suffix is replaced by `.jsonl` (keeping `.zst`), e.g. `out.json` -> `out.jsonl`.
+        transform: Maps a chunk of input records to the output records to append.
+        chunk_size: Number of input records held in memory at a time.
+
+    Returns:
+        The output file path, which differs from `output_file_path` when its suffix was replaced.
+    """
+    if output_file_path and not is_jsonl(output_file_path):
+        requested = output_file_path
+        output_file_path = str(_with_jsonl_suffix(Path(output_file_path).expanduser()))
+        logger.warning("Streamed output is JSON Lines; writing %s instead of %s", output_file_path, requested)
+    path = resolve_output_path(output_file_path, suffix=artifact_codec.JSONL_SUFFIX)
+    # Start from an empty file so a rerun does not append to stale results.
+    path.write_bytes(b"")
+    total = 0
+    for chunk in iter_record_chunks(input_file_path, chunk_size):
+        outputs = transform(chunk)
+        append_records(path, outputs)
+        total += len(chunk)
+        logger.info("Streamed %s records from %s into %s", total, input_file_path, path)
     return str(path)
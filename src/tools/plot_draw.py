@@ -2,18 +2,50 @@
 
 from __future__ import annotations
 
+import atexit
+import functools
+import heapq
 import json
+import logging
+import multiprocessing
+import os
+import re
+import threading
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
-
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend to avoid GUI thread issues
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
+import xxhash
 from langchain_core.tools import tool
 
+from . import svg_charts
+from ..memory.state import load_dataset
+
+
+logger = logging.getLogger(__name__)
 
 PLOTS_DIR = Path(__file__).resolve().parents[1] / "files"
+# Worker processes of `render_charts`; 0 or 1 renders in the calling process.
+PLOT_POOL_WORKERS = int(os.environ.get("PLOT_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+# "spawn" keeps workers independent of the threads of the calling process.
+PLOT_POOL_START_METHOD = os.environ.get("PLOT_POOL_START_METHOD", "spawn")
+# Charts saved under generated names are named by content hash and reused; the least
+# recently used ones beyond this count are deleted.
+PLOT_CACHE_MAX_FILES = int(os.environ.get("PLOT_CACHE_MAX_FILES", "256"))
+_CACHED_CHART_NAME = re.compile(r"^(?:bar|pie|heatmap)-[0-9a-f]{32}\.(?:png|svg)$")
+# Draw simple charts as SVG without matplotlib when no output path asks for another format.
+PLOT_NATIVE_SVG = os.environ.get("PLOT_NATIVE_SVG", "1").lower() not in {"0", "false", "no"}
+
+OTHER_LABEL = "其他"
+# Categories drawn per chart by default; the tail is merged into OTHER_LABEL (bar, pie) or
+# dropped (heat map, whose values need not be additive).
+DEFAULT_TOP_N = {
+    "bar": int(os.environ.get("PLOT_BAR_TOP_N", "20")),
+    "pie": int(os.environ.get("PLOT_PIE_TOP_N", "8")),
+    "heatmap": int(os.environ.get("PLOT_HEATMAP_TOP_N", "30")),
+}
 
 # Global matplotlib configuration for Chinese character support
 MATPLOTLIB_CHINESE_CONFIG = {
@@ -24,24 +56,51 @@ MATPLOTLIB_CHINESE_CONFIG = {
 }
 
 
-def _ensure_output_path(output_path: Optional[str], prefix: str) -> Path:
-    """Resolve an output path, generating one inside the repo's files/ directory when omitted."""
+def _ensure_output_path(output_path: Optional[str], prefix: str, key: str, suffix: str = ".png") -> Path:
+    """Resolve an output path, generating `<prefix>-<key><suffix>` inside the repo's files/ directory when omitted."""
     if output_path:
         path = Path(output_path).expanduser()
     else:
-        filename = f"{prefix}-{uuid.uuid4().hex}.png"
+        filename = f"{prefix}-{key}{suffix}"
         path = PLOTS_DIR / filename
     path.parent.mkdir(parents=True, exist_ok=True)
     return path
 
 
+def _chart_key(kind: str, labels: List[str], values: List[float], options: Dict[str, Any]) -> str:
+    """Hash of everything that affects a chart's pixels."""
+    payload = json.dumps([kind, labels, values, options], ensure_ascii=False, sort_keys=True, default=repr)
+    return xxhash.xxh3_128_hexdigest(payload)
+
+
+def _evict_charts() -> None:
+    """Delete the least recently used cached charts beyond `PLOT_CACHE_MAX_FILES`."""
+    if not PLOTS_DIR.exists():
+        return
+    cached = []
+    for entry in os.scandir(PLOTS_DIR):
+        if _CACHED_CHART_NAME.match(entry.name):
+            try:
+                cached.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                continue
+    if len(cached) <= PLOT_CACHE_MAX_FILES:
+        return
+    cached.sort()
+    for _, stale in cached[: len(cached) - PLOT_CACHE_MAX_FILES]:
+        try:
+            os.remove(stale)
+        except FileNotFoundError:
+            pass
+
+
 def _load_mapping_from_file(data_file: str) -> Dict[str, float]:
     """Load a label->numeric mapping from a JSON file."""
     path = Path(data_file).expanduser()
     if not path.exists():
         raise FileNotFoundError(f"data file not found: {path}")
     try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
+        payload = load_dataset(str(path))
     except json.JSONDecodeError as exc:
         raise ValueError(f"data_file must contain a JSON object: {exc}") from exc
     if not isinstance(payload, dict):
@@ -62,8 +121,17 @@ def _normalize_series(
     data_file: Optional[str] = None,
     labels: Optional[Sequence[str]] = None,
     values: Optional[Sequence[float]] = None,
+    top_n: Optional[int] = None,
+    other_label: Optional[str] = OTHER_LABEL,
 ) -> Tuple[List[str], List[float]]:
-    """Normalize mapping or parallel sequences into label/value lists."""
+    """Normalize mapping or parallel sequences into label/value lists.
+
+    With `top_n`, only the `top_n` largest values are kept, in their original order, and
+    the rest are summed into a trailing `other_label` entry (counted within `top_n`, so
+    `top_n=1` keeps only that entry), or dropped when `other_label` is None. An input entry
+    already named `other_label` is merged into that trailing entry rather than duplicated.
+    Selection is O(n log top_n).
+    """
     if data_file is None and (labels is None or values is None):
         raise ValueError("provide either `data_file` path or both `labels` and `values`")
     if data_file is not None:
@@ -77,40 +145,100 @@ def _normalize_series(
             raise ValueError("`labels` and `values` must have the same length")
     if not labels_list:
         raise ValueError("no data provided for plotting")
-    return labels_list, values_list
+    if top_n is None or top_n <= 0 or len(labels_list) <= top_n:
+        return labels_list, values_list
+
+    slots = top_n - 1 if other_label is not None else top_n
+    candidates = [index for index, label in enumerate(labels_list) if label != other_label]
+    keep = sorted(heapq.nlargest(slots, candidates, key=values_list.__getitem__))
+    kept_labels = [labels_list[index] for index in keep]
+    kept_values = [values_list[index] for index in keep]
+    if other_label is not None:
+        kept_labels.append(other_label)
+        kept_values.append(sum(values_list) - sum(kept_values))
+    return kept_labels, kept_values
+
+
+def _fit_figsize(kind: str, count: int, figsize: Optional[Sequence[float]]) -> Tuple[float, float]:
+    """Use `figsize` when given, else widen bar charts and heat maps with their category count."""
+    if figsize is not None:
+        return float(figsize[0]), float(figsize[1])
+    if kind == "bar":
+        return min(max(8.0, 0.5 * count + 2.0), 24.0), 4.0
+    if kind == "heatmap":
+        return min(max(10.0, 0.6 * count + 2.0), 30.0), 1.6
+    return 6.0, 6.0
+
+
+def _series(
+    kind: str,
+    figsize: Optional[Sequence[float]],
+    top_n: Optional[int],
+    data_file: Optional[str] = None,
+    labels: Optional[Sequence[str]] = None,
+    values: Optional[Sequence[float]] = None,
+) -> Tuple[List[str], List[float], Tuple[float, float]]:
+    """Labels, values and figure size of a chart of `kind`, bounded to its top categories."""
+    series_labels, series_values = _normalize_series(
+        data_file=data_file,
+        labels=labels,
+        values=values,
+        top_n=DEFAULT_TOP_N[kind] if top_n is None else top_n,
+        other_label=None if kind == "heatmap" else OTHER_LABEL,
+    )
+    return series_labels, series_values, _fit_figsize(kind, len(series_labels), figsize)
 
 
-@tool
-def heap_map(
-    data_file: str,
+_configured = False
+
+
+def _pyplot(name: str) -> Any:
+    """Import pyplot on first use, applying the CJK font configuration once per process."""
+    global _configured
+    try:
+        import matplotlib
+        matplotlib.use('Agg')  # Use non-interactive backend to avoid GUI thread issues
+        import matplotlib.pyplot as plt
+    except ImportError as exc:
+        raise ImportError(f"matplotlib is required for {name}") from exc
+    if not _configured:
+        # Configure matplotlib for Chinese character support
+        plt.rcParams.update(MATPLOTLIB_CHINESE_CONFIG)
+        _configured = True
+    return plt
+
+
+def _bar_color(color: Any) -> Any:
+    """Normalize `color` into a proper matplotlib color value."""
+    if color is None:
+        return None
+    if isinstance(color, str):
+        return color
+    if hasattr(color, '__iter__') and not isinstance(color, (str, bytes)):
+        try:
+            return list(color)
+        except TypeError:
+            return None
+    # Handle invalid color types (like ValidatorIterator)
+    return None
+
+
+def _draw_heat_map(
+    labels: List[str],
+    values: List[float],
+    path: Path,
     *,
     title: Optional[str] = None,
     cmap: str = "Blues",
     figsize: Tuple[float, float] = (10.0, 1.6),
-    output_path: Optional[str] = None,
     **imshow_kwargs,
 ) -> str:
-    """
-    Plot a simple heat map for term frequencies and return the saved image path.
-
-    Args:
-        data_file: Path to a JSON file containing a mapping of label -> count (Dict[str, int]).
-        title: Optional chart title.
-        cmap: Matplotlib colormap name for the heat map, default is "Blues".
-        figsize: Figure size passed to matplotlib, default is (10.0, 1.6).
-        output_path: Optional path to save the image; when omitted, saves to files/.
-        **imshow_kwargs: Forwarded to `Axes.imshow` for flexibility.
-    """
+    plt = _pyplot("heap_map")
     try:
-        import matplotlib.pyplot as plt
         import numpy as np
     except ImportError as exc:
-        raise ImportError("matplotlib is required for heap_map") from exc
-
-    # Configure matplotlib for Chinese character support
-    plt.rcParams.update(MATPLOTLIB_CHINESE_CONFIG)
+        raise ImportError("numpy is required for heap_map") from exc
 
-    labels, values = _normalize_series(data_file=data_file)
     matrix = np.array([values])
 
     fig, ax = plt.subplots(figsize=figsize)
@@ -127,62 +255,29 @@ def heap_map(
         ax.set_title(title)
     fig.colorbar(im, ax=ax, orientation="vertical", shrink=0.8, pad=0.02)
 
-    path = _ensure_output_path(output_path, prefix="heatmap")
     fig.tight_layout()
     fig.savefig(path, bbox_inches="tight")
     plt.close(fig)
     return str(path)
 
 
-@tool
-def bar_chart(
-    data_file: Optional[str] = None,
+def _draw_bar_chart(
+    labels: List[str],
+    values: List[float],
+    path: Path,
     *,
-    labels: Optional[Iterable[str]] = None,
-    values: Optional[Iterable[float]] = None,
     title: Optional[str] = None,
     xlabel: Optional[str] = None,
     ylabel: Optional[str] = None,
-    color: Optional[Iterable[str]] = None,
+    color: Any = None,
     figsize: Tuple[float, float] = (8.0, 4.0),
     rotation: float = 30.0,
-    output_path: Optional[str] = None,
     **bar_kwargs,
 ) -> str:
-    """
-    Draw a bar chart and return the saved image path.
-
-    Args mirror matplotlib's bar-related options where possible, forwarding extras
-    via **bar_kwargs to `Axes.bar`. Provide either `data_file` (JSON object mapping
-    labels to numbers) or both `labels` and `values`.
-    """
-    try:
-        import matplotlib.pyplot as plt
-    except ImportError as exc:
-        raise ImportError("matplotlib is required for bar_chart") from exc
-
-    # Configure matplotlib for Chinese character support
-    plt.rcParams.update(MATPLOTLIB_CHINESE_CONFIG)
-
-    x_labels, y_values = _normalize_series(data_file=data_file, labels=labels, values=values)
+    plt = _pyplot("bar_chart")
 
     fig, ax = plt.subplots(figsize=figsize)
-
-    # Handle color parameter - ensure it's a proper matplotlib color value
-    if color is None:
-        bar_color = None
-    elif isinstance(color, str):
-        bar_color = color
-    elif hasattr(color, '__iter__') and not isinstance(color, (str, bytes)):
-        try:
-            bar_color = list(color)
-        except TypeError:
-            bar_color = None
-    else:
-        # Handle invalid color types (like ValidatorIterator)
-        bar_color = None
-
-    ax.bar(x_labels, y_values, color=bar_color, **bar_kwargs)
+    ax.bar(labels, values, color=_bar_color(color), **bar_kwargs)
 
     if title:
         ax.set_title(title)
@@ -193,47 +288,29 @@ def bar_chart(
 
     ax.tick_params(axis="x", labelrotation=rotation)
 
-    path = _ensure_output_path(output_path, prefix="bar")
     fig.tight_layout()
     fig.savefig(path, bbox_inches="tight")
     plt.close(fig)
     return str(path)
 
 
-@tool
-def pie_chart(
-    data_file: Optional[str] = None,
+def _draw_pie_chart(
+    labels: List[str],
+    values: List[float],
+    path: Path,
     *,
-    labels: Optional[Iterable[str]] = None,
-    values: Optional[Iterable[float]] = None,
     title: Optional[str] = None,
     autopct: str = "%.1f%%",
     startangle: float = 90.0,
     figsize: Tuple[float, float] = (6.0, 6.0),
-    output_path: Optional[str] = None,
     **pie_kwargs,
 ) -> str:
-    """
-    Draw a pie chart and return the saved image path.
-
-    Args mirror matplotlib's pie options where possible, forwarding extras via
-    **pie_kwargs to `Axes.pie`. Provide either `data_file` (JSON object mapping
-    labels to numbers) or both `labels` and `values`.
-    """
-    try:
-        import matplotlib.pyplot as plt
-    except ImportError as exc:
-        raise ImportError("matplotlib is required for pie_chart") from exc
-
-    # Configure matplotlib for Chinese character support
-    plt.rcParams.update(MATPLOTLIB_CHINESE_CONFIG)
-
-    pie_labels, pie_values = _normalize_series(data_file=data_file, labels=labels, values=values)
+    plt = _pyplot("pie_chart")
 
     fig, ax = plt.subplots(figsize=figsize)
     wedges, texts, autotexts = ax.pie(
-        pie_values,
-        labels=pie_labels,
+        values,
+        labels=labels,
         autopct=autopct,
         startangle=startangle,
         **pie_kwargs,
@@ -247,8 +324,260 @@ def pie_chart(
     plt.setp(autotexts, size=9)
     plt.setp(texts, size=10)
 
-    path = _ensure_output_path(output_path, prefix="pie")
     fig.tight_layout()
     fig.savefig(path, bbox_inches="tight")
     plt.close(fig)
     return str(path)
+
+
+# Chart kind -> (drawer, output file prefix).
+_DRAWERS: Dict[str, Tuple[Callable[..., str], str]] = {
+    "bar": (_draw_bar_chart, "bar"),
+    "pie": (_draw_pie_chart, "pie"),
+    "heatmap": (_draw_heat_map, "heatmap"),
+}
+_SVG_RENDERERS: Dict[str, Callable[..., str]] = {
+    "bar": svg_charts.bar_svg,
+    "pie": svg_charts.pie_svg,
+    "heatmap": svg_charts.heat_map_svg,
+}
+
+
+def _is_native(kind: str, path: str, options: Dict[str, Any]) -> bool:
+    """Whether the chart is written by `svg_charts` instead of matplotlib."""
+    return Path(path).suffix.lower() == ".svg" and svg_charts.supports(kind, options)
+
+
+def _draw(kind: str, labels: List[str], values: List[float], path: str, options: Dict[str, Any]) -> str:
+    target = Path(path)
+    # Save under a temporary name so a cached path never holds a partial image.
+    scratch = target.with_name(f".{uuid.uuid4().hex}-{target.name}")
+    try:
+        if _is_native(kind, path, options):
+            render = _SVG_RENDERERS[kind]
+            if kind == "heatmap":
+                # Element ids are global once several charts are inlined into one page.
+                render = functools.partial(render, chart_id=_chart_key(kind, labels, values, options)[:16])
+            scratch.write_text(render(labels, values, **options), encoding="utf-8")
+        else:
+            drawer, _ = _DRAWERS[kind]
+            drawer(labels, values, scratch, **options)
+        os.replace(scratch, target)
+    finally:
+        scratch.unlink(missing_ok=True)
+    return str(target)
+
+
+def _plan(
+    kind: str, labels: List[str], values: List[float], output_path: Optional[str], options: Dict[str, Any]
+) -> Tuple[str, bool]:
+    """Return the image path of a chart and whether it still has to be drawn."""
+    if "color" in options:
+        options["color"] = _bar_color(options["color"])
+    key = _chart_key(kind, labels, values, options)
+    suffix = ".svg" if PLOT_NATIVE_SVG and svg_charts.supports(kind, options) else ".png"
+    path = _ensure_output_path(output_path, prefix=_DRAWERS[kind][1], key=key, suffix=suffix)
+    if output_path or not path.exists():
+        return str(path), True
+    # Refresh the recency used by `_evict_charts`.
+    os.utime(path)
+    return str(path), False
+
+
+def _render(
+    kind: str, labels: List[str], values: List[float], output_path: Optional[str], options: Dict[str, Any]
+) -> str:
+    path, pending = _plan(kind, labels, values, output_path, options)
+    if pending:
+        _draw(kind, labels, values, path, options)
+        _evict_charts()
+    return path
+
+
+@tool
+def heap_map(
+    data_file: str,
+    *,
+    title: Optional[str] = None,
+    cmap: str = "Blues",
+    figsize: Optional[Tuple[float, float]] = None,
+    top_n: Optional[int] = None,
+    output_path: Optional[str] = None,
+    **imshow_kwargs,
+) -> str:
+    """
+    Plot a simple heat map for term frequencies and return the saved image path.
+
+    Args:
+        data_file: Path to a JSON file containing a mapping of label -> count (Dict[str, int]).
+        title: Optional chart title.
+        cmap: Matplotlib colormap name for the heat map, default is "Blues".
+        figsize: Figure size passed to matplotlib; by default (10.0, 1.6), widened for many labels.
+        top_n: Number of largest values drawn (default `PLOT_HEATMAP_TOP_N`, 0 for all).
+        output_path: Optional path to save the image; when omitted, saves to files/.
+        **imshow_kwargs: Forwarded to `Axes.imshow` for flexibility.
+
+    Without `imshow_kwargs`, with a colormap `svg_charts` supports, and unless `output_path` names
+    another format, the heat map is written as SVG without matplotlib.
+    """
+    labels, values, figsize = _series("heatmap", figsize, top_n, data_file=data_file)
+    options = {"title": title, "cmap": cmap, "figsize": figsize, **imshow_kwargs}
+    return _render("heatmap", labels, values, output_path, options)
+
+
+@tool
+def bar_chart(
+    data_file: Optional[str] = None,
+    *,
+    labels: Optional[Iterable[str]] = None,
+    values: Optional[Iterable[float]] = None,
+    title: Optional[str] = None,
+    xlabel: Optional[str] = None,
+    ylabel: Optional[str] = None,
+    color: Optional[Iterable[str]] = None,
+    figsize: Optional[Tuple[float, float]] = None,
+    rotation: float = 30.0,
+    top_n: Optional[int] = None,
+    output_path: Optional[str] = None,
+    **bar_kwargs,
+) -> str:
+    """
+    Draw a bar chart and return the saved image path.
+
+    Args mirror matplotlib's bar-related options where possible, forwarding extras
+    via **bar_kwargs to `Axes.bar`. Provide either `data_file` (JSON object mapping
+    labels to numbers) or both `labels` and `values`. Without **bar_kwargs, and unless
+    `output_path` names another format, the chart is written as SVG without matplotlib.
+    Only the `top_n` largest bars are drawn (default `PLOT_BAR_TOP_N`, 0 for all), the
+    rest summed into a "其他" bar; the default figure widens with the number of bars.
+    """
+    x_labels, y_values, figsize = _series("bar", figsize, top_n, data_file=data_file, labels=labels, values=values)
+    options = {
+        "title": title,
+        "xlabel": xlabel,
+        "ylabel": ylabel,
+        "color": color,
+        "figsize": figsize,
+        "rotation": rotation,
+        **bar_kwargs,
+    }
+    return _render("bar", x_labels, y_values, output_path, options)
+
+
+@tool
+def pie_chart(
+    data_file: Optional[str] = None,
+    *,
+    labels: Optional[Iterable[str]] = None,
+    values: Optional[Iterable[float]] = None,
+    title: Optional[str] = None,
+    autopct: str = "%.1f%%",
+    startangle: float = 90.0,
+    figsize: Optional[Tuple[float, float]] = None,
+    top_n: Optional[int] = None,
+    output_path: Optional[str] = None,
+    **pie_kwargs,
+) -> str:
+    """
+    Draw a pie chart and return the saved image path.
+
+    Args mirror matplotlib's pie options where possible, forwarding extras via
+    **pie_kwargs to `Axes.pie`. Provide either `data_file` (JSON object mapping
+    labels to numbers) or both `labels` and `values`. Without **pie_kwargs, and unless
+    `output_path` names another format, the chart is written as SVG without matplotlib.
+    Only the `top_n` largest wedges are drawn (default `PLOT_PIE_TOP_N`, 0 for all), the
+    rest summed into a "其他" wedge.
+    """
+    pie_labels, pie_values, figsize = _series("pie", figsize, top_n, data_file=data_file, labels=labels, values=values)
+    options = {"title": title, "autopct": autopct, "startangle": startangle, "figsize": figsize, **pie_kwargs}
+    return _render("pie", pie_labels, pie_values, output_path, options)
+
+
+def _warm_worker() -> None:
+    """Pool initializer: load pyplot, apply rcParams and resolve the CJK fonts once."""
+    plt = _pyplot("render_charts")
+    fig, ax = plt.subplots(figsize=(1.0, 1.0))
+    ax.set_title("预热")
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=PLOT_POOL_WORKERS,
+                mp_context=multiprocessing.get_context(PLOT_POOL_START_METHOD),
+                initializer=_warm_worker,
+            )
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _prepare(spec: Dict[str, Any]) -> Tuple[Tuple[str, List[str], List[float], str, Dict[str, Any]], bool]:
+    options = dict(spec)
+    kind = options.pop("kind", None)
+    if kind not in _DRAWERS:
+        raise ValueError(f"unsupported chart kind: {kind!r}; expected one of {sorted(_DRAWERS)}")
+    labels, values, options["figsize"] = _series(
+        kind,
+        options.pop("figsize", None),
+        options.pop("top_n", None),
+        data_file=options.pop("data_file", None),
+        labels=options.pop("labels", None),
+        values=options.pop("values", None),
+    )
+    path, pending = _plan(kind, labels, values, options.pop("output_path", None), options)
+    return (kind, labels, values, path, options), pending
+
+
+@tool
+def render_charts(specs: List[Dict[str, Any]]) -> List[str]:
+    """
+    Render several charts at once in a pool of warm worker processes and return their image paths.
+
+    Args:
+        specs: One dict per chart with `kind` ("bar", "pie" or "heatmap"), either `data_file`
+            or `labels` and `values`, and any option of `bar_chart` / `pie_chart` / `heap_map`, e.g.
+            `[{"kind": "bar", "data_file": "files/demand_counts.json", "title": "Demand frequency"}]`.
+
+    Returns:
+        Saved image paths, in the order of `specs`; unchanged charts reuse their cached image.
+    """
+    planned = [_prepare(spec) for spec in specs]
+    pending = [job for job, needs_drawing in planned if needs_drawing]
+    # Native SVG charts take milliseconds; only matplotlib charts are worth a worker.
+    jobs = []
+    for job in pending:
+        kind, _, _, path, options = job
+        if _is_native(kind, path, options):
+            _draw(*job)
+        else:
+            jobs.append(job)
+    if len(jobs) <= 1 or PLOT_POOL_WORKERS <= 1:
+        for job in jobs:
+            _draw(*job)
+    else:
+        try:
+            list(_get_pool().map(_draw, *zip(*jobs)))
+        except BrokenProcessPool as exc:
+            logger.warning("Chart worker pool failed (%s); rendering in process.", exc)
+            _reset_pool()
+            for job in jobs:
+                _draw(*job)
+    if pending:
+        _evict_charts()
+    return [job[3] for job, _ in planned]
@@ -1,10 +1,26 @@
-"""Utility functions for working with label statistics and sorting."""
+"""Utility functions for working with label statistics and sorting.
+
+The `*_file` tools take artifact file paths and column names and write their result to a
+file, so that ids and labels never pass through the orchestrator's context. They compute
+with pandas in one vectorized pass; the in-memory tools are kept for small inputs.
+pandas is imported on first use to keep it out of the agents' startup.
+"""
+
+from __future__ import annotations
 
 from enum import Enum
-from typing import Any, Dict, List
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
 
 from langchain_core.tools import tool
 
+from ..memory.state import load_dataset
+from .artifact_codec import ARTIFACT_SUFFIX
+from .file_storage import write_json_file
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class Order(str, Enum):
     """Sorting order for collection utilities."""
@@ -20,13 +36,12 @@ def invert_index(id2labels: Dict[int, List[str]]) -> Dict[str, List[int]]:
     Args:
         id2labels: Mapping of item identifiers to the labels they carry.
     """
-    label2ids: Dict[str, List[int]] = {}
+    # Insertion-ordered dicts keep the first-seen id order with O(1) duplicate checks.
+    label2ids: Dict[str, Dict[int, None]] = {}
     for item_id, labels in id2labels.items():
         for label in labels:
-            ids = label2ids.setdefault(label, [])
-            if item_id not in ids:
-                ids.append(item_id)
-    return label2ids
+            label2ids.setdefault(label, {})[item_id] = None
+    return {label: list(ids) for label, ids in label2ids.items()}
 
 
 @tool
@@ -61,3 +76,214 @@ def count_elements(values: List[str]) -> Dict[str, int]:
     for value in values:
         counts[value] = counts.get(value, 0) + 1
     return counts
+
+
+def _load_columns(file_path: str, columns: Sequence[str], optional: Sequence[str] = ()) -> pd.DataFrame:
+    """Load the given columns of a records file; `optional` columns may be absent and read as NaN."""
+    import pandas as pd
+
+    records = load_dataset(file_path)
+    if not isinstance(records, list):
+        raise ValueError(f"{file_path}: expected a list of records")
+    frame = pd.DataFrame.from_records(records)
+    missing = [column for column in columns if column not in frame.columns]
+    if records and missing:
+        raise ValueError(f"{file_path}: missing columns {missing}")
+    return frame.reindex(columns=[*columns, *optional])
+
+
+def _load_mapping(file_path: str) -> pd.Series:
+    import pandas as pd
+
+    mapping = load_dataset(file_path)
+    if not isinstance(mapping, dict):
+        raise ValueError(f"{file_path}: expected a JSON object")
+    return pd.Series(mapping, dtype=object)
+
+
+def _rank(values: pd.Series, order: Order) -> pd.Series:
+    """Sort `values` in `order`, breaking ties by ascending key."""
+    import pandas as pd
+
+    if order not in (Order.ASC, Order.DESC):
+        raise ValueError(f"unsupported order: {order}")
+    frame = pd.DataFrame({"key": values.index, "value": values.to_numpy()})
+    frame = frame.sort_values(["value", "key"], ascending=[order == Order.ASC, True], kind="stable")
+    return pd.Series(frame["value"].to_numpy(), index=frame["key"].to_numpy())
+
+
+@tool
+def invert_index_file(
+    input_file_path: str,
+    label_column: str,
+    id_column: str = "id",
+    output_file_path: Optional[str] = None,
+) -> str:
+    """Agent tool: invert a records file of item ids and labels into a labels to ids file.
+
+    Args:
+        input_file_path: JSON / JSON Lines file of records, e.g. the demand classification output
+            `[{"id": 1, "content": "...", "demands": ["4K导出"]}]`.
+        label_column: Record field holding a label or a list of labels, e.g. `demands`.
+        id_column: Record field holding the item id.
+        output_file_path: Optional output path; a new file in `files/` when omitted.
+
+    Returns:
+        Output file path of the mapping, e.g. `{"4K导出": [1, 7]}`.
+    """
+    frame = _load_columns(input_file_path, [id_column, label_column])
+    pairs = frame.explode(label_column).dropna(subset=[label_column]).drop_duplicates()
+    grouped = pairs.groupby(label_column, sort=False)[id_column].agg(list)
+    return write_json_file(grouped.to_dict(), output_file_path)
+
+
+@tool
+def sort_by_len_file(input_file_path: str, order: Order, output_file_path: Optional[str] = None) -> str:
+    """Agent tool: sort the keys of a mapping file by the length of their lists.
+
+    Args:
+        input_file_path: JSON file of a mapping from keys to lists, e.g. an `invert_index_file` output.
+        order: Sorting direction (`Order.ASC` or `Order.DESC`).
+        output_file_path: Optional output path; a new file in `files/` when omitted.
+
+    Returns:
+        Output file path of the sorted key list.
+    """
+    lengths = _load_mapping(input_file_path).str.len().fillna(0).astype(int)
+    return write_json_file(_rank(lengths, order).index.tolist(), output_file_path)
+
+
+@tool
+def sort_by_val_file(input_file_path: str, order: Order, output_file_path: Optional[str] = None) -> str:
+    """Agent tool: sort the keys of a mapping file by their numeric values.
+
+    Args:
+        input_file_path: JSON file of a mapping from keys to numbers, e.g. a `count_elements_file` output.
+        order: Sorting direction (`Order.ASC` or `Order.DESC`).
+        output_file_path: Optional output path; a new file in `files/` when omitted.
+
+    Returns:
+        Output file path of the sorted key list.
+    """
+    import pandas as pd
+
+    values = pd.to_numeric(_load_mapping(input_file_path))
+    return write_json_file(_rank(values, order).index.tolist(), output_file_path)
+
+
+@tool
+def count_elements_file(
+    input_file_path: str,
+    column: str,
+    order: Order = Order.DESC,
+    output_file_path: Optional[str] = None,
+) -> str:
+    """Agent tool: count the occurrences of each value of a records file column.
+
+    Args:
+        input_file_path: JSON / JSON Lines file of records, e.g. the sentiment classification output.
+        column: Record field to count; list values count each element, e.g. `sentiment` or `demands`.
+        order: Order of the counts in the output (`Order.ASC` or `Order.DESC`).
+        output_file_path: Optional output path; a new file in `files/` when omitted.
+
+    Returns:
+        Output file path of the value to count mapping, e.g. `{"negative": 12, "positive": 30}`.
+    """
+    values = _load_columns(input_file_path, [column])[column].explode().dropna()
+    counts = _rank(values.value_counts(sort=False), order)
+    return write_json_file(counts.to_dict(), output_file_path)
+
+
+@tool
+def report_metrics_tool(
+    demands_file_path: str,
+    sentiment_file_path: str,
+    comments_file_path: Optional[str] = None,
+    top_n: int = 3,
+    examples_per_demand: int = 3,
+    negative_label: str = "negative",
+    output_dir: Optional[str] = None,
+) -> Dict[str, str]:
+    """Agent tool: compute every report metric from the demand and sentiment results in one call.
+
+    Joins the two classification outputs by `id` and writes a metrics bundle plus ready-to-plot
+    files (JSON objects mapping labels to numbers).
+
+    Args:
+        demands_file_path: Demand classification output, `[{"id": 1, "content": "...", "demands": ["4K导出"]}]`.
+        sentiment_file_path: Sentiment classification output, `[{"id": 1, "content": "...", "sentiment": "negative"}]`.
+        comments_file_path: Optional comment file with `likes` (e.g. the sanitized comments) for likes-weighted scores.
+        top_n: Number of demands listed under `top_demands`.
+        examples_per_demand: Number of most-liked negative comments kept per demand.
+        negative_label: Sentiment label counted as negative.
+        output_dir: Optional directory for the output files; new files in `files/` when omitted.
+
+    Returns:
+        Mapping of output name to file path:
+            metrics: bundle with `top_demands`, `sentiment_distribution`, `demand_sentiment_matrix`,
+                `demand_scores`, `negative_reasons` and `top_negative_comments`;
+            demand_counts: demand -> comment count, for `bar_chart`;
+            sentiment_counts: sentiment -> comment count, for `pie_chart`;
+            negative_reasons: demand -> negative comment count, for `bar_chart`;
+            demand_scores: demand -> likes-weighted score (each comment counts 1 + likes), for `bar_chart`;
+            negative_share: demand -> percentage of negative comments, for `heap_map`.
+    """
+    import pandas as pd
+
+    demands = _load_columns(demands_file_path, ["id", "demands"], optional=["content"])
+    sentiments = _load_columns(sentiment_file_path, ["id", "sentiment"]).drop_duplicates("id")
+    if comments_file_path:
+        likes = _load_columns(comments_file_path, ["id"], optional=["likes"]).drop_duplicates("id")
+    else:
+        likes = pd.DataFrame({"id": sentiments["id"], "likes": 0})
+
+    joined = demands.merge(sentiments, on="id", how="inner").merge(likes, on="id", how="left")
+    joined["likes"] = pd.to_numeric(joined["likes"], errors="coerce").fillna(0)
+    pairs = joined.explode("demands").dropna(subset=["demands"]).drop_duplicates(["id", "demands"])
+
+    demand_counts = _rank(pairs.groupby("demands")["id"].size(), Order.DESC)
+    demand_scores = _rank(pairs.groupby("demands")["likes"].sum() + demand_counts, Order.DESC)
+    sentiment_counts = _rank(sentiments["sentiment"].value_counts(sort=False), Order.DESC)
+    total = int(sentiment_counts.sum())
+
+    matrix = pd.crosstab(pairs["demands"], pairs["sentiment"]).reindex(demand_counts.index, fill_value=0)
+    negatives = pairs[pairs["sentiment"] == negative_label]
+    negative_reasons = _rank(negatives.groupby("demands")["id"].size(), Order.DESC)
+    negative_column = matrix[negative_label] if negative_label in matrix else pd.Series(0, index=matrix.index)
+    negative_share = (negative_column / demand_counts * 100).round(2)
+    examples = (
+        negatives.sort_values(["likes", "id"], ascending=[False, True], kind="stable")
+        .groupby("demands", sort=False)
+        .head(examples_per_demand)
+    )
+
+    metrics = {
+        "total_comments": total,
+        "top_demands": [
+            {"demand": demand, "count": int(count), "score": float(demand_scores[demand])}
+            for demand, count in demand_counts.head(top_n).items()
+        ],
+        "sentiment_distribution": {
+            sentiment: {"count": int(count), "percent": round(count / total * 100, 2) if total else 0.0}
+            for sentiment, count in sentiment_counts.items()
+        },
+        "demand_sentiment_matrix": matrix.to_dict(orient="index"),
+        "demand_scores": demand_scores.to_dict(),
+        "negative_reasons": negative_reasons.to_dict(),
+        "top_negative_comments": {
+            demand: group[["id", "content", "likes"]].to_dict(orient="records")
+            for demand, group in examples.groupby("demands", sort=False)
+        },
+    }
+    outputs = {
+        "metrics": metrics,
+        "demand_counts": demand_counts.to_dict(),
+        "sentiment_counts": sentiment_counts.to_dict(),
+        "negative_reasons": negative_reasons.to_dict(),
+        "demand_scores": demand_scores.to_dict(),
+        "negative_share": negative_share.to_dict(),
+    }
+    return {
+        name: write_json_file(payload, str(Path(output_dir) / f"{name}{ARTIFACT_SUFFIX}") if output_dir else None)
+        for name, payload in outputs.items()
+    }
@@ -0,0 +1,264 @@
+"""Matplotlib-free SVG rendering of the simple charts drawn by `plot_draw`.
+
+Covers plain bar charts, pie charts and single-row heat maps with the options the plot
+tools expose; everything else is left to matplotlib. Sizes follow matplotlib's defaults
+(figsize in inches at 100 dpi), so both renderers produce comparable layouts.
+"""
+
+import itertools
+import math
+import unicodedata
+from html import escape
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+DPI = 100
+FONT_FAMILY = "'PingFang HK', 'Hiragino Sans GB', 'Heiti TC', STHeiti, 'Arial Unicode MS', 'DejaVu Sans', sans-serif"
+# matplotlib's default "tab10" color cycle.
+PALETTE = [
+    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+    "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf",
+]
+# Endpoints of the sequential colormaps rendered natively, from matplotlib.
+CMAPS = {
+    "Blues": ("#f7fbff", "#08306b"),
+    "Greens": ("#f7fcf5", "#00441b"),
+    "Greys": ("#ffffff", "#000000"),
+    "Oranges": ("#fff5eb", "#7f2704"),
+    "Purples": ("#fcfbfd", "#3f007d"),
+    "Reds": ("#fff5f0", "#67000d"),
+}
+
+BAR_OPTIONS = frozenset({"title", "xlabel", "ylabel", "color", "figsize", "rotation"})
+PIE_OPTIONS = frozenset({"title", "autopct", "startangle", "figsize"})
+HEAT_MAP_OPTIONS = frozenset({"title", "cmap", "figsize"})
+
+# Fallback element ids for charts rendered without a `chart_id`.
+_chart_ids = itertools.count(1)
+
+
+def supports(kind: str, options: dict) -> bool:
+    """Whether a chart of `kind` with `options` can be drawn without matplotlib."""
+    if kind == "bar":
+        color = options.get("color")
+        return set(options) <= BAR_OPTIONS and (color is None or isinstance(color, (str, list)))
+    if kind == "pie":
+        autopct = options.get("autopct", "%.1f%%")
+        return set(options) <= PIE_OPTIONS and (autopct is None or isinstance(autopct, str))
+    if kind == "heatmap":
+        return set(options) <= HEAT_MAP_OPTIONS and options.get("cmap", "Blues") in CMAPS
+    return False
+
+
+def text_width(text: str, size: float) -> float:
+    """Approximate rendered width of `text`; CJK characters are full-width."""
+    return sum(size if unicodedata.east_asian_width(char) in "WF" else size * 0.6 for char in text)
+
+
+def _fmt(value: float) -> str:
+    return f"{value:g}"
+
+
+def _text(
+    x: float,
+    y: float,
+    content: str,
+    size: float = 10,
+    anchor: str = "middle",
+    rotate: float = 0.0,
+    baseline: str = "central",
+) -> str:
+    transform = f' transform="rotate({_fmt(-rotate)} {x:.1f} {y:.1f})"' if rotate else ""
+    return (
+        f'<text x="{x:.1f}" y="{y:.1f}" font-size="{_fmt(size)}" text-anchor="{anchor}" '
+        f'dominant-baseline="{baseline}"{transform}>{escape(content)}</text>'
+    )
+
+
+def _document(figsize: Tuple[float, float], body: Iterable[str], title: Optional[str]) -> str:
+    width, height = figsize[0] * DPI, figsize[1] * DPI
+    lines = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" '
+        f'viewBox="0 0 {width:.0f} {height:.0f}" font-family="{escape(FONT_FAMILY)}">',
+        f'<rect width="{width:.0f}" height="{height:.0f}" fill="#ffffff"/>',
+    ]
+    if title:
+        lines.append(_text(width / 2, 16, title, size=12))
+    lines.extend(body)
+    lines.append("</svg>")
+    return "\n".join(lines) + "\n"
+
+
+def _rotated_extent(labels: Sequence[str], size: float, rotation: float) -> float:
+    """Vertical space taken by the longest tick label at `rotation` degrees."""
+    longest = max((text_width(label, size) for label in labels), default=0.0)
+    angle = math.radians(rotation)
+    return abs(longest * math.sin(angle)) + size * abs(math.cos(angle))
+
+
+def _nice_ticks(low: float, high: float, count: int = 5) -> List[float]:
+    raw = (high - low or 1.0) / count
+    magnitude = 10 ** math.floor(math.log10(raw))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw)
+    first, last = math.floor(low / step + 1e-9), math.ceil(high / step - 1e-9)
+    return [round(index * step, 10) for index in range(first, max(last, first + 1) + 1)]
+
+
+def _mix(low: str, high: str, t: float) -> str:
+    a = [int(low[i : i + 2], 16) for i in (1, 3, 5)]
+    b = [int(high[i : i + 2], 16) for i in (1, 3, 5)]
+    return "#" + "".join(f"{round(x + (y - x) * t):02x}" for x, y in zip(a, b))
+
+
+def bar_svg(
+    labels: Sequence[str],
+    values: Sequence[float],
+    *,
+    title: Optional[str] = None,
+    xlabel: Optional[str] = None,
+    ylabel: Optional[str] = None,
+    color: Any = None,
+    figsize: Tuple[float, float] = (8.0, 4.0),
+    rotation: float = 30.0,
+) -> str:
+    """Render a bar chart as an SVG document."""
+    width, height = figsize[0] * DPI, figsize[1] * DPI
+    ticks = _nice_ticks(min(0.0, *values), max(0.0, *values))
+    low, high = ticks[0], ticks[-1]
+    tick_width = max(text_width(_fmt(tick), 9) for tick in ticks)
+
+    left = tick_width + 14 + (18 if ylabel else 0)
+    top = 30 if title else 12
+    bottom = height - _rotated_extent(labels, 9, rotation) - 12 - (18 if xlabel else 0)
+    right = width - 12
+    plot_height = max(bottom - top, 1.0)
+
+    def y_of(value: float) -> float:
+        return bottom - (value - low) / ((high - low) or 1.0) * plot_height
+
+    colors = [color] if isinstance(color, str) else list(color or []) or PALETTE[:1]
+    slot = (right - left) / len(labels)
+    body = [
+        f'<rect x="{left:.1f}" y="{top:.1f}" width="{right - left:.1f}" height="{plot_height:.1f}" '
+        'fill="none" stroke="#000000" stroke-width="0.8"/>'
+    ]
+    for tick in ticks:
+        y = y_of(tick)
+        body.append(f'<line x1="{left - 4:.1f}" y1="{y:.1f}" x2="{left:.1f}" y2="{y:.1f}" stroke="#000000"/>')
+        body.append(_text(left - 6, y, _fmt(tick), size=9, anchor="end"))
+    for index, (label, value) in enumerate(zip(labels, values)):
+        x = left + slot * index + slot * 0.1
+        y0, y1 = sorted((y_of(0.0), y_of(value)))
+        fill = str(colors[index % len(colors)])
+        body.append(
+            f'<rect x="{x:.1f}" y="{y0:.1f}" width="{slot * 0.8:.1f}" height="{y1 - y0:.1f}" fill="{escape(fill)}">'
+            f"<title>{escape(label)}: {_fmt(value)}</title></rect>"
+        )
+        center = left + slot * (index + 0.5)
+        anchor = "end" if rotation else "middle"
+        body.append(_text(center, bottom + 8, label, size=9, anchor=anchor, rotate=rotation, baseline="hanging"))
+    if xlabel:
+        body.append(_text((left + right) / 2, height - 10, xlabel, size=10))
+    if ylabel:
+        body.append(_text(12, (top + bottom) / 2, ylabel, size=10, rotate=90))
+    return _document(figsize, body, title)
+
+
+def pie_svg(
+    labels: Sequence[str],
+    values: Sequence[float],
+    *,
+    title: Optional[str] = None,
+    autopct: Optional[str] = "%.1f%%",
+    startangle: float = 90.0,
+    figsize: Tuple[float, float] = (6.0, 6.0),
+) -> str:
+    """Render a pie chart as an SVG document; wedges run counterclockwise from `startangle`."""
+    if any(value < 0 for value in values):
+        raise ValueError("Wedge sizes must be non negative")
+    total = float(sum(values))
+    if total <= 0:
+        raise ValueError("pie chart values sum to zero")
+
+    width, height = figsize[0] * DPI, figsize[1] * DPI
+    top = 30 if title else 0
+    cx, cy = width / 2, top + (height - top) / 2
+    radius = min(width, height - top) * 0.32
+
+    def point(angle: float, scale: float = 1.0) -> Tuple[float, float]:
+        rad = math.radians(angle)
+        return cx + radius * scale * math.cos(rad), cy - radius * scale * math.sin(rad)
+
+    body = []
+    angle = startangle
+    for index, (label, value) in enumerate(zip(labels, values)):
+        if value == 0:
+            continue
+        sweep = 360.0 * value / total
+        fill = PALETTE[index % len(PALETTE)]
+        if sweep >= 360.0:
+            body.append(f'<circle cx="{cx:.1f}" cy="{cy:.1f}" r="{radius:.1f}" fill="{fill}"/>')
+        else:
+            (x0, y0), (x1, y1) = point(angle), point(angle + sweep)
+            large = 1 if sweep > 180 else 0
+            body.append(
+                f'<path d="M{cx:.1f},{cy:.1f} L{x0:.1f},{y0:.1f} A{radius:.1f},{radius:.1f} 0 {large} 0 '
+                f'{x1:.1f},{y1:.1f} Z" fill="{fill}"><title>{escape(label)}: {_fmt(value)}</title></path>'
+            )
+        middle = angle + sweep / 2
+        lx, ly = point(middle, 1.1)
+        body.append(_text(lx, ly, label, size=10, anchor="start" if math.cos(math.radians(middle)) >= 0 else "end"))
+        if autopct:
+            px, py = point(middle, 0.6)
+            body.append(_text(px, py, autopct % (100.0 * value / total), size=9))
+        angle += sweep
+    return _document(figsize, body, title)
+
+
+def heat_map_svg(
+    labels: Sequence[str],
+    values: Sequence[float],
+    *,
+    title: Optional[str] = None,
+    cmap: str = "Blues",
+    figsize: Tuple[float, float] = (10.0, 1.6),
+    chart_id: Optional[str] = None,
+) -> str:
+    """Render a single-row heat map with a colorbar as an SVG document.
+
+    `chart_id` (e.g. the chart's content hash) makes the gradient id unique, so several
+    heat maps inlined into one page keep their own colormaps; a per-process counter
+    is used when it is omitted.
+    """
+    low_color, high_color = CMAPS[cmap]
+    gradient_id = f"cmap-{chart_id or next(_chart_ids)}"
+    width, height = figsize[0] * DPI, figsize[1] * DPI
+    low, high = min(values), max(values)
+
+    left, right = 10.0, width - 70
+    top = 30 if title else 8
+    bottom = max(height - _rotated_extent(labels, 9, 45) - 10, top + 10)
+    cell = (right - left) / len(labels)
+
+    body = [
+        f'<defs><linearGradient id="{gradient_id}" x1="0" y1="1" x2="0" y2="0">'
+        f'<stop offset="0" stop-color="{low_color}"/><stop offset="1" stop-color="{high_color}"/>'
+        "</linearGradient></defs>"
+    ]
+    for index, (label, value) in enumerate(zip(labels, values)):
+        x = left + cell * index
+        fill = _mix(low_color, high_color, (value - low) / (high - low) if high > low else 0.0)
+        body.append(
+            f'<rect x="{x:.1f}" y="{top:.1f}" width="{cell:.1f}" height="{bottom - top:.1f}" fill="{fill}">'
+            f"<title>{escape(label)}: {_fmt(value)}</title></rect>"
+        )
+        body.append(_text(x + cell / 2, (top + bottom) / 2, _fmt(value), size=9))
+        body.append(_text(x + cell / 2, bottom + 6, label, size=9, anchor="end", rotate=45, baseline="hanging"))
+
+    bar_x = right + 12
+    body.append(
+        f'<rect x="{bar_x:.1f}" y="{top:.1f}" width="12" height="{bottom - top:.1f}" fill="url(#{gradient_id})" '
+        'stroke="#000000" stroke-width="0.5"/>'
+    )
+    body.append(_text(bar_x + 16, bottom, _fmt(low), size=8, anchor="start"))
+    body.append(_text(bar_x + 16, top, _fmt(high), size=8, anchor="start"))
+    return _document(figsize, body, title)
@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi import HTTPException  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.core import api  # noqa: E402
+
+
+def test_input_path_inside_roots(tmp_path, monkeypatch):
+    monkeypatch.setattr(api, "INPUT_ROOTS", [tmp_path.resolve()])
+    source = tmp_path / "comments.json"
+    source.write_text("[]")
+    assert api._input_path(str(source)) == str(source.resolve())
+
+
+@pytest.mark.parametrize("name", ["missing.json", "../outside.json"])
+def test_input_path_rejected(tmp_path, monkeypatch, name):
+    root = tmp_path / "files"
+    root.mkdir()
+    (tmp_path / "outside.json").write_text("[]")
+    monkeypatch.setattr(api, "INPUT_ROOTS", [root.resolve()])
+    with pytest.raises(HTTPException) as info:
+        api._input_path(str(root / name))
+    assert info.value.status_code == 400
+
+
+
+def test_rejected_job_leaves_no_comment_file(tmp_path, monkeypatch):
+    class FullQueue:
+        def submit(self, agent, content, inputs=None):
+            raise api.QueueFullError("full")
+
+    written = []
+
+    def write_json_file(payload):
+        path = tmp_path / f"comments_{len(written)}.json"
+        path.write_text("[]")
+        written.append(path)
+        return str(path)
+
+    monkeypatch.setattr(api, "write_json_file", write_json_file)
+    client = TestClient(api.create_app(FullQueue()))
+    assert client.post("/jobs", json={"agent": "unknown", "comments": []}).status_code == 400
+    assert written == []
+    assert client.post("/jobs", json={"comments": [{"id": 1}]}).status_code == 429
+    assert len(written) == 1
+    assert not written[0].exists()
+
+
+def test_job_gets_the_validated_path_as_state(tmp_path, monkeypatch):
+    monkeypatch.setattr(api, "INPUT_ROOTS", [tmp_path.resolve()])
+    source = tmp_path / "comments.json"
+    source.write_text("[]")
+
+    class Recorder:
+        def submit(self, agent, content, inputs=None):
+            self.inputs = inputs
+            raise api.QueueFullError("full")
+
+    jobs = Recorder()
+    client = TestClient(api.create_app(jobs))
+    client.post("/jobs", json={"input_file_path": str(source), "instruction": "Analyze /etc/passwd.json"})
+    assert jobs.inputs == {"input_file_path": str(source.resolve())}
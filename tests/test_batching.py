@@ -0,0 +1,11 @@
+import json
+
+from src.agents.batching import count_tokens, pack_by_tokens
+
+
+def test_pack_by_tokens_bounds_groups_of_lists_by_budget():
+    partials = [["item"] * 50, ["item"] * 50, ["x"], ["y"]]
+    # Room for one large list and a few small ones, but never two large lists.
+    budget = count_tokens(json.dumps(partials[0])) * 3 // 2
+    groups, _ = pack_by_tokens(partials, max_input_tokens=budget, max_items=8)
+    assert groups == [[partials[0]], [partials[1], ["x"], ["y"]]]
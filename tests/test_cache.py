@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("langchain_core.outputs")
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration  # noqa: E402
+
+from src.llms.cache import SQLiteResponseCache, record_cache_keys  # noqa: E402
+
+
+def generation(text, finish_reason="stop"):
+    return ChatGeneration(message=AIMessage(content=text, response_metadata={"finish_reason": finish_reason}))
+
+
+def test_truncated_answers_are_not_cached(tmp_path):
+    cache = SQLiteResponseCache(tmp_path / "cache.sqlite")
+    cache.update("prompt", "llm", [generation('["a", "b', finish_reason="length")])
+    assert cache.lookup("prompt", "llm") is None
+    cache.update("prompt", "llm", [generation('["a", "b"]')])
+    assert cache.lookup("prompt", "llm")[0].text == '["a", "b"]'
+
+
+def test_recorded_keys_evict_rejected_answers(tmp_path):
+    cache = SQLiteResponseCache(tmp_path / "cache.sqlite")
+    cache.update("other", "llm", [generation("[]")])
+    with record_cache_keys() as keys:
+        cache.update("prompt", "llm", [generation("not json")])
+    cache.evict(keys)
+    assert cache.lookup("prompt", "llm") is None
+    assert cache.lookup("other", "llm") is not None
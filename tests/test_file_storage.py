@@ -0,0 +1,23 @@
+from src.tools.artifact_codec import read_artifact
+from src.tools.file_storage import is_jsonl, stream_records
+
+
+def test_stream_records_writes_jsonl_when_asked_for_json(tmp_path):
+    source = tmp_path / "in.jsonl"
+    source.write_text('{"a": 1}\n{"a": 2}\n')
+
+    output = stream_records(str(source), str(tmp_path / "out.json"), lambda chunk: chunk)
+
+    assert output == str(tmp_path / "out.jsonl")
+    assert is_jsonl(output)
+    assert read_artifact(output) == [{"a": 1}, {"a": 2}]
+    assert not (tmp_path / "out.json").exists()
+
+
+def test_stream_records_keeps_compression_when_renaming(tmp_path):
+    source = tmp_path / "in.jsonl"
+    source.write_text('{"a": 1}\n')
+
+    output = stream_records(str(source), str(tmp_path / "out.json.zst"), lambda chunk: chunk)
+
+    assert output == str(tmp_path / "out.jsonl.zst")
@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+from src.llms.cache import SQLiteResponseCache
+from src.llms.hedging import CallCancelled, DeadlineExceeded, Hedger
+
+
+def slow_worker(seconds, answer="ok", started=None, cancelled=None):
+    """Fake streaming model call: emits a token every 5 ms for `seconds`."""
+
+    def attempt(config):
+        if started is not None:
+            started.append(time.monotonic())
+        callback = config["callbacks"][0]
+        end = time.monotonic() + seconds
+        try:
+            while time.monotonic() < end:
+                time.sleep(0.005)
+                callback.on_llm_new_token("x")
+        except (CallCancelled, DeadlineExceeded):
+            if cancelled is not None:
+                cancelled.append(True)
+            raise
+        return answer
+
+    return attempt
+
+
+def warm_up(hedger, name, seconds=0.01, count=5):
+    for _ in range(count):
+        assert hedger.call(name, slow_worker(seconds)) == "ok"
+
+
+def test_no_hedge_before_min_samples():
+    hedger = Hedger(min_samples=5)
+    started = []
+    assert hedger.call("c", slow_worker(0.1, started=started)) == "ok"
+    assert len(started) == 1
+    assert hedger.stats()["c"]["hedged"] == 0
+
+
+def test_slow_call_is_hedged_and_duplicate_wins():
+    hedger = Hedger(min_samples=5, min_delay=0)
+    warm_up(hedger, "c")
+    answers = iter([(1.0, "slow"), (0.01, "fast")])
+    cancelled = []
+
+    def attempt(config):
+        seconds, answer = next(answers)
+        return slow_worker(seconds, answer, cancelled=cancelled)(config)
+
+    began = time.monotonic()
+    assert hedger.call("c", attempt) == "fast"
+    assert time.monotonic() - began < 0.5
+
+    time.sleep(0.05)
+    assert cancelled == [True]
+    stats = hedger.stats()["c"]
+    assert stats["calls"] == 6
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+    assert stats["win_rate"] == 1.0
+
+
+def test_invalid_answer_is_not_resent():
+    hedger = Hedger(min_samples=1, min_delay=0)
+    warm_up(hedger, "c", count=1)
+    started = []
+    assert hedger.call("c", slow_worker(0.0, answer=None, started=started)) is None
+    assert len(started) == 1
+
+
+def test_error_is_not_retried():
+    hedger = Hedger(min_samples=1)
+    attempts = []
+
+    def attempt(config):
+        attempts.append(1)
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        hedger.call("c", attempt)
+    assert len(attempts) == 1
+
+
+def test_deadline_cancels_the_attempt():
+    hedger = Hedger(min_samples=5)
+    cancelled = []
+    began = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        hedger.call("d", slow_worker(1.0, cancelled=cancelled), deadline=0.05)
+    assert time.monotonic() - began < 0.5
+
+    time.sleep(0.05)
+    assert cancelled == [True]
+    stats = hedger.stats()["d"]
+    assert stats["deadline_exceeded"] == 1
+    assert stats["calls"] == 0
+
+
+def test_cache_hits_stay_out_of_the_latency_window(tmp_path):
+    hedger = Hedger(min_samples=1, min_delay=0)
+    responses = SQLiteResponseCache(tmp_path / "cache.sqlite")
+    responses.update("prompt", "llm", ["ok"])
+
+    def cached(config):
+        return responses.lookup("prompt", "llm")[0]
+
+    for _ in range(3):
+        assert hedger.call("c", cached) == "ok"
+    assert hedger.hedge_delay("c") is None
+    stats = hedger.stats()["c"]
+    assert stats["calls"] == 3
+    assert stats["cached"] == 3
+
+
+def test_hedge_delay_has_a_floor():
+    hedger = Hedger(min_samples=1, min_delay=0.5)
+    warm_up(hedger, "c", count=1)
+    assert hedger.hedge_delay("c") == 0.5
@@ -0,0 +1,28 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+# Modules that must only be imported when a chart or a statistic is actually computed;
+# see benchmark/import_time.py for the timing budgets.
+DEFERRED_MODULES = ["matplotlib", "numpy", "pandas"]
+
+
+def imported(module):
+    """Names of the deferred modules present in `sys.modules` after `import module`."""
+    code = f"import json, sys; import {module}; print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))"
+    completed = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True)
+    if completed.returncode != 0:
+        if "ModuleNotFoundError" in completed.stderr:
+            pytest.skip(f"dependencies of {module} are not installed")
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", ["src.agents.chat", "src.agents.binary_classification.agent"])
+def test_entry_points_defer_heavy_imports(module):
+    assert imported(module) == []
@@ -0,0 +1,113 @@
+import json
+
+from src.agents.incremental import (
+    apply_incremental,
+    apply_incremental_filter,
+    content_hash,
+    dropped_path,
+    fingerprint,
+    load_dropped,
+    load_previous,
+    write_dropped,
+)
+
+
+def write(path, records):
+    path.write_text(json.dumps(records, ensure_ascii=False))
+    return str(path)
+
+
+def test_previous_results_with_other_categories_are_ignored(tmp_path):
+    current = fingerprint(["4K导出", "配音自然"])
+    path = write(
+        tmp_path / "previous.json",
+        [
+            {"id": 1, "content": "a", "demands": ["4K导出"], "categories_hash": current},
+            {"id": 2, "content": "b", "demands": ["旧类别"], "categories_hash": fingerprint(["旧类别"])},
+            {"id": 3, "content": "c", "demands": []},
+        ],
+    )
+
+    previous = load_previous(path, "categories_hash", current)
+
+    assert list(previous) == [1]
+
+
+def test_only_unmatched_comments_are_reclassified(tmp_path):
+    current = fingerprint(["x"])
+    path = write(
+        tmp_path / "previous.json",
+        [
+            {"id": 1, "content": "a", "demands": ["x"], "categories_hash": current},
+            {"id": 2, "content": "b", "demands": ["y"], "categories_hash": fingerprint(["y"])},
+        ],
+    )
+    sent = []
+
+    def classify(pending):
+        sent.extend(comment["id"] for comment in pending)
+        return [{"id": comment["id"], "demands": [], "categories_hash": current} for comment in pending]
+
+    comments = [{"id": 1, "content": "a"}, {"id": 2, "content": "b"}]
+    results = apply_incremental(comments, classify, load_previous(path, "categories_hash", current))
+
+    assert sent == [2]
+    assert [record["id"] for record in results] == [1, 2]
+
+
+def test_fingerprint_depends_on_order_and_values():
+    assert fingerprint(["a", "b"]) == fingerprint(["a", "b"])
+    assert fingerprint(["a", "b"]) != fingerprint(["a", "c"])
+
+
+def test_dropped_path_sits_next_to_the_output():
+    assert dropped_path("/x/out.json").name == "out.dropped.jsonl"
+    assert dropped_path("/x/out.jsonl.zst").name == "out.dropped.jsonl"
+
+
+def test_filter_reclassifies_edited_and_unknown_comments(tmp_path):
+    comments = [
+        {"id": 1, "content": "kept", "date": "2025-06-01"},
+        {"id": 2, "content": "dropped", "date": "2025-06-01"},
+        {"id": 3, "content": "edited", "date": "2025-06-01"},
+        {"id": 4, "content": "failed before", "date": "2025-06-01"},
+    ]
+    output = write(tmp_path / "sanitized.json", [comments[0]])
+    write_dropped(
+        output,
+        [
+            {"id": 2, "content_hash": content_hash(comments[1])},
+            {"id": 3, "content_hash": content_hash({"content": "original"})},
+        ],
+    )
+    sent = []
+
+    def sanitize(pending):
+        sent.extend(comment["id"] for comment in pending)
+        kept = [comment for comment in pending if comment["id"] == 4]
+        return kept, [comment for comment in pending if comment["id"] == 3]
+
+    kept, dropped = apply_incremental_filter(
+        comments, sanitize, load_previous(output), load_dropped(output), "2025-06-01"
+    )
+
+    assert sent == [3, 4]
+    assert [comment["id"] for comment in kept] == [1, 4]
+    assert dropped == [
+        {"id": 2, "content_hash": content_hash(comments[1])},
+        {"id": 3, "content_hash": content_hash(comments[2])},
+    ]
+
+
+def test_filter_without_dropped_list_resends_missing_comments(tmp_path):
+    comments = [{"id": 1, "content": "a", "date": "2025-06-01"}, {"id": 2, "content": "b", "date": "2025-06-01"}]
+    output = write(tmp_path / "sanitized.json", [comments[0]])
+    sent = []
+
+    def sanitize(pending):
+        sent.extend(comment["id"] for comment in pending)
+        return [], list(pending)
+
+    apply_incremental_filter(comments, sanitize, load_previous(output), load_dropped(output), "2025-06-01")
+
+    assert sent == [2]
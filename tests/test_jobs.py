@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from src.core.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, Job, JobManager
+from src.memory.state import load_dataset, read_roots_scope
+
+
+def test_final_status_event_is_logged_with_the_status():
+    job = Job(id="j", agent="pipeline", content="")
+    job.set_status(RUNNING)
+    job.publish("step", {"step": "sanitize"})
+    job.set_status(SUCCEEDED)
+
+    events, done = job.events_after(0)
+    assert done
+    assert [event["event"] for event in events] == ["status", "step", "status"]
+    assert events[-1]["data"] == {"status": SUCCEEDED}
+
+
+def test_events_after_skips_seen_events():
+    job = Job(id="j", agent="pipeline", content="")
+    assert job.status == QUEUED
+    job.set_status(RUNNING)
+    job.set_status(FAILED)
+
+    events, done = job.events_after(1)
+    assert done
+    assert [event["id"] for event in events] == [2]
+
+
+def test_shutdown_fails_queued_jobs():
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+    manager._agent = lambda key: release.wait(5) and None
+    running = manager.submit("pipeline", "first")
+    queued = manager.submit("pipeline", "second")
+
+    manager.shutdown()
+    assert queued.status == FAILED
+    assert queued.error
+    release.set()
+    for _ in range(100):
+        if running.done:
+            break
+        time.sleep(0.01)
+    assert running.done
+    assert manager.pending == 0
+
+
+def test_job_tools_only_read_inside_read_roots(tmp_path):
+    allowed = tmp_path / "files"
+    allowed.mkdir()
+    (allowed / "a.json").write_text('["ok"]')
+    (tmp_path / "secret.json").write_text('["secret"]')
+    with read_roots_scope([allowed]):
+        assert load_dataset(str(allowed / "a.json")) == ["ok"]
+        with pytest.raises(PermissionError):
+            load_dataset(str(allowed / ".." / "secret.json"))
+    assert load_dataset(str(tmp_path / "secret.json")) == ["secret"]
+
+
+def test_job_inputs_are_passed_as_state():
+    seen = []
+
+    class Agent:
+        def stream(self, payload, config, stream_mode):
+            seen.append(payload)
+            return iter(())
+
+        def get_state(self, config):
+            return type("State", (), {"values": {}})()
+
+    manager = JobManager(max_workers=1)
+    manager._agent = lambda key: Agent()
+    job = manager.submit("pipeline", "analyze", {"input_file_path": "/data/c.json"})
+    for _ in range(100):
+        if job.done:
+            break
+        time.sleep(0.01)
+    assert job.status == SUCCEEDED
+    assert seen[0]["input_file_path"] == "/data/c.json"
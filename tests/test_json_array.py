@@ -0,0 +1,109 @@
+import pytest
+
+from src.agents.json_array import ArrayParser, ArrayStream, parse_json_array, request_array
+
+
+def test_parse_complete_array():
+    assert parse_json_array('["a", "b"]') == (["a", "b"], True)
+
+
+def test_parse_fenced_array():
+    assert parse_json_array('```json\n["a", {"k": "]"}]\n```') == (["a", {"k": "]"}], True)
+
+
+def test_parse_truncated_array_keeps_whole_elements():
+    assert parse_json_array('["a", "b", "c') == (["a", "b"], False)
+    assert parse_json_array('[{"k": "keep"}, {"k": "dr') == ([{"k": "keep"}], False)
+
+
+def test_parse_non_array():
+    assert parse_json_array('{"a": 1}') == (None, True)
+
+
+def test_parser_emits_elements_as_they_close():
+    seen = []
+    parser = ArrayParser(lambda index, value: seen.append((index, value)))
+    for char in 'Sure: ["pos", "ne\\"g", [1, 2], "x"]':
+        parser.feed(char)
+    assert seen == [(0, "pos"), (1, 'ne"g'), (2, [1, 2]), (3, "x")]
+    assert parser.closed
+
+
+def test_parser_stops_items_at_malformed_element():
+    parser = ArrayParser()
+    parser.feed('["L0", L1, "L2", "L3"')
+    assert parser.malformed
+    assert parser.items == ["L0"]
+
+
+def test_parse_truncated_malformed_array_is_incomplete():
+    items, complete = parse_json_array('["L0", L1, "L2", "L3')
+    assert not complete
+    assert len(items) <= 3
+
+
+def test_request_array_asks_only_for_the_tail():
+    answers = ['["l0", "l1", "l2"', '["l2", "l3", "l4"]']
+    asked = []
+
+    def ask(texts, stream):
+        asked.append(list(texts))
+        return answers.pop(0)
+
+    texts = [f"t{index}" for index in range(5)]
+    assert request_array(texts, ask) == ["l0", "l1", "l2", "l3", "l4"]
+    assert asked == [texts, texts[2:]]
+
+
+def test_request_array_salvages_a_failed_stream_without_shifting():
+    asked = []
+
+    def ask(texts, stream):
+        asked.append(list(texts))
+        if len(asked) == 1:
+            for token in ['["L0",', " L1,", ' "L2",', ' "L3']:
+                stream.on_llm_new_token(token)
+            raise ConnectionError("stream dropped")
+        return '["L1", "L2", "L3", "L4"]'
+
+    texts = [f"t{index}" for index in range(5)]
+    assert request_array(texts, ask) == ["L0", "L1", "L2", "L3", "L4"]
+    assert asked == [texts, texts[1:]]
+
+
+def test_request_array_reraises_when_nothing_was_received():
+    def ask(texts, stream):
+        raise ConnectionError("no answer")
+
+    with pytest.raises(ConnectionError):
+        request_array(["a"], ask)
+
+
+def test_array_stream_attach_keeps_existing_callbacks():
+    stream = ArrayStream()
+    existing = object()
+    config = stream.attach({"callbacks": [existing], "tags": ["x"]})
+    assert config["callbacks"] == [existing, stream]
+    assert config["tags"] == ["x"]
+
+
+def test_parser_keeps_falsy_elements_repaired_from_noise():
+    parser = ArrayParser()
+    parser.feed('[["a"], [] // none\n, 0, false, ["b"]]')
+    assert not parser.malformed
+    assert parser.items == [["a"], [], 0, False, ["b"]]
+
+
+def test_request_array_reports_items_at_their_text_positions():
+    answers = ['["l0", "l1",', '["l2", "l3", "extra"]']
+    seen = []
+
+    def ask(texts, stream):
+        answer = answers.pop(0)
+        if len(answers) == 1:
+            stream.on_llm_new_token(answer)
+        return answer
+
+    texts = [f"t{index}" for index in range(4)]
+    request_array(texts, ask, on_item=lambda index, item: seen.append((index, item)))
+    assert seen == [(0, "l0"), (1, "l1"), (2, "l2"), (3, "l3")]
@@ -0,0 +1,25 @@
+from src.tools.plot_draw import OTHER_LABEL, _normalize_series
+
+
+def test_top_n_counts_the_other_entry():
+    labels, values = _normalize_series(labels=["a", "b", "c", "d"], values=[4, 1, 3, 2], top_n=3)
+    assert labels == ["a", "c", OTHER_LABEL]
+    assert values == [4.0, 3.0, 3.0]
+
+
+def test_top_n_of_one_keeps_only_the_aggregate():
+    labels, values = _normalize_series(labels=["a", "b", "c"], values=[4, 1, 3], top_n=1)
+    assert labels == [OTHER_LABEL]
+    assert values == [8.0]
+
+
+def test_existing_other_entry_is_merged_into_the_remainder():
+    labels, values = _normalize_series(labels=[OTHER_LABEL, "a", "b", "c"], values=[10, 4, 1, 3], top_n=3)
+    assert labels == ["a", "c", OTHER_LABEL]
+    assert values == [4.0, 3.0, 11.0]
+
+
+def test_top_n_without_other_label_drops_the_rest():
+    labels, values = _normalize_series(labels=["a", "b", "c"], values=[4, 1, 3], top_n=2, other_label=None)
+    assert labels == ["a", "c"]
+    assert values == [4.0, 3.0]
@@ -0,0 +1,38 @@
+import sqlite3
+import time
+
+from src.memory.progress import ProgressStore
+
+
+def test_clear_forgets_only_that_run(tmp_path):
+    store = ProgressStore(tmp_path / "progress.sqlite")
+    store.put("a", "k", [1])
+    store.put("b", "k", [2])
+    store.clear("a")
+    assert store.get("a", "k") is None
+    assert store.get("b", "k") == [2]
+
+
+def test_old_records_are_pruned(tmp_path):
+    store = ProgressStore(tmp_path / "progress.sqlite", max_age_seconds=60)
+    store.put("a", "k", [1])
+    store._conn.execute("UPDATE batches SET created_at = ?", (time.time() - 120,))
+    store.prune()
+    assert store.get("a", "k") is None
+
+
+def test_store_upgrades_tables_without_created_at(tmp_path):
+    path = tmp_path / "progress.sqlite"
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE batches (run_id TEXT NOT NULL, batch_key TEXT NOT NULL, result TEXT NOT NULL,"
+        " PRIMARY KEY (run_id, batch_key))"
+    )
+    conn.execute("INSERT INTO batches VALUES ('a', 'k', '[1]')")
+    conn.commit()
+    conn.close()
+
+    store = ProgressStore(path)
+    assert store.get("a", "k") == [1]
+    store.put("a", "k", [2])
+    assert store.get("a", "k") == [2]
@@ -0,0 +1,28 @@
+import re
+
+from src.tools.plot_draw import _draw
+from src.tools.svg_charts import heat_map_svg
+
+GRADIENT_ID = re.compile(r'<linearGradient id="([^"]+)"')
+
+
+def gradient_ids(svg):
+    ids = GRADIENT_ID.findall(svg)
+    assert len(ids) == 1
+    assert f'fill="url(#{ids[0]})"' in svg
+    return ids[0]
+
+
+def test_heat_maps_get_distinct_gradient_ids():
+    first = heat_map_svg(["a", "b"], [1.0, 2.0], cmap="Blues")
+    second = heat_map_svg(["a", "b"], [1.0, 2.0], cmap="Reds")
+    assert gradient_ids(first) != gradient_ids(second)
+
+
+def test_drawn_heat_map_gradient_id_follows_its_content(tmp_path):
+    def draw(name, cmap):
+        _draw("heatmap", ["a", "b"], [1.0, 2.0], str(tmp_path / name), {"cmap": cmap})
+        return gradient_ids((tmp_path / name).read_text(encoding="utf-8"))
+
+    assert draw("one.svg", "Blues") == draw("again.svg", "Blues")
+    assert draw("one.svg", "Blues") != draw("other.svg", "Reds")